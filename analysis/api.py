@@ -0,0 +1,104 @@
+"""
+API JSON du dashboard (lecture seule)
+Les KPI et les agrégats des graphiques, sans passer par la page Dash :
+
+    GET /api/kpi?annee=1997&pays=France&pays=Germany
+    GET /api/agregats/<jeu>?categorie=Beverages&top=10     jeu : annee, client,
+        pays, categorie, pays_client (voir cube.JEUX)
+
+Chaque réponse porte un ETag dérivé de la version des données publiée par
+l'ETL et des paramètres : un client qui renvoie If-None-Match reçoit 304
+sans qu'aucune agrégation ni sérialisation ne soit faite.
+"""
+
+import hashlib
+
+from flask import jsonify, request
+
+# cube (pandas, numpy) est importé par les routes : import dashboard reste léger
+from donnees import calculer_kpi
+
+# Paramètre de requête -> dimension du cube
+PARAMETRES = {'annee': 'Annee', 'pays': 'Pays', 'categorie': 'Categorie', 'client': 'Client'}
+
+
+def lire_filtres(args):
+    """Filtres du cube depuis la query string (paramètre répété pour plusieurs valeurs)."""
+    filtres = {}
+    for parametre, dimension in PARAMETRES.items():
+        valeurs = [v for v in args.getlist(parametre) if v != '']
+        if parametre == 'annee':
+            try:
+                valeurs = [int(v) for v in valeurs]
+            except ValueError:
+                raise ValueError(f"annee doit être un entier : {valeurs}")
+        if valeurs:
+            filtres[dimension] = sorted(set(valeurs))
+    return filtres
+
+
+def calculer_etag(version, chemin, filtres, top=None):
+    cle = f"{version}|{chemin}|{sorted(filtres.items())}|{top}"
+    prefixe = f"v{version}" if version is not None else 'demo'
+    return f"{prefixe}-" + hashlib.sha1(cle.encode('utf-8')).hexdigest()[:16]
+
+
+def reponse_json(corps, etag):
+    reponse = jsonify(corps)
+    reponse.set_etag(etag)
+    # Le client peut garder la réponse mais doit la revalider (304 si inchangée)
+    reponse.headers['Cache-Control'] = 'no-cache'
+    return reponse
+
+
+def enregistrer_api(server, donnees):
+    """Ajoute les routes /api/* au serveur Flask du dashboard."""
+
+    def servir(calculer, top=None):
+        try:
+            filtres = lire_filtres(request.args)
+        except ValueError as e:
+            return {'erreur': str(e)}, 400
+
+        # Version lue sans charger le cube (ETL_Version, comparée au pointeur d'instantané)
+        version, _ = donnees.version_donnees()
+        etag = calculer_etag(version, request.path, filtres, top)
+        if etag in request.if_none_match:
+            reponse = server.response_class(status=304)
+            reponse.set_etag(etag)
+            reponse.headers['Cache-Control'] = 'no-cache'
+            return reponse
+
+        cube = donnees.cube()
+        corps = calculer(cube, filtres)
+        # Le cube a pu être rechargé entre-temps : l'ETag suit ce qui est servi
+        etag = calculer_etag(cube.version, request.path, filtres, top)
+        corps.update(version=cube.version, filtres=filtres)
+        return reponse_json(corps, etag)
+
+    @server.route('/api/kpi')
+    def route_api_kpi():
+        def calculer(cube, filtres):
+            kpi = calculer_kpi(cube.jeux(filtres, ['annee', 'client', 'pays'], pool=donnees.pool))
+            return {'kpi': {
+                'total_ca': round(float(kpi['total_ca']), 2),
+                'total_commandes': int(kpi['total_commandes']),
+                'moyenne_panier': round(float(kpi['moyenne_panier']), 2),
+                'top_client': kpi['top_client'],
+                'top_pays': kpi['top_pays'],
+            }}
+        return servir(calculer)
+
+    @server.route('/api/agregats/<jeu>')
+    def route_api_agregats(jeu):
+        from cube import JEUX
+        if jeu not in JEUX:
+            return {'erreur': f"jeu inconnu : {jeu}", 'jeux': list(JEUX)}, 404
+        top = request.args.get('top', type=int)
+
+        def calculer(cube, filtres):
+            df = cube.agreger(JEUX[jeu], filtres)
+            if top:
+                df = df.nlargest(top, 'ChiffreAffaires')
+            return {'jeu': jeu, 'grain': JEUX[jeu], 'lignes': df.to_dict('records')}
+        return servir(calculer, top)
@@ -0,0 +1,175 @@
+"""
+Pool de connexions pyodbc du dashboard
+Remplace la connexion unique partagée par tous les callbacks quand
+config.get_engine n'est pas disponible. Nombre de connexions borné, attente
+limitée pour en obtenir une, validation (SELECT 1) des connexions restées
+inactives, reconnexion avec backoff exponentiel après une coupure réseau.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolConnexions:
+    def __init__(self, connecter, taille=5, timeout=30, ping_sql="SELECT 1", ping_apres=5.0,
+                 tentatives=5, backoff=0.5, backoff_max=10.0):
+        """
+        connecter()  : ouvre une nouvelle connexion DB-API
+        taille       : nombre maximal de connexions ouvertes
+        timeout      : attente maximale (s) d'une connexion libre
+        ping_apres   : une connexion inactive depuis plus de N secondes est validée
+        tentatives   : essais d'ouverture, espacés de backoff * 2^n (plafonné)
+        """
+        self.connecter = connecter
+        self.taille = taille
+        self.timeout = timeout
+        self.ping_sql = ping_sql
+        self.ping_apres = ping_apres
+        self.tentatives = tentatives
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+        self._libres = deque()      # (connexion, date de retour au pool)
+        self._ouvertes = 0
+        self._en_cours = 0
+        self._cond = threading.Condition()
+
+        self.checkouts = 0
+        self.attente_totale = 0.0
+        self.attente_max = 0.0
+        self.echecs = 0
+        self.reconnexions = 0
+        self.invalidees = 0
+
+    @contextmanager
+    def connexion(self):
+        """with pool.connexion() as conn: ... ; la connexion revient au pool à la sortie."""
+        conn = self.acquerir()
+        casse = False
+        try:
+            yield conn
+        except Exception:
+            # Erreur SQL ordinaire ou connexion perdue : on ne la rend que si elle répond
+            casse = not self._valide(conn)
+            raise
+        finally:
+            self.rendre(conn, casse)
+
+    def acquerir(self):
+        debut = time.monotonic()
+        conn, rendue_le = None, None
+        with self._cond:
+            while True:
+                if self._libres:
+                    conn, rendue_le = self._libres.pop()
+                    break
+                if self._ouvertes < self.taille:
+                    # Place réservée : la connexion est ouverte hors du verrou
+                    self._ouvertes += 1
+                    break
+                reste = self.timeout - (time.monotonic() - debut)
+                if reste <= 0:
+                    self.echecs += 1
+                    raise TimeoutError(
+                        f"Aucune connexion libre après {self.timeout}s ({self.taille} en cours)")
+                self._cond.wait(reste)
+            attente = time.monotonic() - debut
+            self.checkouts += 1
+            self.attente_totale += attente
+            self.attente_max = max(self.attente_max, attente)
+
+        if conn is not None and time.monotonic() - rendue_le > self.ping_apres:
+            if not self._valide(conn):
+                # Connexion coupée pendant son inactivité : la place est réutilisée
+                self._fermer(conn)
+                with self._cond:
+                    self.invalidees += 1
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._ouvrir()
+            except Exception:
+                with self._cond:
+                    self._ouvertes -= 1
+                    self.echecs += 1
+                    self._cond.notify()
+                raise
+
+        with self._cond:
+            self._en_cours += 1
+        return conn
+
+    def rendre(self, conn, casse=False):
+        if casse:
+            self._fermer(conn)
+        with self._cond:
+            self._en_cours -= 1
+            if casse:
+                self._ouvertes -= 1
+                self.invalidees += 1
+            else:
+                self._libres.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def dispose(self):
+        """Ferme les connexions inactives ; celles en cours reviendront au pool normalement."""
+        with self._cond:
+            libres = list(self._libres)
+            self._libres.clear()
+            self._ouvertes -= len(libres)
+        for conn, _ in libres:
+            self._fermer(conn)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'taille': self.taille,
+                'ouvertes': self._ouvertes,
+                'en_cours': self._en_cours,
+                'libres': len(self._libres),
+                'checkouts': self.checkouts,
+                'attente_moyenne_ms': 1000 * self.attente_totale / self.checkouts
+                if self.checkouts else 0.0,
+                'attente_max_ms': 1000 * self.attente_max,
+                'echecs': self.echecs,
+                'reconnexions': self.reconnexions,
+                'invalidees': self.invalidees,
+            }
+
+    # ---------- interne ----------
+    def _ouvrir(self):
+        for tentative in range(self.tentatives):
+            try:
+                return self.connecter()
+            except Exception as e:
+                if tentative == self.tentatives - 1:
+                    raise
+                # Backoff exponentiel avec gigue : les workers ne se reconnectent pas ensemble
+                delai = min(self.backoff * 2 ** tentative, self.backoff_max)
+                delai *= random.uniform(0.5, 1.0)
+                print(f"⚠️ Connexion au DWH impossible ({e}), nouvel essai dans {delai:.1f}s")
+                time.sleep(delai)
+                with self._cond:
+                    self.reconnexions += 1
+
+    def _valide(self, conn):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.ping_sql)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _fermer(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,292 @@
+"""
+Cube de ventes en mémoire
+Une ligne par ligne de commande de Fact_Ventes, stockée en colonnes numpy :
+chaque dimension est encodée par dictionnaire (codes entiers + libellés) et
+chaque mesure un tableau numérique. Un filtre devient un masque booléen,
+un regroupement un bincount : aucune requête SQL après la construction.
+Le cube peut aussi être ouvert en mémoire mappée sur l'instantané publié par
+l'ETL (etl/snapshot.py) : les colonnes ne sont alors pas copiées.
+
+Le temps ne passe pas par Dim_Temps : TempsID vaut YYYYMMDD (contrat de l'ETL,
+transforms.py et dim_temps.py), l'année est TempsID // 10000 et le mois
+TempsID // 100 % 100, sans jointure. Le nom du mois n'est pas affiché.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Colonnes de sortie des agrégations, comme les requêtes SQL du dashboard
+MESURES = {'ChiffreAffaires': 'MontantVente', 'QuantiteVendue': 'Quantite'}
+
+DIMENSIONS = ['Annee', 'Mois', 'Client', 'Pays', 'Produit', 'Categorie']
+
+# Jeux de données du dashboard : nom -> grain
+JEUX = {
+    'annee': ['Annee'],
+    'client': ['Client'],
+    'pays': ['Pays'],
+    'categorie': ['Categorie'],
+    'pays_client': ['Pays', 'Client'],
+}
+
+# Format de l'instantané, écrit par etl/snapshot.py
+SNAPSHOT_DIR = os.environ.get(
+    'NORTHWIND_SNAPSHOT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'snapshot'))
+SNAPSHOT_MANIFEST = 'manifest.json'
+SNAPSHOT_POINTEUR = 'courant.json'
+
+FAITS_QUERY = """
+SELECT OrderID, TempsID, ClientID, ProduitID, MontantVente, Quantite
+FROM Fact_Ventes
+WHERE TempsID BETWEEN ? AND ?
+"""
+
+CLIENTS_QUERY = "SELECT ClientID, CompanyName, Country FROM Dim_Client"
+
+PRODUITS_QUERY = "SELECT ProduitID, ProductName, CategoryName FROM Dim_Produit"
+
+# Au-delà, les groupes sont numérotés par tri (np.unique) plutôt que par table
+MAX_GROUPES_DENSES = 1_000_000
+
+
+def encoder(valeurs):
+    """(codes int32, libellés) ; libellés triés pour des listes de filtres stables."""
+    codes, libelles = pd.factorize(pd.Series(valeurs).fillna('Inconnu'), sort=True)
+    # Libellés en objets Python natifs : sérialisables tels quels vers les menus
+    return codes.astype(np.int32), np.array(libelles.tolist(), dtype=object)
+
+
+def snapshot_courant(dossier=SNAPSHOT_DIR):
+    """{'version', 'repertoire'} de l'instantané publié, ou None s'il n'y en a pas."""
+    try:
+        with open(os.path.join(dossier, SNAPSHOT_POINTEUR), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def codes_par_cle(cles_faits, cles_dim, codes_dim):
+    """Reporte sur chaque fait le code de la ligne de dimension dont il porte la clé."""
+    positions = pd.Index(cles_dim).get_indexer(cles_faits)
+    if (positions < 0).any():
+        raise ValueError(f"{int((positions < 0).sum())} faits sans ligne de dimension")
+    return codes_dim[positions]
+
+
+class CubeVentes:
+    def __init__(self, dimensions, mesures, commandes, version=None):
+        """
+        dimensions : nom -> (codes int32 par fait, libellés)
+        mesures    : nom -> tableau float64 par fait
+        commandes  : OrderID par fait (comptage distinct des commandes)
+        """
+        self.dimensions = dimensions
+        self.mesures = mesures
+        self.commandes = commandes
+        self.version = version
+        # Filtres appliqués à toutes les requêtes (période du dashboard)
+        self.filtres_base = {}
+        # Bornes TempsID (incluses) de la période retenue, None = toutes les données
+        self.plage = None
+        self._detail = None
+        self._grille = None
+        self._index_libelles = {
+            nom: {libelle: code for code, libelle in enumerate(libelles)}
+            for nom, (_, libelles) in dimensions.items()
+        }
+
+    def __len__(self):
+        return len(self.commandes)
+
+    # ---------- construction ----------
+    @classmethod
+    def depuis_tables(cls, faits, clients, produits, version=None):
+        """Faits à clés entières (TempsID, ClientID, ProduitID) + deux dimensions."""
+        # Les versions SCD2 d'un même client partagent son libellé : un seul code
+        code_client, client = encoder(clients['CompanyName'])
+        code_pays, pays = encoder(clients['Country'])
+        code_produit, produit = encoder(produits['ProductName'])
+        code_categorie, categorie = encoder(produits['CategoryName'])
+
+        # TempsID = YYYYMMDD : année et mois sans jointure sur Dim_Temps
+        temps = faits['TempsID'].to_numpy()
+        code_annee, annee = encoder(temps // 10000)
+        code_mois, mois = encoder(temps // 100 % 100)
+
+        dimensions = {
+            'Annee': (code_annee, annee),
+            'Mois': (code_mois, mois),
+            'Client': (codes_par_cle(faits['ClientID'], clients['ClientID'], code_client), client),
+            'Pays': (codes_par_cle(faits['ClientID'], clients['ClientID'], code_pays), pays),
+            'Produit': (codes_par_cle(faits['ProduitID'], produits['ProduitID'], code_produit), produit),
+            'Categorie': (codes_par_cle(faits['ProduitID'], produits['ProduitID'], code_categorie),
+                          categorie),
+        }
+        mesures = {nom: faits[colonne].to_numpy(dtype=np.float64)
+                   for nom, colonne in MESURES.items()}
+        return cls(dimensions, mesures, faits['OrderID'].to_numpy(dtype=np.int64), version)
+
+    @classmethod
+    def depuis_detail(cls, df, version=None):
+        """Cube à partir de lignes déjà libellées (mode démo)."""
+        dimensions = {nom: encoder(df[nom]) for nom in DIMENSIONS}
+        mesures = {nom: df[nom].to_numpy(dtype=np.float64) for nom in MESURES}
+        # Sans OrderID, chaque ligne de démo compte pour une commande
+        return cls(dimensions, mesures, np.arange(len(df), dtype=np.int64), version)
+
+    @classmethod
+    def depuis_dwh(cls, read_sql, plage, version=None, pool=None):
+        """
+        Charge faits et dimensions avec read_sql(sql, params) puis encode.
+        pool : Executor optionnel, les trois lectures sont alors lancées ensemble.
+        """
+        requetes = [(FAITS_QUERY, plage), (CLIENTS_QUERY, None), (PRODUITS_QUERY, None)]
+        if pool is None:
+            faits, clients, produits = [read_sql(sql, params) for sql, params in requetes]
+        else:
+            futurs = [pool.submit(read_sql, sql, params) for sql, params in requetes]
+            faits, clients, produits = [futur.result() for futur in futurs]
+        cube = cls.depuis_tables(faits, clients, produits, version)
+        cube.plage = tuple(plage)
+        return cube
+
+    @classmethod
+    def depuis_snapshot(cls, dossier=SNAPSHOT_DIR, plage=None):
+        """
+        Ouvre l'instantané courant en mémoire mappée (lecture seule, sans copie).
+        plage : bornes TempsID (incluses) d'années complètes, None = pas de limite.
+        """
+        pointeur = snapshot_courant(dossier)
+        if pointeur is None:
+            raise FileNotFoundError(f"Aucun instantané dans {dossier}")
+        repertoire = os.path.join(dossier, pointeur['repertoire'])
+        with open(os.path.join(repertoire, SNAPSHOT_MANIFEST), encoding='utf-8') as f:
+            manifest = json.load(f)
+
+        def colonne(nom):
+            fichier = os.path.join(repertoire, manifest['colonnes'][nom]['fichier'])
+            return np.load(fichier, mmap_mode='r')
+
+        dimensions = {
+            nom: (colonne(nom), np.array(manifest['colonnes'][nom]['libelles'], dtype=object))
+            for nom in DIMENSIONS
+        }
+        mesures = {nom: colonne(nom) for nom in MESURES}
+        cube = cls(dimensions, mesures, colonne('OrderID'), manifest['version'])
+
+        if plage is None:
+            return cube
+        cube.plage = tuple(plage)
+        # Période en années complètes : filtre sur la dimension Annee de l'instantané
+        premiere, derniere = plage[0] // 10000, plage[1] // 10000
+        retenues = [a for a in cube.libelles('Annee') if premiere <= a <= derniere]
+        if len(retenues) < len(cube.libelles('Annee')):
+            # Liste vide : aucune année dans la période, le cube ne retient rien
+            cube.filtres_base = {'Annee': retenues or [None]}
+        return cube
+
+    # ---------- requêtes ----------
+    def libelles(self, dimension):
+        """Valeurs proposées pour un filtre (restreintes par filtres_base)."""
+        libelles = list(self.dimensions[dimension][1])
+        if dimension in self.filtres_base:
+            return [v for v in libelles if v in self.filtres_base[dimension]]
+        return libelles
+
+    def masque(self, filtres=None):
+        """Masque des faits retenus ; filtres : dimension -> libellés acceptés."""
+        masque = np.ones(len(self), dtype=bool)
+        criteres = list(self.filtres_base.items()) + list((filtres or {}).items())
+        for dimension, valeurs in criteres:
+            if not valeurs:
+                continue
+            codes, libelles = self.dimensions[dimension]
+            index = self._index_libelles[dimension]
+            # Table de correspondance code -> retenu, indexée par les codes des faits
+            retenus = np.zeros(len(libelles), dtype=bool)
+            retenus[[index[v] for v in valeurs if v in index]] = True
+            masque &= retenus[codes]
+        return masque
+
+    def agreger(self, grain, filtres=None):
+        """
+        Ventes agrégées au grain demandé sur les faits filtrés (ChiffreAffaires,
+        QuantiteVendue, NombreCommandes). NombreCommandes est un comptage distinct exact.
+        """
+        masque = self.masque(filtres)
+
+        # Code de groupe combiné : base mixte sur les tailles des dictionnaires
+        cle = np.zeros(int(masque.sum()), dtype=np.int64)
+        taille = 1
+        for dimension in grain:
+            codes, libelles = self.dimensions[dimension]
+            cle = cle * len(libelles) + codes[masque]
+            taille *= len(libelles)
+
+        if taille <= MAX_GROUPES_DENSES:
+            # Peu de combinaisons possibles : renumérotation par table, sans tri
+            presents = np.bincount(cle, minlength=taille) > 0
+            groupes = np.flatnonzero(presents)
+            numeros = np.cumsum(presents) - 1
+            inverse = numeros[cle]
+        else:
+            groupes, inverse = np.unique(cle, return_inverse=True)
+        n = len(groupes)
+
+        resultat = {}
+        reste = groupes
+        for dimension in reversed(grain):
+            libelles = self.dimensions[dimension][1]
+            resultat[dimension] = libelles[reste % len(libelles)]
+            reste = reste // len(libelles)
+        resultat = {dimension: resultat[dimension] for dimension in grain}
+
+        for nom, valeurs in self.mesures.items():
+            resultat[nom] = np.bincount(inverse, weights=valeurs[masque], minlength=n)
+
+        # Commandes distinctes : paires (groupe, OrderID) triées, doublons adjacents écartés
+        paires = np.sort(inverse.astype(np.int64) << 32 | self.commandes[masque])
+        nouvelles = np.ones(len(paires), dtype=bool)
+        nouvelles[1:] = paires[1:] != paires[:-1]
+        resultat['NombreCommandes'] = np.bincount(paires[nouvelles] >> 32, minlength=n)
+
+        return pd.DataFrame(resultat)
+
+    def jeux(self, filtres=None, noms=None, pool=None):
+        """
+        Jeux de données des graphiques et des KPI (tous, ou seulement noms).
+        pool : Executor optionnel pour calculer les agrégations en parallèle
+        (numpy relâche le GIL pendant les tris).
+        """
+        grains = {nom: grain for nom, grain in JEUX.items() if noms is None or nom in noms}
+        if pool is None:
+            return {nom: self.agreger(grain, filtres) for nom, grain in grains.items()}
+        futurs = {nom: pool.submit(self.agreger, grain, filtres) for nom, grain in grains.items()}
+        return {nom: futur.result() for nom, futur in futurs.items()}
+
+    def detail(self):
+        """Ventes au grain le plus fin (mois x client x produit), les plus récentes d'abord."""
+        if self._detail is None:
+            detail = self.agreger(DIMENSIONS)
+            # Libellés encodés en objets : colonnes numériques pour les filtres de la grille
+            detail['Annee'] = pd.to_numeric(detail['Annee'])
+            detail['Mois'] = pd.to_numeric(detail['Mois'])
+            detail['QuantiteVendue'] = detail['QuantiteVendue'].round().astype('int64')
+            self._detail = detail.sort_values(
+                ['Annee', 'Mois', 'ChiffreAffaires'], ascending=False, ignore_index=True)
+        return self._detail
+
+    def grille(self):
+        """Grille paginée sur le détail (ordres de tri gardés tant que le cube vit)."""
+        if self._grille is None:
+            from grille import GrilleDetail
+            self._grille = GrilleDetail(self.detail())
+        return self._grille
+
+    def nbytes(self):
+        total = self.commandes.nbytes + sum(v.nbytes for v in self.mesures.values())
+        return total + sum(codes.nbytes for codes, _ in self.dimensions.values())
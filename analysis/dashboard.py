@@ -1,222 +1,27 @@
 # ==================== DÉBUT DU FICHIER ====================
+"""
+Dashboard Northwind BI
+create_app() construit l'application sans toucher à la base : la page
+squelette est servie immédiatement, les données sont chargées en arrière-plan
+(voir donnees.py) et les graphiques sont remplis par callback dès qu'elles
+sont prêtes. Les filtres (année, pays, catégorie, client) sont appliqués au
+cube en mémoire (cube.py), sans requête SQL.
+"""
 import os
 import sys
-
-# Obtenir le chemin du répertoire parent (Projet_BI)
-# dashboard.py est dans analysis/, donc on remonte d'un niveau
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-
-# Ajouter le chemin racine pour pouvoir importer config
-sys.path.insert(0, PROJECT_ROOT)
-
-print(f" Chemin du projet: {PROJECT_ROOT}")
-print(f" Emplacement dashboard: {os.path.dirname(os.path.abspath(__file__))}")
-
-# Maintenant on peut importer depuis le dossier config
-try:
-    # Importer le module config depuis le dossier config
-    from config import config
-    print("✅ Import depuis config/config.py réussi!")
-except ImportError as e:
-    print(f"❌ Échec initial: {e}")
-    
-    # Essayer une autre méthode
-    try:
-        # Ajouter explicitement le chemin du dossier config
-        config_path = os.path.join(PROJECT_ROOT, "config")
-        sys.path.insert(0, config_path)
-        import config
-        print("✅ Import réussi via ajout explicite du chemin!")
-    except ImportError as e2:
-        print(f"❌ Échec secondaire: {e2}")
-        
-        # Dernière tentative : importer directement
-        try:
-            config_path = os.path.join(PROJECT_ROOT, "config", "config.py")
-            if os.path.exists(config_path):
-                # Méthode d'importation manuelle
-                import importlib.util
-                spec = importlib.util.spec_from_file_location("config_module", config_path)
-                config = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(config)
-                print("✅ Import réussi via importlib!")
-            else:
-                print(f"❌ Fichier non trouvé: {config_path}")
-                sys.exit(1)
-        except Exception as e3:
-            print(f"❌ Échec final: {e3}")
-            print(" Structure des dossiers:")
-            for root, dirs, files in os.walk(PROJECT_ROOT):
-                level = root.replace(PROJECT_ROOT, '').count(os.sep)
-                indent = ' ' * 2 * level
-                print(f'{indent}{os.path.basename(root)}/')
-                subindent = ' ' * 2 * (level + 1)
-                for file in files:
-                    print(f'{subindent}{file}')
-            sys.exit(1)
-
-# ==================== FIN DU HACK ====================
-
-import pandas as pd
-import plotly.express as px
-import dash
-from dash import dcc, html
-import pyodbc
 from datetime import datetime
 
-# Connexion DWH
-try:
-    # Utiliser la fonction get_engine de config
-    engine = config.get_engine('dwh')
-    print("✅ Moteur de base de données créé avec succès")
-except AttributeError:
-    # Fallback : créer une connexion pyodbc directe
-    print("⚠️ Utilisation de pyodbc comme fallback...")
-    connection_string = config.get_connection_string('dwh')
-    engine = pyodbc.connect(connection_string)
-    print("✅ Connexion pyodbc établie")
-
-# Test de connexion
-try:
-    # Vérifier quelles tables existent
-    test_query = """
-    SELECT TABLE_NAME 
-    FROM INFORMATION_SCHEMA.TABLES 
-    WHERE TABLE_TYPE = 'BASE TABLE'
-    ORDER BY TABLE_NAME
-    """
-    tables = pd.read_sql(test_query, engine)
-    print(f"✅ Connexion réussie! Tables disponibles dans DWH_Northwind:")
-    for table in tables['TABLE_NAME'].values:
-        print(f"   - {table}")
-    
-    # Vérifier spécifiquement les tables de dimensions
-    required_tables = ['Dim_Client', 'Dim_Produit', 'Fact_Ventes']
-    for table in required_tables:
-        check_query = f"SELECT COUNT(*) as count FROM {table}"
-        try:
-            result = pd.read_sql(check_query, engine)
-            print(f"   ✓ {table}: {result['count'][0]} lignes")
-        except:
-            print(f"   ✗ {table}: Non disponible")
-            
-except Exception as e:
-    print(f" Erreur de connexion: {e}")
-    # Créer un dataframe de test pour le développement
-    print("⚠️ Utilisation de données de test pour le développement")
-    df = pd.DataFrame({
-        'Annee': [2024, 2024, 2023, 2023],
-        'Mois': [1, 2, 12, 11],
-        'NomMois': ['Janvier', 'Février', 'Décembre', 'Novembre'],
-        'Client': ['Client A', 'Client B', 'Client A', 'Client C'],
-        'Pays': ['France', 'USA', 'France', 'Germany'],
-        'Produit': ['Produit 1', 'Produit 2', 'Produit 1', 'Produit 3'],
-        'Categorie': ['Catégorie 1', 'Catégorie 2', 'Catégorie 1', 'Catégorie 3'],
-        'ChiffreAffaires': [1000.50, 2500.75, 1500.00, 800.25],
-        'QuantiteVendue': [10, 25, 15, 8],
-        'NombreCommandes': [2, 3, 1, 1]
-    })
-    
-    # Dashboard avec données de test
-    app = dash.Dash(__name__)
-    app.layout = html.Div([
-        html.H1(" Dashboard Northwind - Mode Démo"),
-        html.H3(" Données de test - Exécutez main_etl.py d'abord"),
-        html.P("Les tables DWH ne sont pas encore créées."),
-        html.P("Exécutez 'python main_etl.py' pour créer la base de données."),
-        dcc.Graph(
-            figure=px.bar(df, x='Client', y='ChiffreAffaires', 
-                         title='Données de démonstration')
-        )
-    ])
-    
-    if __name__ == '__main__':
-        print("\n Lancement du dashboard en mode démo...")
-        print(" Ouvrez http://localhost:8050 dans votre navigateur")
-        print(" Conseil: Exécutez d'abord main_etl.py pour avoir les vraies données")
-        app.run_server(debug=True, port=8050)
-    sys.exit(0)
-
-# ==================== REQUÊTE PRINCIPALE ====================
-# Version adaptée à votre schéma DWH
-query = """
-SELECT TOP 1000  -- Limiter pour les tests
-    YEAR(fv.DateChargement) as Annee,
-    MONTH(fv.DateChargement) as Mois,
-    FORMAT(fv.DateChargement, 'MMMM', 'fr-FR') as NomMois,
-    dc.CompanyName as Client,
-    dc.Country as Pays,
-    dp.ProductName as Produit,
-    dp.CategoryName as Categorie,
-    SUM(fv.MontantVente) as ChiffreAffaires,
-    SUM(fv.Quantite) as QuantiteVendue,
-    COUNT(DISTINCT fv.OrderID) as NombreCommandes
-FROM Fact_Ventes fv
-JOIN Dim_Client dc ON fv.CustomerID = dc.CustomerID
-JOIN Dim_Produit dp ON fv.ProductID = dp.ProductID
-GROUP BY 
-    YEAR(fv.DateChargement),
-    MONTH(fv.DateChargement),
-    FORMAT(fv.DateChargement, 'MMMM', 'fr-FR'),
-    dc.CompanyName,
-    dc.Country,
-    dp.ProductName,
-    dp.CategoryName
-ORDER BY Annee DESC, Mois DESC
-"""
+# donnees.py, cube.py... sont à côté de ce fichier : les rendre
+# importables même quand l'application est chargée depuis un autre répertoire
+ANALYSIS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ANALYSIS_DIR)
 
-# Alternative si DateChargement n'existe pas
-query_alternative = """
-SELECT 
-    c.CompanyName as Client,
-    c.Country as Pays,
-    p.ProductName as Produit,
-    p.CategoryName as Categorie,
-    SUM(f.MontantVente) as ChiffreAffaires,
-    SUM(f.Quantite) as QuantiteVendue,
-    COUNT(DISTINCT f.OrderID) as NombreCommandes
-FROM Fact_Ventes f
-JOIN Dim_Client c ON f.CustomerID = c.CustomerID
-JOIN Dim_Produit p ON f.ProductID = p.ProductID
-GROUP BY 
-    c.CompanyName,
-    c.Country,
-    p.ProductName,
-    p.CategoryName
-ORDER BY ChiffreAffaires DESC
-"""
+import dash
+from dash import dcc, html, dash_table, Input, Output
 
-# Charger les données
-try:
-    print("\n Chargement des données depuis DWH_Northwind...")
-    df = pd.read_sql(query, engine)
-    
-    if len(df) == 0:
-        print(" Aucune donnée avec la première requête, essai alternative...")
-        df = pd.read_sql(query_alternative, engine)
-    
-    print(f" Données chargées: {len(df)} lignes")
-    
-    # Afficher un aperçu
-    print(f"\n Aperçu des données (5 premières lignes):")
-    print(df.head())
-    
-    # Statistiques basiques
-    print(f"\n Statistiques:")
-    print(f"   - Période: {df['Annee'].min() if 'Annee' in df.columns else 'N/A'} - {df['Annee'].max() if 'Annee' in df.columns else 'N/A'}")
-    print(f"   - Nombre de clients: {df['Client'].nunique()}")
-    print(f"   - Nombre de produits: {df['Produit'].nunique()}")
-    print(f"   - CA total: {df['ChiffreAffaires'].sum():,.2f} €")
-    
-except Exception as e:
-    print(f"❌ Erreur lors du chargement des données: {e}")
-    # Utiliser des données de base si nécessaire
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
-
-# ==================== DASHBOARD ====================
-app = dash.Dash(__name__)
+from api import enregistrer_api
+from donnees import DonneesDashboard, calculer_kpi
+from figure_cache import FigureCache
 
 # Styles CSS
 styles = {
@@ -253,164 +58,424 @@ styles = {
     }
 }
 
-# Calculer les KPI
-total_ca = df['ChiffreAffaires'].sum()
-total_commandes = df['NombreCommandes'].sum()
-moyenne_panier = total_ca / total_commandes if total_commandes > 0 else 0
-top_client = df.groupby('Client')['ChiffreAffaires'].sum().idxmax()
-top_pays = df.groupby('Pays')['ChiffreAffaires'].sum().idxmax()
-
-app.layout = html.Div(style=styles['container'], children=[
-    # En-tête
-    html.Div(style=styles['header'], children=[
-        html.H1(" Dashboard Northwind - Business Intelligence"),
-        html.P("Analyse des ventes et performance commerciale"),
-        html.P(f"Dernière mise à jour: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-    ]),
-    
-    # KPI
-    html.Div(style=styles['stats'], children=[
-        html.Div(style=styles['statBox'], children=[
-            html.H3(f"{total_ca:,.2f} €"),
-            html.P("Chiffre d'affaires total", style={'color': '#7f8c8d'})
-        ]),
-        html.Div(style=styles['statBox'], children=[
-            html.H3(f"{total_commandes:,}"),
-            html.P("Nombre de commandes", style={'color': '#7f8c8d'})
-        ]),
-        html.Div(style=styles['statBox'], children=[
-            html.H3(f"{moyenne_panier:,.2f} €"),
-            html.P("Panier moyen", style={'color': '#7f8c8d'})
-        ]),
-        html.Div(style=styles['statBox'], children=[
-            html.H3(top_client[:15] + "..."),
-            html.P("Meilleur client", style={'color': '#7f8c8d'})
-        ]),
-    ]),
-    
-    # Première ligne de graphiques
-    html.Div([
-        # Graphique 1: CA annuel
-        html.Div(style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}, children=[
-            html.Div(style=styles['card'], children=[
-                html.H4(" Chiffre d'affaires annuel"),
-                dcc.Graph(
-                    id='ca-annuel',
-                    figure=px.bar(
-                        df.groupby('Annee')['ChiffreAffaires'].sum().reset_index(),
-                        x='Annee',
-                        y='ChiffreAffaires',
-                        title='',
-                        color='ChiffreAffaires',
-                        color_continuous_scale='Viridis',
-                        labels={'ChiffreAffaires': 'CA (€)', 'Annee': 'Année'}
-                    ).update_layout(height=400)
-                )
-            ])
+KPI = ['kpi-ca', 'kpi-commandes', 'kpi-panier', 'kpi-client']
+
+# id du menu -> dimension du cube
+FILTRES = {
+    'filtre-annee': 'Annee',
+    'filtre-pays': 'Pays',
+    'filtre-categorie': 'Categorie',
+    'filtre-client': 'Client',
+}
+
+
+# ==================== FIGURES ====================
+# Construites seulement quand le cache de figures n'a pas déjà le JSON
+def figure_ca_annuel(df):
+    import plotly.express as px
+    return px.bar(
+        df.sort_values('Annee'),
+        x='Annee',
+        y='ChiffreAffaires',
+        title='',
+        color='ChiffreAffaires',
+        color_continuous_scale='Viridis',
+        labels={'ChiffreAffaires': 'CA (€)', 'Annee': 'Année'}
+    ).update_layout(height=400)
+
+
+def figure_top_clients(df):
+    import plotly.express as px
+    return px.pie(
+        df.nlargest(10, 'ChiffreAffaires'),
+        values='ChiffreAffaires',
+        names='Client',
+        title='',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set3
+    ).update_layout(height=400)
+
+
+def figure_ventes_par_categorie(df):
+    import plotly.express as px
+    return px.bar(
+        df.sort_values('ChiffreAffaires', ascending=False),
+        x='Categorie',
+        y='ChiffreAffaires',
+        title='',
+        color='ChiffreAffaires',
+        color_continuous_scale='Blues',
+        labels={'ChiffreAffaires': 'CA (€)', 'Categorie': 'Catégorie'}
+    ).update_layout(height=400)
+
+
+def figure_ventes_par_pays(df):
+    import plotly.express as px
+    return px.treemap(
+        df,
+        path=['Pays', 'Client'],
+        values='ChiffreAffaires',
+        color='ChiffreAffaires',
+        color_continuous_scale='Greens',
+        title=''
+    ).update_layout(height=400)
+
+
+# Agrégations les plus lourdes : callbacks en arrière-plan quand c'est activé
+GRAPHIQUES_ARRIERE_PLAN = {'ventes-par-pays'}
+
+# id du graphique -> (grain des données, construction de la figure)
+FIGURES = {
+    'ca-annuel': (['Annee'], figure_ca_annuel),
+    'top-clients': (['Client'], figure_top_clients),
+    'ventes-par-categorie': (['Categorie'], figure_ventes_par_categorie),
+    'ventes-par-pays': (['Pays', 'Client'], figure_ventes_par_pays),
+}
+
+
+def figure(cube, id_graphique, filtres, cache=None):
+    """Figure d'un graphique pour les filtres donnés, via le cache disque s'il est actif."""
+    grain, construire = FIGURES[id_graphique]
+
+    def construire_figure():
+        return construire(cube.agreger(grain, filtres))
+
+    if cache is None:
+        return construire_figure()
+    # La période du dashboard fait partie de l'état filtré : bornes TempsID
+    # effectives, que le cube vienne de l'instantané ou du DWH
+    etat = dict(filtres)
+    if cube.plage is not None:
+        etat['TempsID (période)'] = list(cube.plage)
+    return cache.get_or_build(id_graphique, etat, cube.version, construire_figure)
+
+
+# Colonnes de la grille de détail
+COLONNES_DETAIL = [
+    {'name': 'Année', 'id': 'Annee', 'type': 'numeric'},
+    {'name': 'Mois', 'id': 'Mois', 'type': 'numeric'},
+    {'name': 'Client', 'id': 'Client', 'type': 'text'},
+    {'name': 'Pays', 'id': 'Pays', 'type': 'text'},
+    {'name': 'Produit', 'id': 'Produit', 'type': 'text'},
+    {'name': 'Catégorie', 'id': 'Categorie', 'type': 'text'},
+    {'name': 'CA (€)', 'id': 'ChiffreAffaires', 'type': 'numeric',
+     'format': {'specifier': ',.2f'}},
+    {'name': 'Quantité', 'id': 'QuantiteVendue', 'type': 'numeric'},
+    {'name': 'Commandes', 'id': 'NombreCommandes', 'type': 'numeric'},
+]
+
+
+# ==================== LAYOUT ====================
+def kpi_box(id_valeur, libelle):
+    return html.Div(style=styles['statBox'], children=[
+        html.H3("…", id=id_valeur),
+        html.P(libelle, style={'color': '#7f8c8d'})
+    ])
+
+
+def graph_card(titre, id_graphique, marge_gauche=False):
+    style = {'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}
+    if marge_gauche:
+        style['marginLeft'] = '4%'
+    return html.Div(style=style, children=[
+        html.Div(style=styles['card'], children=[
+            html.H4(titre),
+            dcc.Loading(dcc.Graph(id=id_graphique, figure={'layout': {'height': 400}}))
+        ])
+    ])
+
+
+def filtre(id_filtre, libelle):
+    return html.Div(style={'flex': '1', 'margin': '0 10px'}, children=[
+        html.Label(libelle),
+        dcc.Dropdown(id=id_filtre, multi=True, placeholder="Tous")
+    ])
+
+
+def layout_squelette():
+    """Page servie immédiatement : les valeurs arrivent par callback."""
+    return html.Div(style=styles['container'], children=[
+        # Déclenche le remplissage une fois la page affichée
+        dcc.Interval(id='chargement', interval=1, max_intervals=1),
+
+        # En-tête
+        html.Div(style=styles['header'], children=[
+            html.H1(" Dashboard Northwind - Business Intelligence", id='titre'),
+            html.P("Analyse des ventes et performance commerciale", id='sous-titre'),
+            html.P(f"Dernière mise à jour: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
         ]),
-        
-        # Graphique 2: Top clients
-        html.Div(style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top', 'marginLeft': '4%'}, children=[
-            html.Div(style=styles['card'], children=[
-                html.H4(" Top 10 clients"),
-                dcc.Graph(
-                    id='top-clients',
-                    figure=px.pie(
-                        df.groupby('Client')['ChiffreAffaires'].sum()
-                        .nlargest(10).reset_index(),
-                        values='ChiffreAffaires',
-                        names='Client',
-                        title='',
-                        hole=0.4,
-                        color_discrete_sequence=px.colors.qualitative.Set3
-                    ).update_layout(height=400)
-                )
-            ])
+
+        # Filtres
+        html.Div(style=dict(styles['stats'], **styles['card']), children=[
+            filtre('filtre-annee', "Année"),
+            filtre('filtre-pays', "Pays"),
+            filtre('filtre-categorie', "Catégorie"),
+            filtre('filtre-client', "Client"),
         ]),
-    ]),
-    
-    # Deuxième ligne de graphiques
-    html.Div([
-        # Graphique 3: Ventes par catégorie
-        html.Div(style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top'}, children=[
-            html.Div(style=styles['card'], children=[
-                html.H4(" Ventes par catégorie"),
-                dcc.Graph(
-                    id='ventes-par-categorie',
-                    figure=px.bar(
-                        df.groupby('Categorie')['ChiffreAffaires'].sum()
-                        .reset_index().sort_values('ChiffreAffaires', ascending=False),
-                        x='Categorie',
-                        y='ChiffreAffaires',
-                        title='',
-                        color='ChiffreAffaires',
-                        color_continuous_scale='Blues',
-                        labels={'ChiffreAffaires': 'CA (€)', 'Categorie': 'Catégorie'}
-                    ).update_layout(height=400)
-                )
-            ])
+
+        # KPI
+        html.Div(style=styles['stats'], children=[
+            kpi_box('kpi-ca', "Chiffre d'affaires total"),
+            kpi_box('kpi-commandes', "Nombre de commandes"),
+            kpi_box('kpi-panier', "Panier moyen"),
+            kpi_box('kpi-client', "Meilleur client"),
         ]),
-        
-        # Graphique 4: Répartition géographique
-        html.Div(style={'width': '48%', 'display': 'inline-block', 'verticalAlign': 'top', 'marginLeft': '4%'}, children=[
-            html.Div(style=styles['card'], children=[
-                html.H4(" Répartition géographique"),
-                dcc.Graph(
-                    id='ventes-par-pays',
-                    figure=px.treemap(
-                        df.groupby(['Pays', 'Client'])['ChiffreAffaires'].sum().reset_index(),
-                        path=['Pays', 'Client'],
-                        values='ChiffreAffaires',
-                        color='ChiffreAffaires',
-                        color_continuous_scale='Greens',
-                        title=''
-                    ).update_layout(height=400)
-                )
-            ])
+
+        # Première ligne de graphiques
+        html.Div([
+            graph_card(" Chiffre d'affaires annuel", 'ca-annuel'),
+            graph_card(" Top 10 clients", 'top-clients', marge_gauche=True),
         ]),
-    ]),
-    
-    # Tableau de données (optionnel)
-    html.Div(style=styles['card'], children=[
-        html.H4(" Aperçu des données"),
+
+        # Deuxième ligne de graphiques
         html.Div([
-            html.P(f"Affichage de {min(10, len(df))} lignes sur {len(df)} totales"),
-            html.Table(
-                # En-tête
-                [html.Tr([html.Th(col) for col in df.columns[:6]])] +
-                # Lignes de données
-                [html.Tr([html.Td(df.iloc[i][col]) for col in df.columns[:6]]) 
-                 for i in range(min(10, len(df)))],
-                style={'width': '100%', 'borderCollapse': 'collapse'}
+            graph_card(" Ventes par catégorie", 'ventes-par-categorie'),
+            graph_card(" Répartition géographique", 'ventes-par-pays', marge_gauche=True),
+        ]),
+
+        # Détail des ventes : pagination, tri et filtres exécutés côté serveur
+        html.Div(style=styles['card'], children=[
+            html.H4(" Détail des ventes"),
+            html.P("…", id='detail-total'),
+            dash_table.DataTable(
+                id='table-detail',
+                columns=COLONNES_DETAIL,
+                page_current=0,
+                page_size=20,
+                page_action='custom',
+                sort_action='custom',
+                sort_mode='multi',
+                sort_by=[],
+                filter_action='custom',
+                filter_query='',
+                style_table={'overflowX': 'auto'},
+                style_cell={'fontFamily': 'Arial, sans-serif', 'padding': '5px'},
             )
-        ], style={'overflowX': 'auto'})
-    ]),
-    
-    # Pied de page
-    html.Div(style={'marginTop': '30px', 'textAlign': 'center', 'color': '#7f8c8d'}, children=[
-        html.Hr(),
-        html.P("Dashboard Northwind BI - Powered by Python, SQL Server & Plotly Dash"),
-        html.P(f"Données extraites de DWH_Northwind • {len(df)} enregistrements analysés")
+        ]),
+
+        # Pied de page
+        html.Div(style={'marginTop': '30px', 'textAlign': 'center', 'color': '#7f8c8d'}, children=[
+            html.Hr(),
+            html.P("Dashboard Northwind BI - Powered by Python, SQL Server & Plotly Dash"),
+            html.P("Chargement des données…", id='pied-de-page')
+        ])
     ])
-])
+
+
+# ==================== APPLICATION ====================
+def background_manager():
+    """
+    Gestionnaire des callbacks en arrière-plan (DASHBOARD_BACKGROUND=1) : le
+    calcul tourne hors du worker web, qui reste libre pour les autres requêtes.
+    None si désactivé ou si diskcache n'est pas installé.
+    """
+    if os.environ.get('DASHBOARD_BACKGROUND', '0') != '1':
+        return None
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+    except ImportError:
+        print("⚠️ diskcache non installé : callbacks exécutés dans le worker")
+        return None
+    dossier = os.environ.get('DASHBOARD_BACKGROUND_DIR',
+                             os.path.join(os.path.dirname(ANALYSIS_DIR), 'data', 'cache', 'callbacks'))
+    return DiskcacheManager(diskcache.Cache(dossier))
+
+
+def enregistrer_graphique(app, donnees, figures, id_graphique, manager=None):
+    """Callback d'un graphique, en arrière-plan si un manager est fourni."""
+    options = {'background': True, 'manager': manager} if manager else {}
+
+    @app.callback(
+        Output(id_graphique, 'figure'),
+        [Input(id_filtre, 'value') for id_filtre in FILTRES],
+        **options
+    )
+    def mettre_a_jour(*valeurs):
+        filtres = dict(zip(FILTRES.values(), valeurs))
+        return figure(donnees.cube(), id_graphique, filtres, figures)
+
+
+def donnees_par_defaut():
+    """Source de données configurée par DASHBOARD_ANNEE_DEBUT / DASHBOARD_ANNEE_FIN."""
+    return DonneesDashboard(
+        annee_debut=int(os.environ.get('DASHBOARD_ANNEE_DEBUT', 0)) or None,
+        annee_fin=int(os.environ.get('DASHBOARD_ANNEE_FIN', 0)) or None,
+    )
+
+
+def create_app(donnees=None, precharger=True, figures=None):
+    """
+    Construit l'application Dash. Aucune requête n'est faite ici ; avec
+    precharger=True le chargement des données démarre en arrière-plan.
+    figures : FigureCache partagé (par défaut DASHBOARD_FIGURE_CACHE_DIR,
+    désactivé si DASHBOARD_FIGURE_CACHE_MB vaut 0).
+    """
+    donnees = donnees or donnees_par_defaut()
+    if figures is None:
+        taille_mo = int(os.environ.get('DASHBOARD_FIGURE_CACHE_MB', 64))
+        figures = FigureCache(max_bytes=taille_mo * 1024 * 1024) if taille_mo else None
+
+    app = dash.Dash(__name__)
+    app.layout = layout_squelette
+    app.donnees = donnees
+    app.figures = figures
+
+    @app.callback(
+        [Output(id_filtre, 'options') for id_filtre in FILTRES]
+        + [Output('sous-titre', 'children'),
+           Output('pied-de-page', 'children')],
+        Input('chargement', 'n_intervals'),
+    )
+    def remplir_page(_):
+        cube = donnees.cube()
+
+        if donnees.mode_demo:
+            sous_titre = " Données de test - Exécutez main_etl.py d'abord"
+        else:
+            sous_titre = "Analyse des ventes et performance commerciale"
+
+        return [cube.libelles(dimension) for dimension in FILTRES.values()] + [
+            sous_titre,
+            f"Données extraites de DWH_Northwind ({donnees.source}, version {cube.version}) "
+            f"• {int(cube.masque().sum()):,} lignes de ventes analysées",
+        ]
+
+    # Un callback par panneau : le navigateur les appelle en parallèle et
+    # chaque panneau s'affiche dès que ses propres données sont prêtes
+    @app.callback(
+        [Output(id_kpi, 'children') for id_kpi in KPI],
+        [Input(id_filtre, 'value') for id_filtre in FILTRES],
+    )
+    def appliquer_filtres_kpi(*valeurs):
+        # Agrégations indépendantes du bloc KPI calculées en même temps
+        filtres = dict(zip(FILTRES.values(), valeurs))
+        kpi = calculer_kpi(donnees.cube().jeux(filtres, ['annee', 'client', 'pays'],
+                                               pool=donnees.pool))
+        return [
+            f"{kpi['total_ca']:,.2f} €",
+            f"{kpi['total_commandes']:,}",
+            f"{kpi['moyenne_panier']:,.2f} €",
+            kpi['top_client'][:15] + "...",
+        ]
+
+    manager = background_manager()
+    for id_graphique in FIGURES:
+        enregistrer_graphique(app, donnees, figures, id_graphique,
+                              manager if id_graphique in GRAPHIQUES_ARRIERE_PLAN else None)
+
+    @app.callback(
+        Output('table-detail', 'data'),
+        Output('table-detail', 'page_count'),
+        Output('detail-total', 'children'),
+        Input('table-detail', 'page_current'),
+        Input('table-detail', 'page_size'),
+        Input('table-detail', 'sort_by'),
+        Input('table-detail', 'filter_query'),
+        *[Input(id_filtre, 'value') for id_filtre in FILTRES],
+    )
+    def page_detail(page_current, page_size, sort_by, filter_query, *valeurs):
+        # Seule la page visible est envoyée, quelle que soit la taille du détail
+        filtres = dict(zip(FILTRES.values(), valeurs))
+        lignes, page_count, total = donnees.cube().grille().page(
+            page_current, page_size, sort_by, filter_query, filtres)
+        return lignes, page_count, f"{total:,} lignes (mois x client x produit)"
+
+    @app.server.route('/health')
+    def route_health():
+        # Vivacité : le processus répond
+        return {'status': 'ok', 'pid': os.getpid()}
+
+    @app.server.route('/ready')
+    def route_ready():
+        # Disponibilité : données chargées, la page n'attendra pas la base
+        etat = {
+            'ready': donnees.pret,
+            'source': donnees.source,
+            'version': donnees.version,
+            'mode_demo': donnees.mode_demo,
+        }
+        return etat, 200 if donnees.pret else 503
+
+    @app.server.route('/stats/cache')
+    def route_stats_cache():
+        # Cube en mémoire (le cache de résultats) : hits, reconstructions, octets
+        return donnees.stats_cache()
+
+    @app.server.route('/stats/connexions')
+    def route_stats_connexions():
+        # Connexions ouvertes/en cours/libres, attente et échecs de checkout
+        return donnees.stats_connexions()
+
+    @app.server.route('/stats/figures')
+    def route_stats_figures():
+        # Cache disque partagé : entrées et octets vus par tous les workers,
+        # hits/misses de ce worker seulement
+        return figures.stats() if figures else {}
+
+    # KPI et agrégats en JSON pour les autres applications (ETag / 304)
+    enregistrer_api(app.server, donnees)
+
+    if precharger:
+        donnees.charger_en_arriere_plan()
+    return app
+
+
+def profiler_dashboard(dossier=None):
+    """
+    Profile, étape par étape et sans serveur, le chargement des données et la
+    construction des figures : cube, KPI, chaque graphique sérialisé en JSON
+    (le travail d'un callback), première page du détail. Cache de figures
+    désactivé et un seul thread : chaque étape mesure le calcul complet.
+    """
+    sys.path.append(os.path.join(os.path.dirname(ANALYSIS_DIR), 'etl'))
+    from profiling import Profileur, PROFILE_DIR
+
+    profileur = Profileur(dossier or PROFILE_DIR,
+                          run_id='dashboard-' + datetime.now().strftime('%Y%m%d-%H%M%S'))
+    donnees = donnees_par_defaut()
+    try:
+        with profileur.etape('chargement'):
+            cube = donnees.cube()
+        with profileur.etape('kpi'):
+            calculer_kpi(cube.jeux(None, ['annee', 'client', 'pays']))
+        for id_graphique in FIGURES:
+            with profileur.etape(f'figure {id_graphique}'):
+                figure(cube, id_graphique, {}).to_json()
+        with profileur.etape('detail'):
+            cube.grille().page(0, 20)
+    finally:
+        donnees.fermer_connexion()
+        profileur.terminer()
+
 
 # ==================== LANCEMENT ====================
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Dashboard Northwind BI")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profiler le chargement des données et la construction des figures "
+                             "(cProfile + tracemalloc), sans lancer le serveur")
+    parser.add_argument('--profile-dir', help="Répertoire des rapports de profilage")
+    args = parser.parse_args()
+    if args.profile:
+        profiler_dashboard(args.profile_dir)
+        sys.exit(0)
+
     print("\n" + "="*60)
     print(" LANCEMENT DU DASHBOARD NORTHWIND BI")
     print("="*60)
-    print(f" Données chargées: {len(df)} lignes")
-    print(f" Chiffre d'affaires total: {total_ca:,.2f} €")
-    print(f" Nombre de produits: {df['Produit'].nunique()}")
-    print(f" Nombre de clients: {df['Client'].nunique()}")
-    
+
+    app = create_app()
+
     # Déterminer le port
     port = 8050
     print(f" Tentative de lancement sur le port {port}...")
+    print(" Ouvrez http://localhost:8050 dans votre navigateur")
     print("="*60)
     print(" Appuyez sur Ctrl+C pour arrêter le serveur")
     print("="*60)
-    
+
     # Lancer le serveur avec gestion des erreurs de port
     try:
         # Méthode moderne (Dash 2.0+)
@@ -420,4 +485,4 @@ if __name__ == '__main__':
             print(f" Le port {port} est occupé, tentative sur le port {port+1}...")
             app.run(debug=True, port=port+1, host='127.0.0.1')
         else:
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,317 @@
+"""
+Couche données du dashboard
+Configuration, connexion au DWH, version des données et cube en mémoire des
+graphiques. Rien n'est importé ni chargé avant la première demande : le
+serveur peut démarrer et servir la page avant d'avoir touché la base.
+Si l'ETL a publié un instantané colonnaire à jour, le cube est mappé dessus :
+seule la version des données (ETL_Version) est lue dans le DWH. Un instantané
+plus ancien que cette version (run lancé avec --no-snapshot) est ignoré et le
+cube est relu depuis le DWH.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Tables sans lesquelles le dashboard passe en mode démo. Dim_Temps n'en fait
+# pas partie : l'année et le mois se lisent dans TempsID (YYYYMMDD, voir cube.py)
+REQUIRED_TABLES = ['Dim_Client', 'Dim_Produit', 'Fact_Ventes']
+
+TABLES_QUERY = """
+SELECT TABLE_NAME
+FROM INFORMATION_SCHEMA.TABLES
+WHERE TABLE_TYPE = 'BASE TABLE'
+"""
+
+_config = None
+
+
+def charger_config():
+    """Importe config/config.py une seule fois, à la première connexion."""
+    global _config
+    if _config is not None:
+        return _config
+
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    try:
+        from config import config
+        print("✅ Import depuis config/config.py réussi!")
+    except ImportError as e:
+        print(f"❌ Échec initial: {e}")
+        # Dernière tentative : importer directement le fichier
+        config_path = os.path.join(PROJECT_ROOT, "config", "config.py")
+        if not os.path.exists(config_path):
+            raise ImportError(f"Fichier non trouvé: {config_path}")
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("config_module", config_path)
+        config = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(config)
+        print("✅ Import réussi via importlib!")
+
+    _config = config
+    return config
+
+
+def creer_engine(config):
+    try:
+        # Utiliser la fonction get_engine de config (pool SQLAlchemy)
+        engine = config.get_engine('dwh')
+        print("✅ Moteur de base de données créé avec succès")
+    except AttributeError:
+        # Fallback : pool de connexions pyodbc directes, une par callback en cours
+        import pyodbc
+        from connexions import PoolConnexions
+        print("⚠️ Utilisation de pyodbc comme fallback...")
+        connection_string = config.get_connection_string('dwh')
+        engine = PoolConnexions(
+            lambda: pyodbc.connect(connection_string),
+            taille=int(os.environ.get('DASHBOARD_POOL_TAILLE', 5)),
+            timeout=int(os.environ.get('DASHBOARD_POOL_TIMEOUT', 30)),
+        )
+        # Première connexion tout de suite : une erreur de configuration se voit ici
+        with engine.connexion():
+            pass
+        print("✅ Pool de connexions pyodbc établi")
+    return engine
+
+
+def plage_temps(annee_debut=None, annee_fin=None):
+    """Bornes TempsID (incluses) couvrant les années demandées."""
+    debut = annee_debut * 10000 + 101 if annee_debut else 0
+    fin = annee_fin * 10000 + 1231 if annee_fin else 99991231
+    return debut, fin
+
+
+def donnees_demo():
+    import pandas as pd
+    return pd.DataFrame({
+        'Annee': [2024, 2024, 2023, 2023],
+        'Mois': [1, 2, 12, 11],
+        'NomMois': ['Janvier', 'Février', 'Décembre', 'Novembre'],
+        'Client': ['Client A', 'Client B', 'Client A', 'Client C'],
+        'Pays': ['France', 'USA', 'France', 'Germany'],
+        'Produit': ['Produit 1', 'Produit 2', 'Produit 1', 'Produit 3'],
+        'Categorie': ['Catégorie 1', 'Catégorie 2', 'Catégorie 1', 'Catégorie 3'],
+        'ChiffreAffaires': [1000.50, 2500.75, 1500.00, 800.25],
+        'QuantiteVendue': [10, 25, 15, 8],
+        'NombreCommandes': [2, 3, 1, 1]
+    })
+
+
+class DonneesDashboard:
+    """Jeux de données du dashboard, chargés une seule fois à la première demande."""
+
+    def __init__(self, annee_debut=None, annee_fin=None, dossier_snapshot=None):
+        # Période analysée : intervalle entier sur TempsID (YYYYMMDD)
+        self.plage = plage_temps(annee_debut, annee_fin)
+        self.dossier_snapshot = dossier_snapshot
+        self.engine = None
+        self.versions = None
+        self.tables_disponibles = set()
+        self.mode_demo = False
+        self.erreur = None
+        self.source = None
+        self._initialise = False
+        self._cube = None
+        # Requêtes servies par le cube déjà construit / reconstructions
+        self.hits = 0
+        self.misses = 0
+        self._pool = None
+        self._lock = threading.Lock()
+        self._lock_cube = threading.Lock()
+
+    def version_donnees(self):
+        """
+        (version publiée, instantané à jour ?) sans charger le cube : ETL_Version,
+        lue au plus toutes les version_ttl secondes, comparée à courant.json.
+        Sans DWH joignable, l'instantané est servi tel quel.
+        """
+        from cube import snapshot_courant, SNAPSHOT_DIR
+
+        pointeur = snapshot_courant(self.dossier_snapshot or SNAPSHOT_DIR)
+        self._initialiser()
+        version_dwh = self.versions.version() if self.versions else None
+        if pointeur is not None and (version_dwh is None or pointeur['version'] >= version_dwh):
+            return pointeur['version'], True
+        return version_dwh, False
+
+    def cube(self):
+        """
+        Cube des ventes en mémoire, reconstruit quand l'ETL publie une nouvelle
+        version : instantané mappé s'il existe, sinon lecture du DWH (ou démo).
+        """
+        version, depuis_snapshot = self.version_donnees()
+        if self._cube is None or self._cube.version != version:
+            with self._lock_cube:
+                if self._cube is None or self._cube.version != version:
+                    self._cube = self._construire_cube(version, depuis_snapshot)
+                    self.misses += 1
+                    return self._cube
+        self.hits += 1
+        return self._cube
+
+    def charger_en_arriere_plan(self):
+        """Démarre le chargement sans bloquer (préchauffage au démarrage du serveur)."""
+        threading.Thread(target=self.cube, name='chargement-donnees', daemon=True).start()
+
+    @property
+    def pool(self):
+        """Threads des requêtes indépendantes d'un même rendu (créés à la première demande)."""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=int(os.environ.get('DASHBOARD_FANOUT', 4)),
+                        thread_name_prefix='fan-out')
+        return self._pool
+
+    @property
+    def pret(self):
+        """Vrai dès que le cube est chargé (la page peut être servie sans attente)."""
+        return self._cube is not None
+
+    @property
+    def version(self):
+        """Version des données du cube chargé (None avant le premier chargement)."""
+        return self._cube.version if self._cube is not None else None
+
+    def fermer_connexion(self):
+        """
+        Ferme la connexion au DWH ; elle sera rouverte à la demande. À appeler
+        avant un fork : une connexion ne doit pas être partagée entre processus,
+        et les threads du pool de fan-out ne survivent pas au fork.
+        """
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            if self.engine is not None:
+                self.engine.dispose()
+            self.engine = None
+            self.versions = None
+            self._initialise = False
+
+    # ---------- chargement ----------
+    def _initialiser(self):
+        """Connexion au DWH, ou bascule en mode démo, une seule fois."""
+        if self._initialise:
+            return
+        with self._lock:
+            if self._initialise:
+                return
+            print("\n Connexion à DWH_Northwind...")
+            try:
+                self._connecter()
+                manquantes = [t for t in REQUIRED_TABLES if t not in self.tables_disponibles]
+                if manquantes:
+                    raise RuntimeError(f"Tables absentes du DWH : {', '.join(manquantes)}")
+                # Reconnexion réussie (après fermer_connexion) : fin du mode démo
+                self.mode_demo = False
+                self.erreur = None
+            except Exception as e:
+                print(f" Erreur de connexion: {e}")
+                print("⚠️ Utilisation de données de test pour le développement")
+                self.mode_demo = True
+                self.erreur = str(e)
+                # Pas de version à suivre : le cube de démo est construit une fois
+                self.versions = None
+            self._initialise = True
+
+    def _connecter(self):
+        from version_donnees import LecteurVersion, VERSION_QUERY
+
+        self.engine = creer_engine(charger_config())
+        # Version publiée par l'ETL (ETL_Version) : le cube est reconstruit quand elle change
+        self.versions = LecteurVersion(lambda: int(self.read_sql(VERSION_QUERY).iloc[0, 0]))
+        tables = self.read_sql(TABLES_QUERY)
+        self.tables_disponibles = set(tables['TABLE_NAME'])
+
+    def read_sql(self, sql, params=None):
+        """Exécute une requête sur le DWH ; avec le pool pyodbc, sur une connexion empruntée."""
+        import pandas as pd
+        if hasattr(self.engine, 'connexion'):
+            with self.engine.connexion() as conn:
+                return pd.read_sql(sql, conn, params=params)
+        return pd.read_sql(sql, self.engine, params=params)
+
+    def stats_connexions(self):
+        """Métriques du pool de connexions (pool pyodbc ou pool SQLAlchemy)."""
+        if self.engine is None:
+            return {}
+        if hasattr(self.engine, 'stats'):
+            return self.engine.stats()
+        pool = self.engine.pool
+        return {
+            'taille': pool.size() if hasattr(pool, 'size') else None,
+            'en_cours': pool.checkedout() if hasattr(pool, 'checkedout') else None,
+            'libres': pool.checkedin() if hasattr(pool, 'checkedin') else None,
+            'statut': pool.status(),
+        }
+
+    def stats_cache(self):
+        """
+        Le cube tient lieu de cache de résultats : requêtes servies sans relire
+        la base, reconstructions (une par version publiée) et mémoire occupée.
+        """
+        cube = self._cube
+        total = self.hits + self.misses
+        return {
+            'version': cube.version if cube is not None else None,
+            'source': self.source,
+            'faits': len(cube) if cube is not None else 0,
+            'bytes': cube.nbytes() if cube is not None else 0,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'lectures_version': self.versions.lectures if self.versions else 0,
+        }
+
+    def _construire_cube(self, version, depuis_snapshot):
+        from cube import CubeVentes, SNAPSHOT_DIR, snapshot_courant
+
+        debut = time.time()
+        if depuis_snapshot:
+            # Fichiers mappés : pages partagées entre les workers, rien n'est copié
+            cube = CubeVentes.depuis_snapshot(self.dossier_snapshot or SNAPSHOT_DIR, self.plage)
+            self.mode_demo = False
+            self.source = 'instantané'
+        elif self.mode_demo:
+            cube = CubeVentes.depuis_detail(donnees_demo(), version)
+            self.source = 'démo'
+        else:
+            pointeur = snapshot_courant(self.dossier_snapshot or SNAPSHOT_DIR)
+            if pointeur is not None:
+                print(f"⚠️ Instantané v{pointeur['version']} plus ancien que la version "
+                      f"{version} du DWH : lecture du DWH")
+            # Lecture directe des faits et des dimensions
+            cube = CubeVentes.depuis_dwh(self.read_sql, self.plage, version, pool=self.pool)
+            self.source = 'DWH'
+        print(f"✓ Cube construit ({self.source}) : {len(cube):,} faits, "
+              f"{cube.nbytes() / 1024 / 1024:,.1f} Mo, version {cube.version} "
+              f"({time.time() - debut:.2f}s)")
+        return cube
+
+
+def meilleur(df, colonne):
+    """Libellé au plus gros chiffre d'affaires ('-' si la sélection est vide)."""
+    if df.empty:
+        return '-'
+    return df.set_index(colonne)['ChiffreAffaires'].idxmax()
+
+
+def calculer_kpi(jeux):
+    total_ca = jeux['annee']['ChiffreAffaires'].sum()
+    # Une commande n'a qu'un client, donc qu'un pays : la somme par pays est exacte
+    total_commandes = jeux['pays']['NombreCommandes'].sum()
+    return {
+        'total_ca': total_ca,
+        'total_commandes': total_commandes,
+        'moyenne_panier': total_ca / total_commandes if total_commandes > 0 else 0,
+        'top_client': meilleur(jeux['client'], 'Client'),
+        'top_pays': meilleur(jeux['pays'], 'Pays'),
+    }
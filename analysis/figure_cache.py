@@ -0,0 +1,158 @@
+"""
+Cache disque des figures Plotly du dashboard
+Une figure est sérialisée en JSON une seule fois par combinaison
+(graphique, filtres, version des données) puis relue par tous les workers :
+les fichiers sont écrits dans un répertoire commun, de façon atomique
+(fichier temporaire + os.replace). La taille totale est bornée ; les
+entrées les moins récemment lues sont supprimées en premier.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIGURE_CACHE_DIR = os.environ.get('DASHBOARD_FIGURE_CACHE_DIR',
+                                  os.path.join(PROJECT_ROOT, 'data', 'cache', 'figures'))
+
+
+def normaliser_filtres(filtres):
+    """Filtres sous forme stable : dimensions et valeurs triées, filtres vides retirés."""
+    return sorted((dimension, sorted(valeurs, key=str))
+                  for dimension, valeurs in (filtres or {}).items() if valeurs)
+
+
+def version_entree(nom):
+    """Version des données encodée dans le nom de fichier (None si illisible)."""
+    try:
+        return int(nom[1:nom.index('-')])
+    except ValueError:
+        return None
+
+
+class FigureCache:
+    def __init__(self, dossier=FIGURE_CACHE_DIR, max_bytes=64 * 1024 * 1024):
+        self.dossier = dossier
+        self.max_bytes = max_bytes
+        os.makedirs(dossier, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._version = None
+        # Octets écrits depuis le dernier parcours du répertoire
+        self._ecrits = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cle(self, id_graphique, filtres, version):
+        contenu = json.dumps([id_graphique, normaliser_filtres(filtres), version],
+                             default=str, separators=(',', ':'))
+        empreinte = hashlib.sha1(contenu.encode('utf-8')).hexdigest()
+        return f"v{version}-{id_graphique}-{empreinte}.json"
+
+    def get_or_build(self, id_graphique, filtres, version, construire):
+        """
+        Figure (dict) du cache, ou construire() -> go.Figure sérialisée puis stockée.
+        """
+        if version != self._version:
+            self._changer_version(version)
+
+        chemin = os.path.join(self.dossier, self.cle(id_graphique, filtres, version))
+        try:
+            with open(chemin, encoding='utf-8') as f:
+                contenu = f.read()
+            # Date d'accès pour l'éviction LRU (atime n'est pas fiable partout)
+            os.utime(chemin)
+            with self._lock:
+                self.hits += 1
+            return json.loads(contenu)
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.misses += 1
+        contenu = construire().to_json()
+        self._ecrire(chemin, contenu)
+        return json.loads(contenu)
+
+    def _ecrire(self, chemin, contenu):
+        temporaire = f"{chemin}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            f.write(contenu)
+        os.replace(temporaire, chemin)
+
+        with self._lock:
+            self._ecrits += len(contenu)
+            # Parcours du répertoire seulement après ~10 % de la borne écrits
+            if self._ecrits < self.max_bytes // 10:
+                return
+            self._ecrits = 0
+        self._evincer()
+
+    def _entrees(self):
+        entrees = []
+        for entree in os.scandir(self.dossier):
+            if entree.name.endswith('.json'):
+                try:
+                    stat = entree.stat()
+                except FileNotFoundError:
+                    continue   # supprimée entre-temps par un autre worker
+                entrees.append((stat.st_mtime, stat.st_size, entree.path))
+        return entrees
+
+    def _evincer(self):
+        entrees = sorted(self._entrees())
+        total = sum(taille for _, taille, _ in entrees)
+        for _, taille, chemin in entrees:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(chemin)
+                with self._lock:
+                    self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= taille
+
+    def _changer_version(self, version):
+        """Nouvelle version des données : les figures des versions antérieures sont périmées."""
+        with self._lock:
+            if version == self._version:
+                return
+            self._version = version
+        if not isinstance(version, int):
+            return
+        # Seulement les versions plus anciennes : un worker en retard ne doit
+        # pas effacer les figures d'une version plus récente
+        for _, _, chemin in self._entrees():
+            version_fichier = version_entree(os.path.basename(chemin))
+            if version_fichier is not None and version_fichier < version:
+                try:
+                    os.remove(chemin)
+                except FileNotFoundError:
+                    pass
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+        for _, _, chemin in self._entrees():
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        entrees = self._entrees()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'version': self._version,
+                'entries': len(entrees),
+                'bytes': sum(taille for _, taille, _ in entrees),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+            }
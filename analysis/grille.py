@@ -0,0 +1,130 @@
+"""
+Grille de détail paginée côté serveur
+Le détail des ventes reste en mémoire ; pour chaque tri demandé l'ordre des
+lignes (argsort) est calculé une fois puis gardé. Une page = masque des
+filtres lu dans cet ordre, puis tranche [début, fin) : seules les lignes
+visibles sont converties et envoyées au navigateur.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Opérateurs de filter_query (syntaxe dash_table) -> comparaison
+SYMBOLES = {
+    '=': '=', 'eq': '=', '!=': '!=', 'ne': '!=',
+    '<': '<', 'lt': '<', '<=': '<=', 'le': '<=',
+    '>': '>', 'gt': '>', '>=': '>=', 'ge': '>=',
+    'contains': 'contains', 'datestartswith': 'datestartswith',
+}
+
+CRITERE = re.compile(r"\{(?P<colonne>[^}]+)\}\s+(?P<operateur>\S+)\s+(?P<valeur>.+)")
+
+# Ordres de tri gardés en mémoire (un tableau d'entiers par combinaison)
+MAX_ORDRES = 16
+
+
+def parser_filtre(filter_query):
+    """'{Pays} contains fr && {ChiffreAffaires} > 100' -> [(colonne, opérateur, valeur)]"""
+    criteres = []
+    for partie in (filter_query or '').split(' && '):
+        trouve = CRITERE.match(partie.strip())
+        if not trouve:
+            continue
+        operateur = trouve.group('operateur')
+        if operateur not in SYMBOLES and operateur[:1] in ('i', 's'):
+            # Variantes insensible/sensible à la casse : ieq, scontains...
+            operateur = operateur[1:]
+        if operateur not in SYMBOLES:
+            continue
+        valeur = trouve.group('valeur').strip()
+        if len(valeur) > 1 and valeur[0] == valeur[-1] and valeur[0] in ('"', "'", '`'):
+            valeur = valeur[1:-1]
+        else:
+            try:
+                valeur = float(valeur)
+            except ValueError:
+                pass
+        criteres.append((trouve.group('colonne'), SYMBOLES[operateur], valeur))
+    return criteres
+
+
+def masque_critere(serie, operateur, valeur):
+    if operateur == 'contains':
+        return serie.astype(str).str.contains(str(valeur), case=False, regex=False).to_numpy()
+    if operateur == 'datestartswith':
+        return serie.astype(str).str.startswith(str(valeur)).to_numpy()
+    if isinstance(valeur, float) and not pd.api.types.is_numeric_dtype(serie):
+        # Nombre tapé dans une colonne texte : comparer en texte
+        texte = str(valeur)
+        serie, valeur = serie.astype(str), texte[:-2] if texte.endswith('.0') else texte
+    elif isinstance(valeur, str) and pd.api.types.is_numeric_dtype(serie):
+        # Texte tapé dans une colonne numérique : non numérique -> NaN (aucune égalité)
+        valeur = pd.to_numeric(valeur, errors='coerce')
+    if operateur == '=':
+        return (serie == valeur).to_numpy()
+    if operateur == '!=':
+        return (serie != valeur).to_numpy()
+    if operateur == '<':
+        return (serie < valeur).to_numpy()
+    if operateur == '<=':
+        return (serie <= valeur).to_numpy()
+    if operateur == '>':
+        return (serie > valeur).to_numpy()
+    return (serie >= valeur).to_numpy()
+
+
+class GrilleDetail:
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self._ordres = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ordre(self, sort_by):
+        """Positions des lignes triées selon sort_by, calculées une fois par tri."""
+        cle = tuple((tri['column_id'], tri['direction']) for tri in sort_by or [])
+        with self._lock:
+            if cle in self._ordres:
+                self._ordres.move_to_end(cle)
+                return self._ordres[cle]
+
+        if cle:
+            ordre = self.df.sort_values(
+                [colonne for colonne, _ in cle],
+                ascending=[direction == 'asc' for _, direction in cle],
+                kind='stable').index.to_numpy()
+        else:
+            ordre = np.arange(len(self.df))
+
+        with self._lock:
+            self._ordres[cle] = ordre
+            while len(self._ordres) > MAX_ORDRES:
+                self._ordres.popitem(last=False)
+        return ordre
+
+    def masque(self, filter_query=None, filtres=None):
+        """Lignes retenues par les filtres du dashboard et ceux des colonnes."""
+        masque = np.ones(len(self.df), dtype=bool)
+        for dimension, valeurs in (filtres or {}).items():
+            if valeurs and dimension in self.df:
+                masque &= self.df[dimension].isin(valeurs).to_numpy()
+        for colonne, operateur, valeur in parser_filtre(filter_query):
+            if colonne in self.df:
+                masque &= masque_critere(self.df[colonne], operateur, valeur)
+        return masque
+
+    def page(self, page_current=0, page_size=20, sort_by=None, filter_query=None, filtres=None):
+        """(lignes de la page en dicts, nombre de pages, nombre total de lignes retenues)"""
+        ordre = self.ordre(sort_by)
+        masque = self.masque(filter_query, filtres)
+        retenues = ordre[masque[ordre]]
+
+        total = len(retenues)
+        page_count = max(1, -(-total // page_size))
+        page_current = min(page_current or 0, page_count - 1)
+        debut = page_current * page_size
+        lignes = self.df.iloc[retenues[debut:debut + page_size]]
+        return lignes.to_dict('records'), page_count, total
@@ -0,0 +1,28 @@
+"""
+Configuration gunicorn du dashboard (Linux)
+    gunicorn -c analysis/gunicorn.conf.py
+Variables d'environnement : DASHBOARD_BIND, DASHBOARD_WORKERS, DASHBOARD_THREADS,
+DASHBOARD_TIMEOUT.
+"""
+
+import multiprocessing
+import os
+
+# wsgi.py est importé depuis analysis/, quel que soit le répertoire de lancement
+pythonpath = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = 'wsgi:server'
+
+bind = os.environ.get('DASHBOARD_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('DASHBOARD_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('DASHBOARD_THREADS', 2))
+timeout = int(os.environ.get('DASHBOARD_TIMEOUT', 60))
+
+# Données chargées une fois dans le maître, avant le fork des workers
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    server.log.info(f"Worker {worker.pid} prêt (données héritées du maître)")
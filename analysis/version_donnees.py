@@ -0,0 +1,39 @@
+"""
+Version des données publiée par l'ETL
+L'ETL incrémente ETL_Version à chaque publication : le cube du dashboard est
+reconstruit quand elle change. Elle n'est relue qu'au plus toutes les
+version_ttl secondes, quel que soit le nombre de requêtes servies.
+Il n'y a pas de cache de résultats SQL : le cube en mémoire (cube.py) en
+tient lieu, il est construit une fois par version et sert toutes les requêtes.
+"""
+
+import threading
+import time
+
+VERSION_QUERY = """
+IF OBJECT_ID('ETL_Version', 'U') IS NOT NULL
+    SELECT Version FROM ETL_Version
+ELSE
+    SELECT 0 AS Version
+"""
+
+
+class LecteurVersion:
+    def __init__(self, lire_version, version_ttl=10):
+        """lire_version() : retourne la version courante des données du DWH"""
+        self.lire_version = lire_version
+        self.version_ttl = version_ttl
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_lue = 0.0
+        self.lectures = 0
+
+    def version(self):
+        maintenant = time.monotonic()
+        if self._version is None or maintenant - self._version_lue > self.version_ttl:
+            version = self.lire_version()
+            with self._lock:
+                self._version = version
+                self._version_lue = maintenant
+                self.lectures += 1
+        return self._version
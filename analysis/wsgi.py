@@ -0,0 +1,26 @@
+"""
+Point d'entrée WSGI du dashboard (production)
+Les données sont chargées à l'import, donc dans le processus maître quand
+gunicorn tourne avec preload_app : les workers forkés partagent ensuite le
+cube en copie sur écriture (ou les pages de l'instantané mappé). La connexion
+au DWH est fermée avant le fork, chaque worker rouvre la sienne à la demande.
+
+    gunicorn -c analysis/gunicorn.conf.py
+    waitress-serve --threads 8 --listen 0.0.0.0:8050 wsgi:server   (Windows, depuis analysis/)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dashboard import create_app
+
+app = create_app(precharger=False)
+
+if os.environ.get('DASHBOARD_PRECHARGER', '1') != '0':
+    # Chargement synchrone : un thread d'arrière-plan ne survivrait pas au fork
+    app.donnees.cube()
+    app.donnees.fermer_connexion()
+
+server = app.server
@@ -0,0 +1,275 @@
+"""
+Benchmark de montée en charge de NorthwindETL
+Pour chaque volume (10^4 à 10^7 lignes de commande), génère une base Northwind
+synthétique (northwind_synthetic.py), branche NorthwindETL sur la source et le
+DWH SQLite de substitution, puis exécute l'étape publique etl_fact_ventes en
+rechargement complet. Les mesures sont celles de ses spans (metrics.py) :
+résolution des clés, extraction, transformation et chargement en masse, chacun
+avec sa durée (débit en lignes/s), le pic de mémoire (RSS) atteint pendant
+l'étape et, après extraction et transformation, la taille des blocs en octets
+par ligne (politique de types de dtype_policy.py). Les résultats sont écrits
+en JSON pour comparer deux runs.
+
+    python benchmarks/bench_etl_scale.py --rows 10000 100000 1000000 --save etl_scale.json
+    python benchmarks/bench_etl_scale.py --rows 1000000 --baseline etl_scale.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'etl'))
+from northwind_synthetic import creer_source, creer_dwh, connect_sqlite, fact_ventes_ddl
+from main_etl import NorthwindETL
+from metrics import rss_octets
+
+# Étape du benchmark -> span de etl_fact_ventes
+ETAPES = {'cles': 'keys', 'extraction': 'extract', 'transformation': 'transform',
+          'chargement': 'load'}
+
+
+class NorthwindETLSQLite(NorthwindETL):
+    """
+    NorthwindETL sur le DWH de substitution : seules les écritures de suivi en
+    T-SQL (création de Fact_Ventes, point de reprise, high-water mark) sont
+    réécrites en SQL SQLite, le reste de etl_fact_ventes est celui de l'ETL.
+    """
+
+    def _create_fact_table(self):
+        conn = self.conn_dwh_pyodbc
+        conn.execute("DROP TABLE IF EXISTS Fact_Ventes")
+        self._create_watermark_table()
+        conn.execute("DELETE FROM ETL_Watermark WHERE TableName = 'Fact_Ventes'")
+        conn.execute(fact_ventes_ddl())
+        conn.commit()
+
+    def _create_watermark_table(self):
+        self.conn_dwh_pyodbc.execute("""
+        CREATE TABLE IF NOT EXISTS ETL_Watermark (
+            TableName TEXT PRIMARY KEY,
+            LastOrderID INTEGER,
+            LastOrderDate TIMESTAMP,
+            DateMaj TIMESTAMP
+        )
+        """)
+
+    def _read_watermark(self, table):
+        self._create_watermark_table()
+        self.conn_dwh_pyodbc.commit()
+        row = self.conn_dwh_pyodbc.execute(
+            "SELECT LastOrderID, LastOrderDate FROM ETL_Watermark WHERE TableName = ?",
+            (table,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _write_watermark(self, table, last_order_id, last_order_date, keep_existing=True):
+        self._create_watermark_table()
+        self.conn_dwh_pyodbc.execute("""
+        INSERT INTO ETL_Watermark (TableName, LastOrderID, LastOrderDate, DateMaj)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (TableName) DO UPDATE SET
+            LastOrderID = CASE WHEN ? = 1 THEN MAX(LastOrderID, excluded.LastOrderID)
+                               ELSE excluded.LastOrderID END,
+            LastOrderDate = CASE WHEN ? = 1 THEN MAX(LastOrderDate, excluded.LastOrderDate)
+                                 ELSE excluded.LastOrderDate END,
+            DateMaj = excluded.DateMaj
+        """, (table, last_order_id, last_order_date, datetime.now(),
+              int(keep_existing), int(keep_existing)))
+        print(f"  ✓ High-water mark : OrderID {last_order_id}, "
+              f"OrderDate {last_order_date:%Y-%m-%d}")
+
+    def _read_checkpoint(self, table):
+        conn = self.conn_dwh_pyodbc
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS ETL_Checkpoint (
+            TableName TEXT PRIMARY KEY,
+            RunID TEXT,
+            Mode TEXT,
+            LastOrderID INTEGER,
+            LastProductID INTEGER,
+            MaxOrderDate TIMESTAMP,
+            Lignes INTEGER,
+            Termine INTEGER,
+            DateMaj TIMESTAMP
+        )
+        """)
+        conn.commit()
+        row = conn.execute(
+            "SELECT RunID, Mode, LastOrderID, LastProductID, MaxOrderDate, Lignes, Termine "
+            "FROM ETL_Checkpoint WHERE TableName = ?", (table,)).fetchone()
+        if row is None:
+            return None
+        return {'table': table, 'run_id': row[0], 'mode': row[1], 'last_order_id': row[2],
+                'last_product_id': row[3], 'max_order_date': row[4], 'lignes': row[5],
+                'termine': bool(row[6])}
+
+    def _write_checkpoint(self, etat):
+        self.conn_dwh_pyodbc.execute(
+            "INSERT OR REPLACE INTO ETL_Checkpoint (TableName, RunID, Mode, LastOrderID, "
+            "LastProductID, MaxOrderDate, Lignes, Termine, DateMaj) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (etat['table'], etat['run_id'], etat['mode'], etat['last_order_id'],
+             etat['last_product_id'], etat['max_order_date'], etat['lignes'],
+             int(etat['termine']), datetime.now()))
+
+
+def mesurer_fact_ventes(etl):
+    """Secondes, lignes, pic RSS et octets par ligne des spans de etl_fact_ventes."""
+    etl.metrics.demarrer()
+    try:
+        with etl.metrics.span('Fact_Ventes') as etape:
+            etl.etl_fact_ventes(full_refresh=True)
+    finally:
+        etl.metrics.terminer()
+
+    mesures = {}
+    for nom, span_nom in ETAPES.items():
+        span = etape.enfants.get(span_nom)
+        if span is None:
+            continue
+        debit = span.debit()
+        mesures[nom] = {
+            'secondes': round(span.secondes, 4),
+            'lignes': span.lignes,
+            'lignes_par_seconde': round(debit) if debit else None,
+            'pic_rss_mo': round(span.pic_rss / 1e6, 1),
+            'octets_par_ligne': round(span.octets / span.lignes) if span.octets else None,
+        }
+    return mesures
+
+
+def executer(n_lignes, args):
+    """Un volume : génération (ou réutilisation) de la source, DWH neuf, mesures."""
+    os.makedirs(args.workdir, exist_ok=True)
+    source = os.path.join(args.workdir, f"northwind_{n_lignes}_{args.seed}.sqlite")
+    dwh = os.path.join(args.workdir, f"dwh_{n_lignes}_{args.seed}.sqlite")
+
+    print("\n" + "=" * 60)
+    print(f" {n_lignes:,} LIGNES DE COMMANDE")
+    print("=" * 60)
+    if args.regenerate or not os.path.exists(source):
+        debut = time.perf_counter()
+        volumes = creer_source(source, n_lignes, args.seed)
+        print(f"  ➤ Source générée en {time.perf_counter() - debut:.1f} s : "
+              f"{volumes['commandes']:,} commandes, {volumes['clients']:,} clients, "
+              f"{volumes['produits']:,} produits")
+    else:
+        print(f"  ➤ Source réutilisée : {source}")
+    creer_dwh(dwh, source)
+
+    etl = NorthwindETLSQLite(chunk_size=args.chunk_size or None, batch_size=args.batch_size,
+                             snapshot_dir=None, connect=connect_sqlite(source, dwh))
+    debut = time.perf_counter()
+    rss_debut = rss_octets()
+    try:
+        etapes = mesurer_fact_ventes(etl)
+        cursor = etl.conn_dwh_pyodbc.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Fact_Ventes")
+        chargees = cursor.fetchone()[0]
+        cursor.close()
+    finally:
+        etl.close_connections()
+    total = time.perf_counter() - debut
+
+    if chargees != n_lignes:
+        raise SystemExit(f"❌ {chargees:,} lignes dans Fact_Ventes pour {n_lignes:,} générées")
+    if not args.keep:
+        os.remove(dwh)
+
+    return {
+        'lignes': n_lignes,
+        'secondes': round(total, 3),
+        'lignes_par_seconde': round(n_lignes / total),
+        'rss_debut_mo': round(rss_debut / 1e6, 1),
+        'pic_rss_mo': max(etape['pic_rss_mo'] for etape in etapes.values()),
+        'etapes': etapes,
+    }
+
+
+def afficher(resultats):
+    print(f"\n{'Lignes':>12}{'Étape':>16}{'s':>10}{'lignes/s':>14}{'pic RSS Mo':>12}"
+          f"{'octets/ligne':>14}")
+    for resultat in resultats:
+        for etape, mesure in resultat['etapes'].items():
+            debit = f"{mesure['lignes_par_seconde']:,}" if mesure['lignes_par_seconde'] else '-'
+            largeur = mesure.get('octets_par_ligne') or '-'
+            print(f"{resultat['lignes']:>12,}{etape:>16}{mesure['secondes']:>10.2f}"
+                  f"{debit:>14}{mesure['pic_rss_mo']:>12}{largeur:>14}")
+        print(f"{resultat['lignes']:>12,}{'total':>16}{resultat['secondes']:>10.2f}"
+              f"{resultat['lignes_par_seconde']:>14,}{resultat['pic_rss_mo']:>12}")
+
+
+def comparer(resultats, baseline, tolerance):
+    """Liste des (volume, étape, ratio) dont le débit baisse au-delà de la tolérance."""
+    reference = {r['lignes']: r for r in baseline['resultats']}
+    regressions = []
+    for resultat in resultats:
+        ancien = reference.get(resultat['lignes'])
+        if ancien is None:
+            continue
+        for etape, mesure in resultat['etapes'].items():
+            avant = ancien['etapes'].get(etape, {}).get('lignes_par_seconde')
+            if avant and mesure['lignes_par_seconde']:
+                ratio = mesure['lignes_par_seconde'] / avant
+                print(f"  • {resultat['lignes']:,} lignes, {etape} : débit / baseline {ratio:.2f}")
+                if ratio < 1 - tolerance:
+                    regressions.append((resultat['lignes'], etape, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge de NorthwindETL")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Volumes de lignes de commande (10^4 à 10^7)")
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help="Taille des blocs d'extraction (0 = tout d'un bloc)")
+    parser.add_argument('--batch-size', type=int, default=10_000,
+                        help="Taille des lots d'INSERT (défaut : celle de etl_fact_ventes)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workdir', default=os.path.join('data', 'bench'),
+                        help="Répertoire des bases SQLite (les sources sont réutilisées)")
+    parser.add_argument('--regenerate', action='store_true',
+                        help="Régénérer les bases source même si elles existent")
+    parser.add_argument('--keep', action='store_true', help="Garder les DWH SQLite chargés")
+    parser.add_argument('--save', help="Écrire les résultats dans ce fichier JSON")
+    parser.add_argument('--baseline', help="Comparer à un fichier JSON produit par --save")
+    parser.add_argument('--tolerance', type=float, default=0.20,
+                        help="Baisse de débit tolérée face à la baseline (défaut : 20 %%)")
+    args = parser.parse_args()
+
+    resultats = [executer(n_lignes, args) for n_lignes in sorted(args.rows)]
+    afficher(resultats)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'plateforme': platform.platform(),
+                'chunk_size': args.chunk_size,
+                'batch_size': args.batch_size,
+                'seed': args.seed,
+                'resultats': resultats,
+            }, f, indent=2)
+        print(f"\n✓ Résultats écrits dans {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = comparer(resultats, baseline, args.tolerance)
+        if regressions:
+            for n_lignes, etape, ratio in regressions:
+                print(f"❌ Régression : {etape} à {n_lignes:,} lignes, débit inférieur de "
+                      f"{1 - ratio:.0%} à la baseline")
+            sys.exit(1)
+        print("  ✓ Pas de régression")
+
+
+if __name__ == '__main__':
+    main()
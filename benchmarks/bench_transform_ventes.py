@@ -0,0 +1,145 @@
+"""
+Micro-benchmark des transformations de Fact_Ventes
+Génère des lignes de commande synthétiques, vérifie que transform_fact_ventes
+donne les mêmes résultats que l'ancienne version ligne à ligne, puis mesure
+son débit. Avec --baseline, échoue si le débit baisse au-delà de la tolérance.
+
+    python benchmarks/bench_transform_ventes.py --rows 2000000 --save bench.json
+    python benchmarks/bench_transform_ventes.py --baseline bench.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'etl'))
+from transforms import transform_fact_ventes
+
+
+def synthetic_order_lines(n, seed=42):
+    """n lignes au format de l'extraction [Order Details] JOIN Orders."""
+    rng = np.random.default_rng(seed)
+    order_date = pd.Timestamp('1996-07-04') + pd.to_timedelta(rng.integers(0, 3650, n), unit='D')
+    required = order_date + pd.to_timedelta(rng.integers(7, 43, n), unit='D')
+    shipped = order_date + pd.to_timedelta(rng.integers(1, 40, n), unit='D')
+    # ~3 % des commandes ne sont pas encore expédiées
+    shipped = shipped.where(rng.random(n) >= 0.03)
+    return pd.DataFrame({
+        'OrderID': np.arange(n) // 3 + 10248,
+        'ProductID': rng.integers(1, 78, n),
+        'CustomerID': rng.choice(['ALFKI', 'BONAP', 'ERNSH', 'QUICK', 'SAVEA'], n),
+        'EmployeeID': rng.integers(1, 10, n),
+        'OrderDate': order_date,
+        'RequiredDate': required,
+        'ShippedDate': shipped,
+        'ShipperID': rng.integers(1, 4, n),
+        'UnitPrice': rng.uniform(2.5, 263.5, n).round(2),
+        'Quantity': rng.integers(1, 130, n),
+        'Discount': rng.choice([0.0, 0.05, 0.1, 0.15, 0.2, 0.25], n),
+        'Freight': rng.exponential(80.0, n).round(2),
+    })
+
+
+def transform_reference(df, run_timestamp):
+    """Ancienne version (conversions en texte, apply, to_datetime répétés) : référence de résultats."""
+    df['OrderDate'] = pd.to_datetime(df['OrderDate'])
+    df['TempsID'] = (
+        df['OrderDate'].dt.year.astype(str) +
+        df['OrderDate'].dt.month.astype(str).str.zfill(2) +
+        df['OrderDate'].dt.day.astype(str).str.zfill(2)
+    ).astype(int)
+    df['MontantVente'] = df['Quantity'] * df['UnitPrice'] * (1 - df['Discount'])
+    df['TaxeTransport'] = df['Freight'].apply(lambda x: x * 0.10 if x >= 500 else 0)
+    df['EstLivree'] = df['ShippedDate'].notna().astype(int)
+    df['DelaiLivraison'] = 0
+    mask = df['ShippedDate'].notna() & df['RequiredDate'].notna()
+    df.loc[mask, 'DelaiLivraison'] = (
+        pd.to_datetime(df.loc[mask, 'ShippedDate']) -
+        pd.to_datetime(df.loc[mask, 'RequiredDate'])
+    ).dt.days
+    df['DateChargement'] = run_timestamp
+    df['SourceSystem'] = 'Python_ETL_v1.0'
+    return df
+
+
+def check_equivalence(n, run_timestamp):
+    source = synthetic_order_lines(n, seed=7)
+    attendu = transform_reference(source.copy(), run_timestamp)
+    obtenu = transform_fact_ventes(source.copy())
+    for colonne in ['TempsID', 'MontantVente', 'TaxeTransport', 'EstLivree', 'DelaiLivraison']:
+        if not np.allclose(attendu[colonne].to_numpy(dtype='float64'),
+                           obtenu[colonne].to_numpy(dtype='float64')):
+            raise AssertionError(f"Résultat différent de la référence pour {colonne}")
+    print(f"  ✓ Résultats identiques à la référence sur {n:,} lignes")
+
+
+def timed(func, source, repeat, *args):
+    """Meilleur temps sur repeat exécutions (chaque exécution part d'une copie)."""
+    meilleur = float('inf')
+    for _ in range(repeat):
+        df = source.copy()
+        debut = time.perf_counter()
+        func(df, *args)
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des transformations Fact_Ventes")
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--reference', action='store_true',
+                        help="Mesurer aussi l'ancienne version (lent)")
+    parser.add_argument('--save', help="Écrire les résultats dans ce fichier JSON")
+    parser.add_argument('--baseline', help="Comparer à un fichier JSON produit par --save")
+    parser.add_argument('--tolerance', type=float, default=0.20,
+                        help="Baisse de débit tolérée face à la baseline (défaut : 20 %%)")
+    args = parser.parse_args()
+
+    run_timestamp = datetime.now()
+    print("=" * 60)
+    print(" BENCHMARK TRANSFORMATIONS FACT_VENTES")
+    print("=" * 60)
+
+    check_equivalence(100_000, run_timestamp)
+
+    source = synthetic_order_lines(args.rows)
+    print(f"  ➤ {args.rows:,} lignes synthétiques générées")
+
+    duree = timed(transform_fact_ventes, source, args.repeat)
+    resultats = {
+        'rows': args.rows,
+        'seconds': duree,
+        'rows_per_second': args.rows / duree,
+    }
+    print(f"  • transform_fact_ventes : {duree:.3f} s ({resultats['rows_per_second']:,.0f} lignes/s)")
+
+    if args.reference:
+        duree_ref = timed(transform_reference, source, 1, run_timestamp)
+        resultats['reference_seconds'] = duree_ref
+        print(f"  • ancienne version      : {duree_ref:.3f} s (x{duree_ref / duree:.1f})")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(resultats, f, indent=2)
+        print(f"  ✓ Résultats écrits dans {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        ratio = resultats['rows_per_second'] / baseline['rows_per_second']
+        print(f"  • Débit / baseline : {ratio:.2f}")
+        if ratio < 1 - args.tolerance:
+            print(f"❌ Régression : débit inférieur de {1 - ratio:.0%} à la baseline")
+            sys.exit(1)
+        print("  ✓ Pas de régression")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Test de charge du dashboard
+N utilisateurs simulés en parallèle ; chacun ouvre la page (GET /, mise en
+page et dépendances), déclenche le callback de chargement, puis change les
+filtres au hasard. Les callbacks sont découverts via /_dash-dependencies :
+le script fonctionne contre n'importe quel serveur (dev, gunicorn, waitress).
+Rapporte p50/p99 par type de requête et le débit global.
+
+    gunicorn -c analysis/gunicorn.conf.py &
+    python benchmarks/load_test_dashboard.py --users 20 --duration 60 --save charge.json
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def requete(url, corps=None, timeout=60):
+    """(statut, secondes, JSON ou None)"""
+    donnees = json.dumps(corps).encode('utf-8') if corps is not None else None
+    entetes = {'Content-Type': 'application/json'} if corps is not None else {}
+    debut = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, donnees, entetes),
+                                    timeout=timeout) as reponse:
+            contenu = reponse.read()
+            statut = reponse.status
+            est_json = reponse.headers.get_content_type() == 'application/json'
+    except urllib.error.HTTPError as e:
+        return e.code, time.perf_counter() - debut, None
+    except OSError:
+        return None, time.perf_counter() - debut, None
+    return statut, time.perf_counter() - debut, json.loads(contenu) if est_json else None
+
+
+def sorties(dependance):
+    """Liste (id, propriété) d'un callback : 'a.b' ou '..a.b...c.d..'"""
+    sortie = dependance['output']
+    parties = sortie[2:-2].split('...') if sortie.startswith('..') else [sortie]
+    return [tuple(partie.rsplit('.', 1)) for partie in parties]
+
+
+def corps_callback(dependance, valeurs):
+    return {
+        'output': dependance['output'],
+        'outputs': [{'id': i, 'property': p} for i, p in sorties(dependance)],
+        'inputs': [dict(entree, value=valeurs.get(entree['id'])) for entree in dependance['inputs']],
+        'changedPropIds': [f"{entree['id']}.{entree['property']}" for entree in dependance['inputs']],
+        'state': [],
+    }
+
+
+class Mesures:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durees = {}
+        self.erreurs = {}
+
+    def ajouter(self, nom, statut, duree):
+        with self._lock:
+            if statut == 200:
+                self.durees.setdefault(nom, []).append(duree)
+            else:
+                self.erreurs[nom] = self.erreurs.get(nom, 0) + 1
+
+    def resume(self, secondes):
+        resultats = {}
+        for nom, durees in sorted(self.durees.items()):
+            d = np.array(durees) * 1000
+            resultats[nom] = {
+                'requetes': len(d),
+                'erreurs': self.erreurs.get(nom, 0),
+                'p50_ms': round(float(np.percentile(d, 50)), 1),
+                'p99_ms': round(float(np.percentile(d, 99)), 1),
+                'max_ms': round(float(d.max()), 1),
+                'par_seconde': round(len(d) / secondes, 1),
+            }
+        for nom, erreurs in self.erreurs.items():
+            resultats.setdefault(nom, {'requetes': 0, 'erreurs': erreurs})
+        return resultats
+
+
+def utilisateur(base, dependances, mesures, fin, changements, rng):
+    """Une session : page, chargement initial, puis changements de filtres jusqu'à fin."""
+    chargement = next(d for d in dependances
+                      if any(e['id'] == 'chargement' for e in d['inputs']))
+    filtres = [d for d in dependances
+               if d['inputs'] and all(e['id'].startswith('filtre-') for e in d['inputs'])]
+
+    while time.monotonic() < fin:
+        # Chargement de page = HTML + mise en page + dépendances, comme le navigateur
+        statuts, total = set(), 0.0
+        for chemin in ('/', '/_dash-layout', '/_dash-dependencies'):
+            statut, duree, _ = requete(base + chemin)
+            statuts.add(statut)
+            total += duree
+        mesures.ajouter('page', 200 if statuts == {200} else max(statuts, key=str), total)
+
+        statut, duree, reponse = requete(base + '/_dash-update-component',
+                                         corps_callback(chargement, {'chargement': 1}))
+        mesures.ajouter('callback chargement', statut, duree)
+        options = {}
+        for id_filtre, valeur in ((reponse or {}).get('response') or {}).items():
+            if isinstance(valeur, dict) and 'options' in valeur:
+                options[id_filtre] = valeur['options']
+
+        for _ in range(changements):
+            if time.monotonic() >= fin:
+                break
+            # 0 à 2 valeurs par filtre, comme un utilisateur qui affine sa sélection
+            valeurs = {id_filtre: rng.sample(choix, min(len(choix), rng.randint(0, 2))) or None
+                       for id_filtre, choix in options.items()}
+            for dependance in filtres:
+                statut, duree, _ = requete(base + '/_dash-update-component',
+                                           corps_callback(dependance, valeurs))
+                mesures.ajouter('callback filtres', statut, duree)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du dashboard")
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--users', type=int, default=10, help="Utilisateurs simultanés")
+    parser.add_argument('--duration', type=float, default=30.0, help="Durée en secondes")
+    parser.add_argument('--changes', type=int, default=5,
+                        help="Changements de filtres par chargement de page")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help="Écrire les résultats dans ce fichier JSON")
+    args = parser.parse_args()
+    base = args.url.rstrip('/')
+
+    statut, _, etat = requete(base + '/ready')
+    print(f" Serveur {base} : /ready -> {statut} {etat or ''}")
+    statut, _, dependances = requete(base + '/_dash-dependencies')
+    if statut != 200:
+        raise SystemExit(f"❌ /_dash-dependencies inaccessible (statut {statut})")
+
+    print(f" {args.users} utilisateurs pendant {args.duration:.0f}s...")
+    mesures = Mesures()
+    debut = time.monotonic()
+    fin = debut + args.duration
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        sessions = [pool.submit(utilisateur, base, dependances, mesures, fin, args.changes,
+                                random.Random(args.seed + i)) for i in range(args.users)]
+        for session in sessions:
+            session.result()
+    secondes = time.monotonic() - debut
+
+    resultats = mesures.resume(secondes)
+    print(f"\n{'Requête':<22}{'n':>8}{'err':>6}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for nom, r in resultats.items():
+        if r['requetes']:
+            print(f"{nom:<22}{r['requetes']:>8}{r['erreurs']:>6}{r['p50_ms']:>10}"
+                  f"{r['p99_ms']:>10}{r['par_seconde']:>9}")
+        else:
+            print(f"{nom:<22}{0:>8}{r['erreurs']:>6}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'url': base,
+                'users': args.users,
+                'duration': round(secondes, 1),
+                'resultats': resultats,
+            }, f, indent=2)
+        print(f"\n✓ Résultats écrits dans {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""
+Northwind synthétique pour les benchmarks de l'ETL
+Génère de façon déterministe (même graine -> mêmes données) une base source
+Northwind de 10^4 à 10^7 lignes de commande, dans un fichier SQLite qui tient
+lieu de serveur SQL. Les clés sont asymétriques comme dans la vraie base :
+quelques clients et produits concentrent la plupart des lignes (loi de Zipf),
+~2,6 lignes par commande, quelques pays dominants.
+
+Le DWH de substitution (SQLite lui aussi) contient les dimensions réduites à
+ce que lit key_resolution.build_key_maps, et Fact_Ventes avec les colonnes de
+FACT_COLONNES : les étapes propres au T-SQL (MERGE SCD2, columnstore,
+agrégats) ne s'y exécutent pas. bench_etl_scale.py y exécute etl_fact_ventes
+en rechargement complet, avec le suivi (point de reprise, high-water mark)
+réécrit en SQL SQLite.
+
+    python benchmarks/northwind_synthetic.py --rows 1000000 --output data/bench
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'etl'))
+
+# Volumes de la vraie base Northwind
+LIGNES_NORTHWIND = 2155
+CLIENTS_NORTHWIND = 91
+PRODUITS_NORTHWIND = 77
+LIGNES_PAR_COMMANDE = 2.6
+
+PREMIERE_COMMANDE = 10248
+DATE_DEBUT = np.datetime64('1996-07-04')
+
+CATEGORIES = ['Beverages', 'Condiments', 'Confections', 'Dairy Products',
+              'Grains/Cereals', 'Meat/Poultry', 'Produce', 'Seafood']
+PAYS = ['USA', 'Germany', 'Brazil', 'France', 'UK', 'Austria', 'Venezuela', 'Sweden',
+        'Canada', 'Mexico', 'Italy', 'Spain', 'Finland', 'Ireland', 'Belgium',
+        'Denmark', 'Switzerland', 'Argentina', 'Portugal', 'Poland', 'Norway']
+TRANSPORTEURS = ['Speedy Express', 'United Package', 'Federal Shipping']
+EMPLOYES = ['Davolio', 'Fuller', 'Leverling', 'Peacock', 'Buchanan',
+            'Suyama', 'King', 'Callahan', 'Dodsworth']
+REMISES = [0.0, 0.05, 0.1, 0.15, 0.2, 0.25]
+P_REMISES = [0.6, 0.1, 0.1, 0.1, 0.05, 0.05]
+
+SOURCE_DDL = """
+CREATE TABLE Customers (
+    CustomerID TEXT PRIMARY KEY, CompanyName TEXT, ContactName TEXT, ContactTitle TEXT,
+    Address TEXT, City TEXT, Region TEXT, PostalCode TEXT, Country TEXT, Phone TEXT, Fax TEXT
+);
+CREATE TABLE Categories (CategoryID INTEGER PRIMARY KEY, CategoryName TEXT);
+CREATE TABLE Suppliers (SupplierID INTEGER PRIMARY KEY, CompanyName TEXT);
+CREATE TABLE Products (
+    ProductID INTEGER PRIMARY KEY, ProductName TEXT, SupplierID INTEGER, CategoryID INTEGER,
+    QuantityPerUnit TEXT, UnitPrice REAL, UnitsInStock INTEGER, UnitsOnOrder INTEGER,
+    ReorderLevel INTEGER, Discontinued INTEGER
+);
+CREATE TABLE Employees (
+    EmployeeID INTEGER PRIMARY KEY, LastName TEXT, FirstName TEXT, Title TEXT,
+    TitleOfCourtesy TEXT, BirthDate TIMESTAMP, HireDate TIMESTAMP, Address TEXT, City TEXT,
+    Region TEXT, PostalCode TEXT, Country TEXT, HomePhone TEXT, Extension TEXT, ReportsTo INTEGER
+);
+CREATE TABLE Shippers (ShipperID INTEGER PRIMARY KEY, CompanyName TEXT, Phone TEXT);
+CREATE TABLE Orders (
+    OrderID INTEGER PRIMARY KEY, CustomerID TEXT, EmployeeID INTEGER, OrderDate TIMESTAMP,
+    RequiredDate TIMESTAMP, ShippedDate TIMESTAMP, ShipVia INTEGER, Freight REAL
+);
+CREATE TABLE [Order Details] (
+    OrderID INTEGER, ProductID INTEGER, UnitPrice REAL, Quantity INTEGER, Discount REAL,
+    PRIMARY KEY (OrderID, ProductID)
+);
+"""
+
+# Dimensions du DWH réduites aux colonnes lues pour la résolution des clés
+DWH_DIMENSIONS_DDL = """
+CREATE TABLE Dim_Client (ClientID INTEGER PRIMARY KEY, CustomerID TEXT, Actif INTEGER);
+CREATE TABLE Dim_Produit (ProduitID INTEGER PRIMARY KEY, ProductID INTEGER, Actif INTEGER);
+CREATE TABLE Dim_Employe (EmployeID INTEGER PRIMARY KEY, EmployeeID INTEGER, Actif INTEGER);
+CREATE TABLE Dim_Transporteur (TransporteurID INTEGER PRIMARY KEY, ShipperID INTEGER, Actif INTEGER);
+"""
+
+
+def zipf(n, exposant, rng=None):
+    """Probabilités de Zipf sur n éléments, rangs mélangés si rng est donné."""
+    poids = 1.0 / np.arange(1, n + 1) ** exposant
+    if rng is not None:
+        poids = rng.permutation(poids)
+    return poids / poids.sum()
+
+
+def codes_clients(n):
+    """CustomerID sur 5 lettres (AAAAA, AAAAB, ...) comme ALFKI, BONAP."""
+    i = np.arange(n)
+    lettres = [np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))[(i // 26 ** k) % 26]
+               for k in range(4, -1, -1)]
+    return [''.join(t) for t in zip(*lettres)]
+
+
+def volumes(n_lignes):
+    """Nombre de clients et de produits pour n_lignes lignes de commande."""
+    clients = max(CLIENTS_NORTHWIND, n_lignes // 25)
+    produits = max(PRODUITS_NORTHWIND,
+                   int(round(PRODUITS_NORTHWIND * (n_lignes / LIGNES_NORTHWIND) ** 0.5)))
+    return clients, produits
+
+
+def generer_dimensions(n_lignes, rng):
+    """Tables de référence (clients, produits, employés...) en DataFrames."""
+    n_clients, n_produits = volumes(n_lignes)
+
+    pays = rng.choice(PAYS, n_clients, p=zipf(len(PAYS), 1.0))
+    clients = pd.DataFrame({
+        'CustomerID': codes_clients(n_clients),
+        'CompanyName': [f"Client {i}" for i in range(n_clients)],
+        'ContactName': [f"Contact {i}" for i in range(n_clients)],
+        'ContactTitle': rng.choice(['Owner', 'Sales Representative', 'Marketing Manager',
+                                    'Accounting Manager'], n_clients),
+        'Address': [f"{i} Main Street" for i in range(n_clients)],
+        'City': [f"{p[:9]} {k}" for p, k in zip(pays, rng.integers(1, 6, n_clients))],
+        'Region': np.where(rng.random(n_clients) < 0.6, None,
+                           rng.choice(['WA', 'OR', 'BC', 'SP', 'RJ', 'Co. Cork'], n_clients)),
+        'PostalCode': rng.integers(10000, 99999, n_clients).astype(str),
+        'Country': pays,
+        'Phone': [f"555-{i % 10000:04d}" for i in range(n_clients)],
+        'Fax': np.where(rng.random(n_clients) < 0.3, None, '555-0000'),
+    })
+
+    categories = pd.DataFrame({'CategoryID': np.arange(1, len(CATEGORIES) + 1),
+                               'CategoryName': CATEGORIES})
+    suppliers = pd.DataFrame({'SupplierID': np.arange(1, 30),
+                              'CompanyName': [f"Fournisseur {i}" for i in range(1, 30)]})
+    produits = pd.DataFrame({
+        'ProductID': np.arange(1, n_produits + 1),
+        'ProductName': [f"Produit {i}" for i in range(1, n_produits + 1)],
+        'SupplierID': rng.integers(1, 30, n_produits),
+        'CategoryID': rng.integers(1, len(CATEGORIES) + 1, n_produits),
+        'QuantityPerUnit': rng.choice(['10 boxes x 20 bags', '24 - 12 oz bottles',
+                                       '12 - 550 ml bottles', '48 pieces'], n_produits),
+        'UnitPrice': rng.lognormal(3.0, 0.8, n_produits).clip(2.5, 263.5).round(2),
+        'UnitsInStock': rng.integers(0, 125, n_produits),
+        'UnitsOnOrder': rng.choice([0, 10, 40, 70], n_produits),
+        'ReorderLevel': rng.choice([0, 5, 10, 25], n_produits),
+        'Discontinued': (rng.random(n_produits) < 0.1).astype(int),
+    })
+    employes = pd.DataFrame({
+        'EmployeeID': np.arange(1, len(EMPLOYES) + 1),
+        'LastName': EMPLOYES,
+        'FirstName': [f"Prénom{i}" for i in range(1, len(EMPLOYES) + 1)],
+        'Title': ['Sales Representative'] * len(EMPLOYES),
+        'TitleOfCourtesy': ['Ms.'] * len(EMPLOYES),
+        'BirthDate': '1960-01-01 00:00:00',
+        'HireDate': '1992-05-01 00:00:00',
+        'Address': 'Seattle', 'City': 'Seattle', 'Region': 'WA', 'PostalCode': '98122',
+        'Country': 'USA', 'HomePhone': '(206) 555-9857', 'Extension': '5467',
+        'ReportsTo': [None, None] + [2] * (len(EMPLOYES) - 2),
+    })
+    transporteurs = pd.DataFrame({'ShipperID': [1, 2, 3], 'CompanyName': TRANSPORTEURS,
+                                  'Phone': ['(503) 555-9831'] * 3})
+    return {'Customers': clients, 'Categories': categories, 'Suppliers': suppliers,
+            'Products': produits, 'Employees': employes, 'Shippers': transporteurs}
+
+
+def tailles_commandes(n_lignes, n_produits, rng):
+    """Lignes par commande (1 + Poisson), tronquées pour totaliser exactement n_lignes."""
+    estimation = int(n_lignes / LIGNES_PAR_COMMANDE * 1.1) + 10
+    tailles = np.empty(0, dtype='int64')
+    while tailles.sum() < n_lignes:
+        tirage = np.minimum(1 + rng.poisson(LIGNES_PAR_COMMANDE - 1, estimation), n_produits)
+        tailles = np.concatenate([tailles, tirage])
+    cumul = np.cumsum(tailles)
+    dernier = int(np.searchsorted(cumul, n_lignes))
+    tailles = tailles[:dernier + 1].copy()
+    tailles[-1] -= cumul[dernier] - n_lignes
+    return tailles
+
+
+def dates_texte(jours):
+    """Jours depuis DATE_DEBUT -> 'YYYY-MM-DDTHH:MM:SS' (None pour les valeurs manquantes)."""
+    texte = np.datetime_as_string((DATE_DEBUT + jours.astype('timedelta64[D]'))
+                                  .astype('datetime64[s]'))
+    return texte.astype(object)
+
+
+def generer_commandes(n_lignes, dimensions, rng, annees=3, bloc=200_000):
+    """Génère (Orders, [Order Details]) par blocs de commandes, en ordre chronologique."""
+    clients = np.asarray(dimensions['Customers']['CustomerID'])
+    prix = dimensions['Products']['UnitPrice'].to_numpy()
+    n_produits = len(prix)
+    p_clients = zipf(len(clients), 1.1, rng)
+    p_produits = zipf(n_produits, 0.8, rng)
+    p_employes = zipf(len(EMPLOYES), 0.5, rng)
+
+    tailles = tailles_commandes(n_lignes, n_produits, rng)
+    n_commandes = len(tailles)
+    jours = int(365 * annees)
+
+    for debut in range(0, n_commandes, bloc):
+        t = tailles[debut:debut + bloc]
+        k = len(t)
+        rangs = np.arange(debut, debut + k)
+
+        # Dates croissantes avec le numéro de commande, comme dans Northwind
+        jour_commande = rangs * jours // n_commandes
+        expediee = rng.random(k) >= 0.03
+        commandes = pd.DataFrame({
+            'OrderID': PREMIERE_COMMANDE + rangs,
+            'CustomerID': rng.choice(clients, k, p=p_clients),
+            'EmployeeID': rng.choice(len(EMPLOYES), k, p=p_employes) + 1,
+            'OrderDate': dates_texte(jour_commande),
+            'RequiredDate': dates_texte(jour_commande + rng.choice([14, 28, 42], k,
+                                                                   p=[0.05, 0.9, 0.05])),
+            'ShippedDate': np.where(expediee, dates_texte(jour_commande + rng.integers(1, 36, k)),
+                                    None),
+            'ShipVia': rng.choice([1, 2, 3], k, p=[0.3, 0.4, 0.3]),
+            'Freight': rng.exponential(78.0, k).round(2),
+        })
+
+        # Produits distincts dans une commande : produit de tête (Zipf) puis suivants
+        m = int(t.sum())
+        position = np.arange(m) - np.repeat(np.cumsum(t) - t, t)
+        tete = rng.choice(n_produits, k, p=p_produits)
+        produit = (np.repeat(tete, t) + position) % n_produits
+        details = pd.DataFrame({
+            'OrderID': np.repeat(commandes['OrderID'].to_numpy(), t),
+            'ProductID': produit + 1,
+            # ~20 % des lignes au tarif précédent
+            'UnitPrice': (prix[produit] * np.where(rng.random(m) < 0.2, 0.8, 1.0)).round(2),
+            'Quantity': np.minimum(1 + rng.exponential(20.0, m).astype('int64'), 130),
+            'Discount': rng.choice(REMISES, m, p=P_REMISES),
+        })
+        yield commandes, details
+
+
+def inserer(conn, table, df):
+    colonnes = ', '.join(df.columns)
+    marques = ', '.join('?' for _ in df.columns)
+    valeurs = [serie.tolist() for _, serie in df.items()]
+    conn.executemany(f"INSERT INTO {table} ({colonnes}) VALUES ({marques})", zip(*valeurs))
+
+
+def creer_source(chemin, n_lignes, seed=42, annees=3):
+    """Écrit la base source SQLite ; retourne les volumes générés."""
+    if os.path.exists(chemin):
+        os.remove(chemin)
+    rng = np.random.default_rng(seed)
+    dimensions = generer_dimensions(n_lignes, rng)
+
+    conn = sqlite3.connect(chemin)
+    try:
+        # Écriture en vrac : la base est reconstruite si le script est interrompu
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SOURCE_DDL)
+        for table, df in dimensions.items():
+            inserer(conn, table, df)
+
+        n_commandes = 0
+        for commandes, details in generer_commandes(n_lignes, dimensions, rng, annees):
+            inserer(conn, 'Orders', commandes)
+            inserer(conn, '[Order Details]', details)
+            n_commandes += len(commandes)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        'lignes': n_lignes,
+        'commandes': n_commandes,
+        'clients': len(dimensions['Customers']),
+        'produits': len(dimensions['Products']),
+        'octets': os.path.getsize(chemin),
+    }
+
+
+def sqlite_type(type_sql):
+    """Type de colonne SQLite pour un type de bulk_loader (d'après le type Python envoyé)."""
+    return {str: 'TEXT', int: 'INTEGER', float: 'REAL'}.get(type_sql[3], 'TIMESTAMP')
+
+
+def fact_ventes_ddl():
+    """CREATE TABLE de Fact_Ventes dans le DWH de substitution (colonnes de FACT_COLONNES)."""
+    from main_etl import FACT_COLONNES
+
+    colonnes = ',\n    '.join(f"{nom} {sqlite_type(type_sql)}" for nom, type_sql in FACT_COLONNES)
+    return f"""
+    CREATE TABLE Fact_Ventes (
+        VenteID INTEGER PRIMARY KEY,
+        {colonnes},
+        UNIQUE (OrderID, ProductID)
+    )
+    """
+
+
+def creer_dwh(chemin, source):
+    """
+    DWH de substitution : dimensions remplies depuis la source (une version active
+    par clé, plus le membre inconnu) et Fact_Ventes vide, clé unique (OrderID, ProductID).
+    """
+    from key_resolution import FACT_DIMENSIONS, UNKNOWN_MEMBER
+
+    if os.path.exists(chemin):
+        os.remove(chemin)
+    conn = sqlite3.connect(chemin)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(DWH_DIMENSIONS_DDL)
+        conn.execute("ATTACH DATABASE ? AS source", (source,))
+        tables_source = {'Dim_Client': 'Customers', 'Dim_Produit': 'Products',
+                         'Dim_Employe': 'Employees', 'Dim_Transporteur': 'Shippers'}
+        for table, surrogate_key, natural_key, _ in FACT_DIMENSIONS:
+            conn.execute(f"INSERT INTO {table} ({surrogate_key}, {natural_key}, Actif) "
+                         f"VALUES ({UNKNOWN_MEMBER}, NULL, 1)")
+            conn.execute(f"INSERT INTO {table} ({natural_key}, Actif) "
+                         f"SELECT {natural_key}, 1 FROM source.{tables_source[table]} "
+                         f"ORDER BY {natural_key}")
+        conn.commit()
+        conn.execute("DETACH DATABASE source")
+
+        conn.execute(fact_ventes_ddl())
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def connect_sqlite(source, dwh):
+    """
+    Fabrique de connexions pour NorthwindETL(connect=...) : 'source' et 'dwh'
+    ouvrent les fichiers SQLite, dates relues en datetime comme avec pyodbc.
+    """
+    sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+    sqlite3.register_adapter(pd.Timestamp, lambda d: d.isoformat(' '))
+    sqlite3.register_adapter(datetime, lambda d: d.isoformat(' '))
+
+    def connect(base):
+        # Les connexions sont ouvertes par thread mais fermées depuis le thread principal
+        return sqlite3.connect(source if base == 'source' else dwh,
+                               detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+    return connect
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère une base Northwind synthétique (SQLite)")
+    parser.add_argument('--rows', type=int, default=100_000, help="Lignes de commande")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--years', type=float, default=3, help="Années couvertes par les commandes")
+    parser.add_argument('--output', default=os.path.join('data', 'bench'))
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    source = os.path.join(args.output, f"northwind_{args.rows}_{args.seed}.sqlite")
+    debut = time.perf_counter()
+    volumes_generes = creer_source(source, args.rows, args.seed, args.years)
+    print(f"✓ {source} : {volumes_generes['lignes']:,} lignes, "
+          f"{volumes_generes['commandes']:,} commandes, {volumes_generes['clients']:,} clients, "
+          f"{volumes_generes['produits']:,} produits ({time.perf_counter() - debut:.1f} s, "
+          f"{volumes_generes['octets'] / 1e6:.0f} Mo)")
+
+
+if __name__ == '__main__':
+    main()
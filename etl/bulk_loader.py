@@ -0,0 +1,103 @@
+"""
+Chargement en masse vers DWH_Northwind
+Envoie chaque lot sous forme de tableaux de paramètres typés
+(pyodbc fast_executemany) : un aller-retour réseau par lot au lieu
+d'un aller-retour par ligne.
+"""
+
+import time
+from itertools import repeat
+import pyodbc
+
+# ====================
+# TYPES DE COLONNES
+# ====================
+# Chaque type = (type SQL ODBC, taille, décimales, type Python envoyé).
+# Les tailles explicites évitent que le driver déduise le type ligne par ligne.
+def NVARCHAR(taille):
+    return (pyodbc.SQL_WVARCHAR, taille, 0, str)
+
+INT = (pyodbc.SQL_INTEGER, 0, 0, int)
+BIGINT = (pyodbc.SQL_BIGINT, 0, 0, int)
+SMALLINT = (pyodbc.SQL_SMALLINT, 0, 0, int)
+TINYINT = (pyodbc.SQL_TINYINT, 0, 0, int)
+BIT = (pyodbc.SQL_BIT, 0, 0, int)
+FLOAT = (pyodbc.SQL_DOUBLE, 0, 0, float)
+# MONEY est envoyé en float (comme l'ancien chargement ligne à ligne),
+# la conversion vers MONEY se fait côté serveur
+MONEY = (pyodbc.SQL_DOUBLE, 0, 0, float)
+DATE = (pyodbc.SQL_TYPE_DATE, 10, 0, None)
+DATETIME = (pyodbc.SQL_TYPE_TIMESTAMP, 23, 3, None)
+
+
+def column_values(serie, type_python):
+    """Convertit une colonne pandas en liste de valeurs Python natives (NULL -> None)."""
+    masque = serie.isna()
+    if type_python is int:
+        valeurs = serie.fillna(0).astype('int64').tolist()
+    elif type_python is float:
+        valeurs = serie.astype('float64').tolist()
+    elif type_python is str:
+        valeurs = serie.astype(str).tolist()
+    else:
+        valeurs = serie.tolist()
+
+    if masque.any():
+        valeurs = [None if manquant else v for v, manquant in zip(valeurs, masque.tolist())]
+    return valeurs
+
+
+def build_params(df, colonnes, constantes=None):
+    """
+    Transforme un DataFrame en liste de tuples, colonne par colonne (sans iterrows).
+    constantes : {colonne: valeur} répétée sur chaque ligne, sans colonne dans df.
+    """
+    constantes = constantes or {}
+    valeurs = [repeat(constantes[nom], len(df)) if nom in constantes
+               else column_values(df[nom], type_sql[3])
+               for nom, type_sql in colonnes]
+    return list(zip(*valeurs))
+
+
+def bulk_insert(conn, table, colonnes, df, batch_size=10000, commit_each_batch=False,
+                constantes=None, before_commit=None):
+    """
+    Insère df dans table par lots de batch_size lignes.
+    colonnes      : liste de (nom de colonne, type) dans l'ordre de l'INSERT ;
+                    les noms doivent exister dans df ou dans constantes.
+    constantes    : {colonne: valeur} identique pour toutes les lignes (horodatage
+                    du run, système source), répétée lot par lot à l'envoi.
+    before_commit : fonction appelée avec chaque lot juste avant son commit
+                    (commit_each_batch), dans la même transaction que le lot.
+    Retourne (nombre de lignes, durée en secondes).
+    """
+    noms = [nom for nom, _ in colonnes]
+    insert_sql = (
+        f"INSERT INTO {table} ({', '.join(noms)}) "
+        f"VALUES ({', '.join('?' for _ in noms)})"
+    )
+
+    total_rows = len(df)
+    debut = time.perf_counter()
+
+    cursor = conn.cursor()
+    try:
+        if hasattr(cursor, 'fast_executemany'):
+            # Propre à pyodbc ; les autres pilotes DB-API font un executemany classique
+            cursor.fast_executemany = True
+        cursor.setinputsizes([type_sql[:3] for _, type_sql in colonnes])
+
+        for i in range(0, total_rows, batch_size):
+            batch = df.iloc[i:i + batch_size]
+            cursor.executemany(insert_sql, build_params(batch, colonnes, constantes))
+            if commit_each_batch:
+                if before_commit is not None:
+                    before_commit(batch)
+                conn.commit()
+    finally:
+        cursor.close()
+
+    duree = time.perf_counter() - debut
+    debit = total_rows / duree if duree > 0 else 0
+    print(f"  ✓ {total_rows:,} lignes insérées dans {table} en {duree:.2f} s ({debit:,.0f} lignes/s)")
+    return total_rows, duree
@@ -0,0 +1,67 @@
+"""
+Dimension temps Dim_Temps
+Une ligne par jour, générée en une passe vectorielle sur une plage de dates.
+TempsID = YYYYMMDD, la même clé que Fact_Ventes.TempsID : filtrer une
+période revient à un prédicat d'intervalle entier sur TempsID.
+"""
+
+import numpy as np
+import pandas as pd
+from bulk_loader import INT, SMALLINT, TINYINT, BIT, DATE, NVARCHAR
+
+NOMS_MOIS = np.array(['janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+                      'août', 'septembre', 'octobre', 'novembre', 'décembre'])
+NOMS_JOURS = np.array(['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche'])
+
+CREATE_DIM_TEMPS = """
+CREATE TABLE Dim_Temps (
+    TempsID INT PRIMARY KEY,
+    DateComplete DATE,
+    Annee SMALLINT,
+    Trimestre TINYINT,
+    Mois TINYINT,
+    NomMois NVARCHAR(10),
+    AnneeMois INT,
+    SemaineISO TINYINT,
+    AnneeISO SMALLINT,
+    JourSemaine TINYINT,
+    NomJour NVARCHAR(10),
+    EstWeekend BIT
+)
+"""
+
+COLONNES_DIM_TEMPS = [
+    ('TempsID', INT), ('DateComplete', DATE), ('Annee', SMALLINT),
+    ('Trimestre', TINYINT), ('Mois', TINYINT), ('NomMois', NVARCHAR(10)),
+    ('AnneeMois', INT), ('SemaineISO', TINYINT), ('AnneeISO', SMALLINT),
+    ('JourSemaine', TINYINT), ('NomJour', NVARCHAR(10)), ('EstWeekend', BIT)
+]
+
+
+def temps_id(annee, mois=1, jour=1):
+    return annee * 10000 + mois * 100 + jour
+
+
+def build_dim_temps(date_debut, date_fin):
+    """Toutes les dates de date_debut à date_fin (incluses)."""
+    dates = pd.date_range(pd.Timestamp(date_debut).normalize(),
+                          pd.Timestamp(date_fin).normalize(), freq='D')
+    annee = dates.year.to_numpy()
+    mois = dates.month.to_numpy()
+    jour_semaine = dates.dayofweek.to_numpy()   # 0 = lundi
+    iso = dates.isocalendar()
+
+    return pd.DataFrame({
+        'TempsID': temps_id(annee, mois, dates.day.to_numpy()),
+        'DateComplete': dates.date,
+        'Annee': annee,
+        'Trimestre': (mois - 1) // 3 + 1,
+        'Mois': mois,
+        'NomMois': NOMS_MOIS[mois - 1],
+        'AnneeMois': annee * 100 + mois,
+        'SemaineISO': iso['week'].to_numpy(),
+        'AnneeISO': iso['year'].to_numpy(),
+        'JourSemaine': jour_semaine + 1,
+        'NomJour': NOMS_JOURS[jour_semaine],
+        'EstWeekend': (jour_semaine >= 5).astype('int64'),
+    })
@@ -0,0 +1,59 @@
+"""
+Politique de types des DataFrames de l'ETL
+Appliquée dès l'extraction, d'après le schéma cible (types de bulk_loader),
+au lieu des int64 / float64 / object que pandas choisit par défaut :
+- entiers : le plus petit dtype qui couvre le type SQL de la colonne
+  (SMALLINT -> int16, BIT -> int8...), si la colonne n'a pas de NULL et
+  que ses valeurs tiennent dans ce type ;
+- texte très répété (pays, villes, catégories, client d'une vente...) :
+  category, un code entier par ligne et chaque libellé stocké une fois ;
+- constantes du run (DateChargement, SourceSystem) : jamais matérialisées en
+  colonnes, bulk_insert les répète au moment de l'envoi (constantes=).
+"""
+
+import numpy as np
+import pandas as pd
+import pyodbc
+
+# Type SQL (code ODBC) -> dtype numpy des entiers
+ENTIERS = {
+    pyodbc.SQL_BIT: np.dtype('int8'),
+    pyodbc.SQL_TINYINT: np.dtype('uint8'),
+    pyodbc.SQL_SMALLINT: np.dtype('int16'),
+    pyodbc.SQL_INTEGER: np.dtype('int32'),
+    pyodbc.SQL_BIGINT: np.dtype('int64'),
+}
+
+
+def apply_dtypes(df, colonnes, categorical=()):
+    """
+    Convertit en place les colonnes de df décrites par colonnes (nom, type).
+    categorical : noms des colonnes texte à stocker en category.
+    Les colonnes absentes de df sont ignorées.
+    """
+    for nom, type_sql in colonnes:
+        if nom not in df:
+            continue
+        serie = df[nom]
+        if nom in categorical:
+            if not isinstance(serie.dtype, pd.CategoricalDtype):
+                df[nom] = serie.astype('category')
+        elif type_sql[0] in ENTIERS and pd.api.types.is_integer_dtype(serie.dtype):
+            cible = ENTIERS[type_sql[0]]
+            if serie.dtype.itemsize <= cible.itemsize:
+                continue
+            bornes = np.iinfo(cible)
+            if serie.empty or (serie.min() >= bornes.min and serie.max() <= bornes.max):
+                df[nom] = serie.astype(cible)
+    return df
+
+
+def fill_missing(df, valeurs):
+    """fillna par colonne qui accepte les colonnes category (la valeur devient une modalité)."""
+    for nom, valeur in valeurs.items():
+        serie = df[nom]
+        if isinstance(serie.dtype, pd.CategoricalDtype) and valeur not in serie.cat.categories:
+            serie = serie.cat.add_categories([valeur])
+        df[nom] = serie.fillna(valeur)
+    return df
+
@@ -0,0 +1,73 @@
+"""
+Résolution des clés de substitution de Fact_Ventes
+Construit, pour chaque dimension fraîchement chargée, une table de
+correspondance clé naturelle -> clé de substitution (version active), puis
+réécrit chaque lot de faits en clés entières en une passe vectorielle.
+Les clés absentes de la dimension pointent vers le membre « inconnu » (-1).
+"""
+
+import numpy as np
+import pandas as pd
+
+UNKNOWN_MEMBER = -1
+
+# (dimension, clé de substitution, clé naturelle dans la dimension, clé naturelle dans les faits)
+FACT_DIMENSIONS = [
+    ('Dim_Client', 'ClientID', 'CustomerID', 'CustomerID'),
+    ('Dim_Produit', 'ProduitID', 'ProductID', 'ProductID'),
+    ('Dim_Employe', 'EmployeID', 'EmployeeID', 'EmployeeID'),
+    ('Dim_Transporteur', 'TransporteurID', 'ShipperID', 'ShipperID'),
+]
+
+
+class KeyMap:
+    """Correspondance compacte clé naturelle -> clé de substitution."""
+
+    def __init__(self, naturelles, substitutions):
+        self.index = pd.Index(naturelles)
+        self.valeurs = np.asarray(substitutions, dtype='int32')
+
+    def resolve(self, serie):
+        """Retourne (clés de substitution, nombre de clés inconnues)."""
+        if len(self.valeurs) == 0:
+            # Dimension sans version active (premier chargement, tout expiré)
+            return np.full(len(serie), UNKNOWN_MEMBER, dtype='int32'), len(serie)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Une recherche par modalité, puis report sur les codes (-1 = NULL)
+            positions = self.index.get_indexer(serie.cat.categories)
+            positions = np.append(positions, -1)[serie.cat.codes.to_numpy()]
+        else:
+            positions = self.index.get_indexer(serie)
+        trouvees = positions >= 0
+        cles = np.where(trouvees, self.valeurs[positions], UNKNOWN_MEMBER).astype('int32')
+        return cles, int((~trouvees).sum())
+
+    def __len__(self):
+        return len(self.index)
+
+
+def build_key_maps(conn):
+    """Lit les versions actives de chaque dimension (hors membre inconnu)."""
+    key_maps = {}
+    for table, surrogate_key, natural_key, _ in FACT_DIMENSIONS:
+        df = pd.read_sql(
+            f"SELECT {natural_key}, {surrogate_key} FROM {table} "
+            f"WHERE Actif = 1 AND {surrogate_key} <> {UNKNOWN_MEMBER}",
+            conn
+        ).drop_duplicates(natural_key, keep='last')
+        key_maps[surrogate_key] = KeyMap(df[natural_key], df[surrogate_key])
+        print(f"  ✓ {table} : {len(df):,} clés en mémoire")
+    return key_maps
+
+
+def resolve_surrogate_keys(df, key_maps):
+    """Ajoute ClientID, ProduitID, EmployeID et TransporteurID à un lot de faits."""
+    inconnues = {}
+    for _, surrogate_key, _, fact_key in FACT_DIMENSIONS:
+        df[surrogate_key], manquantes = key_maps[surrogate_key].resolve(df[fact_key])
+        if manquantes:
+            inconnues[surrogate_key] = manquantes
+
+    for surrogate_key, manquantes in inconnues.items():
+        print(f"  ⚠️ {manquantes:,} ligne(s) sans correspondance pour {surrogate_key} -> membre inconnu")
+    return df
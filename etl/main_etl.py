@@ -1,40 +1,192 @@
 """
 ETL COMPLET pour Northwind -> DWH_Northwind
 Exécute dans cet ordre :
-1. Dimensions
-2. Table de faits
+1. Dimensions (en parallèle, indépendantes entre elles)
+2. Table de faits (après toutes les dimensions)
+3. Index, puis instantané colonnaire pour le dashboard
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from config.config import get_engine, get_connection_string
 import pyodbc
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+import argparse
+import threading
+import queue
+from functools import partial
+from contextlib import nullcontext
+from bulk_loader import bulk_insert, NVARCHAR, INT, SMALLINT, BIT, FLOAT, MONEY, DATE, DATETIME
+from scd_merge import scd2_merge, ensure_scd_columns
+from scheduler import Stage, run_stages, critical_path
+from transforms import transform_fact_ventes, fact_constants
+from dtype_policy import apply_dtypes, fill_missing
+from dim_temps import build_dim_temps, CREATE_DIM_TEMPS, COLONNES_DIM_TEMPS
+from physical_design import (FACT_STORAGE_OPTIONS, DIMENSION_INDEXES, disable_secondary_indexes,
+                             ensure_index, ensure_fact_storage, fact_secondary_indexes,
+                             drop_obsolete_tables)
+from key_resolution import build_key_maps, resolve_surrogate_keys, UNKNOWN_MEMBER
+from snapshot import SNAPSHOT_DIR, publish_snapshot
+from metrics import METRICS_DIR, RunMetrics, octets_dataframe
+from profiling import PROFILE_DIR, Profileur
 import warnings
 warnings.filterwarnings('ignore')
 
+# Colonnes chargées dans Fact_Ventes (ordre de l'INSERT)
+FACT_COLONNES = [
+    ('CustomerID', NVARCHAR(5)), ('ProductID', INT),
+    ('TempsID', INT), ('EmployeeID', INT), ('ShipperID', INT),
+    ('Quantite', SMALLINT), ('PrixUnitaire', MONEY),
+    ('Remise', FLOAT), ('MontantVente', MONEY),
+    ('FraisTransport', MONEY), ('TaxeTransport', MONEY),
+    ('EstLivree', BIT), ('DelaiLivraison', INT), ('OrderID', INT),
+    ('DateChargement', DATETIME), ('SourceSystem', NVARCHAR(50)),
+    ('ClientID', INT), ('ProduitID', INT), ('EmployeID', INT), ('TransporteurID', INT)
+]
+
+# Modes de chargement de Fact_Ventes enregistrés dans le point de reprise
+MODE_COMPLET = 'complet'
+MODE_INCREMENTAL = 'incremental'
+
+# Types appliqués à l'extraction de Fact_Ventes (d'après le DDL du DWH) :
+# entiers resserrés, clé client en category
+FACT_EXTRACT_COLONNES = [
+    ('OrderID', INT), ('ProductID', INT), ('CustomerID', NVARCHAR(5)),
+    ('EmployeeID', INT), ('ShipperID', INT), ('UnitPrice', MONEY),
+    ('Quantity', SMALLINT), ('Discount', FLOAT), ('Freight', MONEY)
+]
+FACT_CATEGORIES = {'CustomerID'}
+
+# Attributs texte des dimensions très répétés d'une ligne à l'autre
+DIMENSION_CATEGORIES = {'ContactTitle', 'Title', 'TitleOfCourtesy', 'City', 'Region',
+                        'Country', 'SupplierName', 'CategoryName'}
+
+def connect_sql_server(base):
+    """Connexion pyodbc vers 'source' ou 'dwh' (paramètres de config/config.py)."""
+    from config.config import get_connection_string
+    return pyodbc.connect(get_connection_string(base))
+
+
 class NorthwindETL:
-    def __init__(self):
+    def __init__(self, reprocess_days=30, chunk_size=None, queue_depth=2, batch_size=10000,
+                 fact_storage='columnstore', snapshot_dir=SNAPSHOT_DIR,
+                 connect=connect_sql_server, metrics_dir=METRICS_DIR, profiler=None):
         print("=" * 60)
         print(" ETL NORTHWIND - BUSINESS INTELLIGENCE")
         print("=" * 60)
         
-        # Connexions
-        self.conn_source = pyodbc.connect(get_connection_string('source'))
-        self.engine_dwh = get_engine('dwh')
-        
-        # Connexion pyodbc directe vers DWH (pour contourner le problème)
-        self.conn_dwh_pyodbc = pyodbc.connect(get_connection_string('dwh'))
+        # Connexions : une paire source/DWH par thread (chaque worker de
+        # l'ordonnanceur a ses propres connexions pyodbc). connect(base) ouvre
+        # une connexion DB-API ; les benchmarks y branchent une base locale.
+        self._local = threading.local()
+        self._connexions = []
+        self._connexions_lock = threading.Lock()
+        self.connect = connect
+        if connect is connect_sql_server:
+            from config.config import get_engine
+            self.engine_dwh = get_engine('dwh')
+        else:
+            self.engine_dwh = None
+
+        # Ouvre les connexions du thread principal dès le départ
+        self.conn_source
+        self.conn_dwh_pyodbc
+
+        # Fenêtre (en jours) de relecture des commandes déjà chargées
+        self.reprocess_days = reprocess_days
+
+        # Streaming de Fact_Ventes : taille des blocs (None = tout d'un bloc)
+        # et nombre de blocs extraits en avance
+        self.chunk_size = chunk_size
+        self.queue_depth = queue_depth
+
+        # Taille des lots d'INSERT de Fact_Ventes en rechargement complet
+        self.batch_size = batch_size
+
+        # Stockage physique de Fact_Ventes (voir physical_design.py)
+        self.fact_storage = fact_storage
+
+        # Répertoire de l'instantané lu par le dashboard (None = pas d'instantané)
+        self.snapshot_dir = snapshot_dir
+
+        # Point de reprise du chargement de Fact_Ventes en cours
+        self.checkpoint = None
         
+        # Spans de chronométrage par étape et sous-étape, exportés en fin de run
+        # (rapport JSON + fichier Prometheus ; None = pas d'export)
+        self.metrics = RunMetrics()
+        self.metrics_dir = metrics_dir
+
+        # Profileur (profiling.Profileur) : cProfile + tracemalloc par étape
+        self.profiler = profiler
+
         # Statistiques
         self.stats = {
             'start_time': datetime.now(),
-            'rows_loaded': {}
+            'rows_loaded': {},
+            'load_seconds': {}
         }
-    
+        # Horodatage unique du run (DateChargement de toutes les lignes)
+        self.run_timestamp = self.stats['start_time']
+        # Colonnes constantes de Fact_Ventes, répétées au chargement seulement
+        self.fact_constants = fact_constants(self.run_timestamp)
+
+    def _connect(self, nom):
+        conn = getattr(self._local, nom, None)
+        if conn is None:
+            base = 'source' if nom == 'conn_source' else 'dwh'
+            conn = self.connect(base)
+            setattr(self._local, nom, conn)
+            with self._connexions_lock:
+                self._connexions.append(conn)
+        return conn
+
+    @property
+    def conn_source(self):
+        return self._connect('conn_source')
+
+    @property
+    def conn_dwh_pyodbc(self):
+        # Connexion pyodbc directe vers DWH (pour contourner le problème)
+        return self._connect('conn_dwh_pyodbc')
+
+    def close_connections(self):
+        with self._connexions_lock:
+            for conn in self._connexions:
+                conn.close()
+            self._connexions = []
+        self._local = threading.local()
+
+    def _load(self, table, colonnes, df, batch_size=10000, commit_each_batch=False,
+              constantes=None, before_commit=None):
+        """Chargement en masse commun à toutes les étapes, avec mesure du débit."""
+        with self.metrics.span('load') as span:
+            rows, duree = bulk_insert(self.conn_dwh_pyodbc, table, colonnes, df,
+                                      batch_size=batch_size,
+                                      commit_each_batch=commit_each_batch,
+                                      constantes=constantes,
+                                      before_commit=before_commit)
+            span.ajouter(lignes=rows)
+        self.stats['load_seconds'][table] = self.stats['load_seconds'].get(table, 0) + duree
+        return rows
+
+    def _read_sql(self, query, params=None, colonnes=(), categorical=()):
+        """
+        Extraction depuis la source, comptée (lignes et octets) dans un span extract.
+        colonnes / categorical : politique de types appliquée dès la lecture (dtype_policy).
+        """
+        with self.metrics.span('extract') as span:
+            df = apply_dtypes(pd.read_sql(query, self.conn_source, params=params),
+                              colonnes, categorical)
+            span.ajouter(lignes=len(df), octets=octets_dataframe(df))
+        return df
+
+    def _commit(self):
+        with self.metrics.span('commit'):
+            self.conn_dwh_pyodbc.commit()
+
     # ====================
     # DIMENSION : CLIENTS
     # ====================
@@ -47,105 +199,50 @@ class NorthwindETL:
               City, Region, PostalCode, Country, Phone, Fax
         FROM Customers
         """
-        df = pd.read_sql(query, self.conn_source)
+        colonnes = [
+            ('CustomerID', NVARCHAR(5)), ('CompanyName', NVARCHAR(40)),
+            ('ContactName', NVARCHAR(30)), ('ContactTitle', NVARCHAR(30)),
+            ('Address', NVARCHAR(60)), ('City', NVARCHAR(15)),
+            ('Region', NVARCHAR(15)), ('PostalCode', NVARCHAR(10)),
+            ('Country', NVARCHAR(15)), ('Phone', NVARCHAR(24)),
+            ('Fax', NVARCHAR(24)), ('SourceSystem', NVARCHAR(50))
+        ]
+        df = self._read_sql(query, colonnes=colonnes,
+                            categorical=DIMENSION_CATEGORIES)
         print(f"  ➤ {len(df)} clients extraits")
         
         # TRANSFORM
-        df = df.fillna({'Region': 'Non spécifié', 'Fax': 'Non disponible'})
-        df['DateDebut'] = pd.to_datetime('today').date()
-        df['Actif'] = 1
-        df['SourceSystem'] = 'Python_ETL'
-        
-        # LOAD avec pyodbc direct (solution fiable)
-        print("   Chargement via pyodbc direct...")
+        with self.metrics.span('transform'):
+            df = fill_missing(df, {'Region': 'Non spécifié', 'Fax': 'Non disponible'})
         
-        cursor = self.conn_dwh_pyodbc.cursor()
-        
-        try:
-            print("   Vérification des contraintes FOREIGN KEY...")
-            find_fk_sql = """
-            SELECT 
-                fk.name AS ForeignKeyName,
-                OBJECT_NAME(fk.parent_object_id) AS ReferencingTable
-            FROM sys.foreign_keys fk
-            INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-            INNER JOIN sys.tables t ON fkc.referenced_object_id = t.object_id
-            WHERE t.name = 'Dim_Client'
-            """
-            
-            cursor.execute(find_fk_sql)
-            foreign_keys = cursor.fetchall()
-            
-            # Supprimer chaque contrainte FOREIGN KEY trouvée
-            for fk in foreign_keys:
-                fk_name = fk[0]
-                table_name = fk[1]
-                drop_fk_sql = f"ALTER TABLE [{table_name}] DROP CONSTRAINT [{fk_name}]"
-                cursor.execute(drop_fk_sql)
-                print(f"  ✓ Contrainte '{fk_name}' supprimée de '{table_name}'")
-            
-            if foreign_keys:
-                print(f"  ✓ {len(foreign_keys)} contrainte(s) FOREIGN KEY supprimée(s)")
-            
-            # Supprimer la table si elle existe
-            cursor.execute("IF OBJECT_ID('Dim_Client', 'U') IS NOT NULL DROP TABLE Dim_Client")
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Client supprimée")
-            
-            # Créer la table
-            create_sql = """
-            CREATE TABLE Dim_Client (
-                ClientID INT IDENTITY(1,1) PRIMARY KEY,
-                CustomerID NVARCHAR(5),
-                CompanyName NVARCHAR(40),
-                ContactName NVARCHAR(30),
-                ContactTitle NVARCHAR(30),
-                Address NVARCHAR(60),
-                City NVARCHAR(15),
-                Region NVARCHAR(15),
-                PostalCode NVARCHAR(10),
-                Country NVARCHAR(15),
-                Phone NVARCHAR(24),
-                Fax NVARCHAR(24),
-                DateDebut DATE,
-                Actif BIT,
-                SourceSystem NVARCHAR(50)
-            )
-            """
-            cursor.execute(create_sql)
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Client recréée")
-            
-            # Insérer les données
-            insert_sql = """
-            INSERT INTO Dim_Client 
-            (CustomerID, CompanyName, ContactName, ContactTitle, Address, City, 
-            Region, PostalCode, Country, Phone, Fax, DateDebut, Actif, SourceSystem)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            # Préparer les données
-            for _, row in df.iterrows():
-                cursor.execute(insert_sql, 
-                              str(row['CustomerID']), str(row['CompanyName']), 
-                              str(row['ContactName']), str(row['ContactTitle']), 
-                              str(row['Address']), str(row['City']),
-                              str(row['Region']), str(row['PostalCode']), 
-                              str(row['Country']), str(row['Phone']), 
-                              str(row['Fax']), row['DateDebut'], 
-                              int(row['Actif']), str(row['SourceSystem']))
-            
-            self.conn_dwh_pyodbc.commit()
-            print(f"  ✓ {len(df)} clients insérés")
-            
-        except Exception as e:
-            self.conn_dwh_pyodbc.rollback()
-            raise e
-        finally:
-            cursor.close()
-        
-        self.stats['rows_loaded']['Dim_Client'] = len(df)
-        print(f"   {len(df)} clients chargés")
+        # LOAD : merge SCD Type 2
+        create_sql = """
+        CREATE TABLE Dim_Client (
+            ClientID INT IDENTITY(1,1) PRIMARY KEY,
+            CustomerID NVARCHAR(5),
+            CompanyName NVARCHAR(40),
+            ContactName NVARCHAR(30),
+            ContactTitle NVARCHAR(30),
+            Address NVARCHAR(60),
+            City NVARCHAR(15),
+            Region NVARCHAR(15),
+            PostalCode NVARCHAR(10),
+            Country NVARCHAR(15),
+            Phone NVARCHAR(24),
+            Fax NVARCHAR(24),
+            DateDebut DATE,
+            DateFin DATE NULL,
+            Actif BIT,
+            HashLigne BIGINT,
+            HashType1 BIGINT,
+            SourceSystem NVARCHAR(50)
+        )
+        """
+        inconnu = {'CustomerID': 'N/A', 'CompanyName': 'Inconnu', 'Country': 'Inconnu'}
+        # Historisés : raison sociale et adresse ; contact, téléphone et fax écrasés
+        attributs = ['CompanyName', 'Address', 'City', 'Region', 'PostalCode', 'Country']
+        self._merge_dimension('Dim_Client', 'ClientID', 'CustomerID', create_sql, colonnes,
+                              attributs, df, inconnu, source_system='Python_ETL')
     
     # ====================
     # DIMENSION : PRODUITS
@@ -171,118 +268,61 @@ class NorthwindETL:
         LEFT JOIN Categories c ON p.CategoryID = c.CategoryID
         LEFT JOIN Suppliers s ON p.SupplierID = s.SupplierID
         """
-        df = pd.read_sql(query, self.conn_source)
+        colonnes = [
+            ('ProductID', INT), ('ProductName', NVARCHAR(40)),
+            ('SupplierID', INT), ('SupplierName', NVARCHAR(40)),
+            ('CategoryID', INT), ('CategoryName', NVARCHAR(15)),
+            ('QuantityPerUnit', NVARCHAR(20)), ('UnitPrice', MONEY),
+            ('UnitsInStock', SMALLINT), ('UnitsOnOrder', SMALLINT),
+            ('ReorderLevel', SMALLINT), ('Discontinued', BIT),
+            ('SourceSystem', NVARCHAR(50))
+        ]
+        df = self._read_sql(query, colonnes=colonnes,
+                            categorical=DIMENSION_CATEGORIES)
         print(f"  ➤ {len(df)} produits extraits")
         
         # Transformation
-        df = df.fillna({
-            'SupplierName': 'Fournisseur inconnu',
-            'CategoryName': 'Catégorie non définie'
-        })
-        
-        df['DateDebut'] = pd.to_datetime('today').date()
-        df['Actif'] = 1
-        df['SourceSystem'] = 'Python_ETL_v1.0'
-        
-        # LOAD avec pyodbc direct
-        print("   Chargement via pyodbc direct...")
-        
-        cursor = self.conn_dwh_pyodbc.cursor()
-        
-        try:
-            # ===== GESTION DES FOREIGN KEY =====
-            print("   Vérification des contraintes FOREIGN KEY...")
-            
-            # Chercher toutes les contraintes FOREIGN KEY qui référencent Dim_Produit
-            find_fk_sql = """
-            SELECT 
-                fk.name AS ForeignKeyName,
-                OBJECT_NAME(fk.parent_object_id) AS ReferencingTable
-            FROM sys.foreign_keys fk
-            INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-            INNER JOIN sys.tables t ON fkc.referenced_object_id = t.object_id
-            WHERE t.name = 'Dim_Produit'
-            """
-            
-            cursor.execute(find_fk_sql)
-            foreign_keys = cursor.fetchall()
-            
-            # Supprimer chaque contrainte FOREIGN KEY trouvée
-            for fk in foreign_keys:
-                fk_name = fk[0]
-                table_name = fk[1]
-                drop_fk_sql = f"ALTER TABLE [{table_name}] DROP CONSTRAINT [{fk_name}]"
-                cursor.execute(drop_fk_sql)
-                print(f"  ✓ Contrainte '{fk_name}' supprimée de '{table_name}'")
-            
-            if foreign_keys:
-                print(f"  ✓ {len(foreign_keys)} contrainte(s) FOREIGN KEY supprimée(s)")
-            
-            # Maintenant on peut supprimer la table
-            cursor.execute("IF OBJECT_ID('Dim_Produit', 'U') IS NOT NULL DROP TABLE Dim_Produit")
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Produit supprimée")
-            
-            # Créer la table
-            create_sql = """
-            CREATE TABLE Dim_Produit (
-                ProduitID INT IDENTITY(1,1) PRIMARY KEY,
-                ProductID INT,
-                ProductName NVARCHAR(40),
-                SupplierID INT,
-                SupplierName NVARCHAR(40),
-                CategoryID INT,
-                CategoryName NVARCHAR(15),
-                QuantityPerUnit NVARCHAR(20),
-                UnitPrice MONEY,
-                UnitsInStock SMALLINT,
-                UnitsOnOrder SMALLINT,
-                ReorderLevel SMALLINT,
-                Discontinued BIT,
-                DateDebut DATE,
-                Actif BIT,
-                SourceSystem NVARCHAR(50)
-            )
-            """
-            cursor.execute(create_sql)
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Produit recréée")
-            
-            # Insérer les données
-            insert_sql = """
-            INSERT INTO Dim_Produit 
-            (ProductID, ProductName, SupplierID, SupplierName, CategoryID, CategoryName,
-             QuantityPerUnit, UnitPrice, UnitsInStock, UnitsOnOrder, ReorderLevel, 
-             Discontinued, DateDebut, Actif, SourceSystem)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            for _, row in df.iterrows():
-                cursor.execute(insert_sql,
-                              int(row['ProductID']), str(row['ProductName']),
-                              int(row['SupplierID']) if pd.notna(row['SupplierID']) else None,
-                              str(row['SupplierName']),
-                              int(row['CategoryID']) if pd.notna(row['CategoryID']) else None,
-                              str(row['CategoryName']),
-                              str(row['QuantityPerUnit']) if pd.notna(row['QuantityPerUnit']) else None,
-                              float(row['UnitPrice']),
-                              int(row['UnitsInStock']) if pd.notna(row['UnitsInStock']) else 0,
-                              int(row['UnitsOnOrder']) if pd.notna(row['UnitsOnOrder']) else 0,
-                              int(row['ReorderLevel']) if pd.notna(row['ReorderLevel']) else 0,
-                              1 if row['Discontinued'] else 0,
-                              row['DateDebut'], 1, str(row['SourceSystem']))
-            
-            self.conn_dwh_pyodbc.commit()
-            print(f"  ✓ {len(df)} produits insérés")
-            
-        except Exception as e:
-            self.conn_dwh_pyodbc.rollback()
-            raise e
-        finally:
-            cursor.close()
+        with self.metrics.span('transform'):
+            df = fill_missing(df, {
+                'SupplierName': 'Fournisseur inconnu',
+                'CategoryName': 'Catégorie non définie',
+                'UnitsInStock': 0,
+                'UnitsOnOrder': 0,
+                'ReorderLevel': 0
+            })
         
-        self.stats['rows_loaded']['Dim_Produit'] = len(df)
-        print(f"   {len(df)} produits chargés")
+        # LOAD : merge SCD Type 2
+        create_sql = """
+        CREATE TABLE Dim_Produit (
+            ProduitID INT IDENTITY(1,1) PRIMARY KEY,
+            ProductID INT,
+            ProductName NVARCHAR(40),
+            SupplierID INT,
+            SupplierName NVARCHAR(40),
+            CategoryID INT,
+            CategoryName NVARCHAR(15),
+            QuantityPerUnit NVARCHAR(20),
+            UnitPrice MONEY,
+            UnitsInStock SMALLINT,
+            UnitsOnOrder SMALLINT,
+            ReorderLevel SMALLINT,
+            Discontinued BIT,
+            DateDebut DATE,
+            DateFin DATE NULL,
+            Actif BIT,
+            HashLigne BIGINT,
+            HashType1 BIGINT,
+            SourceSystem NVARCHAR(50)
+        )
+        """
+        inconnu = {'ProductID': UNKNOWN_MEMBER, 'ProductName': 'Inconnu',
+                   'CategoryName': 'Inconnu'}
+        # Historisés : attributs descriptifs ; prix, stock, commandes en cours et
+        # seuil de réapprovisionnement bougent à chaque mouvement : écrasés
+        attributs = ['ProductName', 'SupplierID', 'SupplierName', 'CategoryID',
+                     'CategoryName', 'QuantityPerUnit', 'Discontinued']
+        self._merge_dimension('Dim_Produit', 'ProduitID', 'ProductID', create_sql, colonnes,
+                              attributs, df, inconnu)
     
     # ====================
     # DIMENSION : EMPLOYÉS
@@ -309,117 +349,61 @@ class NorthwindETL:
             ReportsTo
         FROM Employees
         """
-        df = pd.read_sql(query, self.conn_source)
+        colonnes = [
+            ('EmployeeID', INT), ('LastName', NVARCHAR(20)),
+            ('FirstName', NVARCHAR(10)), ('Title', NVARCHAR(30)),
+            ('TitleOfCourtesy', NVARCHAR(25)), ('BirthDate', DATE),
+            ('HireDate', DATE), ('Address', NVARCHAR(60)),
+            ('City', NVARCHAR(15)), ('Region', NVARCHAR(15)),
+            ('PostalCode', NVARCHAR(10)), ('Country', NVARCHAR(15)),
+            ('HomePhone', NVARCHAR(24)), ('Extension', NVARCHAR(4)),
+            ('ReportsTo', INT), ('SourceSystem', NVARCHAR(50))
+        ]
+        df = self._read_sql(query, colonnes=colonnes,
+                            categorical=DIMENSION_CATEGORIES)
         print(f"  ➤ {len(df)} employés extraits")
         
         # Transformation
-        df = df.fillna({
-            'Region': 'Non spécifié',
-            'ReportsTo': -1
-        })
-        
-        df['DateDebut'] = pd.to_datetime('today').date()
-        df['Actif'] = 1
-        df['SourceSystem'] = 'Python_ETL_v1.0'
+        with self.metrics.span('transform'):
+            df = fill_missing(df, {
+                'Region': 'Non spécifié',
+                'ReportsTo': -1
+            })
         
-        # LOAD avec pyodbc direct
-        print("   Chargement via pyodbc direct...")
-        
-        cursor = self.conn_dwh_pyodbc.cursor()
-        
-        try:
-            # ===== GESTION DES FOREIGN KEY =====
-            print("   Vérification des contraintes FOREIGN KEY...")
-            
-            # Chercher toutes les contraintes FOREIGN KEY qui référencent Dim_Employe
-            find_fk_sql = """
-            SELECT 
-                fk.name AS ForeignKeyName,
-                OBJECT_NAME(fk.parent_object_id) AS ReferencingTable
-            FROM sys.foreign_keys fk
-            INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-            INNER JOIN sys.tables t ON fkc.referenced_object_id = t.object_id
-            WHERE t.name = 'Dim_Employe'
-            """
-            
-            cursor.execute(find_fk_sql)
-            foreign_keys = cursor.fetchall()
-            
-            # Supprimer chaque contrainte FOREIGN KEY trouvée
-            for fk in foreign_keys:
-                fk_name = fk[0]
-                table_name = fk[1]
-                drop_fk_sql = f"ALTER TABLE [{table_name}] DROP CONSTRAINT [{fk_name}]"
-                cursor.execute(drop_fk_sql)
-                print(f"  ✓ Contrainte '{fk_name}' supprimée de '{table_name}'")
-            
-            if foreign_keys:
-                print(f"  ✓ {len(foreign_keys)} contrainte(s) FOREIGN KEY supprimée(s)")
-            
-            # Supprimer la table si elle existe
-            cursor.execute("IF OBJECT_ID('Dim_Employe', 'U') IS NOT NULL DROP TABLE Dim_Employe")
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Employe supprimée")
-            
-            # Créer la table
-            create_sql = """
-            CREATE TABLE Dim_Employe (
-                EmployeID INT IDENTITY(1,1) PRIMARY KEY,
-                EmployeeID INT,
-                LastName NVARCHAR(20),
-                FirstName NVARCHAR(10),
-                Title NVARCHAR(30),
-                TitleOfCourtesy NVARCHAR(25),
-                BirthDate DATE,
-                HireDate DATE,
-                Address NVARCHAR(60),
-                City NVARCHAR(15),
-                Region NVARCHAR(15),
-                PostalCode NVARCHAR(10),
-                Country NVARCHAR(15),
-                HomePhone NVARCHAR(24),
-                Extension NVARCHAR(4),
-                ReportsTo INT,
-                DateDebut DATE,
-                Actif BIT,
-                SourceSystem NVARCHAR(50)
-            )
-            """
-            cursor.execute(create_sql)
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Employe recréée")
-            
-            # Insérer les données
-            insert_sql = """
-            INSERT INTO Dim_Employe 
-            (EmployeeID, LastName, FirstName, Title, TitleOfCourtesy, BirthDate,
-             HireDate, Address, City, Region, PostalCode, Country, HomePhone,
-             Extension, ReportsTo, DateDebut, Actif, SourceSystem)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            for _, row in df.iterrows():
-                cursor.execute(insert_sql,
-                              int(row['EmployeeID']), str(row['LastName']), str(row['FirstName']),
-                              str(row['Title']), str(row['TitleOfCourtesy']),
-                              row['BirthDate'], row['HireDate'],
-                              str(row['Address']), str(row['City']), str(row['Region']),
-                              str(row['PostalCode']), str(row['Country']),
-                              str(row['HomePhone']), str(row['Extension']),
-                              int(row['ReportsTo']),
-                              row['DateDebut'], 1, str(row['SourceSystem']))
-            
-            self.conn_dwh_pyodbc.commit()
-            print(f"  ✓ {len(df)} employés insérés")
-            
-        except Exception as e:
-            self.conn_dwh_pyodbc.rollback()
-            raise e
-        finally:
-            cursor.close()
-        
-        self.stats['rows_loaded']['Dim_Employe'] = len(df)
-        print(f"   {len(df)} employés chargés")
+        # LOAD : merge SCD Type 2
+        create_sql = """
+        CREATE TABLE Dim_Employe (
+            EmployeID INT IDENTITY(1,1) PRIMARY KEY,
+            EmployeeID INT,
+            LastName NVARCHAR(20),
+            FirstName NVARCHAR(10),
+            Title NVARCHAR(30),
+            TitleOfCourtesy NVARCHAR(25),
+            BirthDate DATE,
+            HireDate DATE,
+            Address NVARCHAR(60),
+            City NVARCHAR(15),
+            Region NVARCHAR(15),
+            PostalCode NVARCHAR(10),
+            Country NVARCHAR(15),
+            HomePhone NVARCHAR(24),
+            Extension NVARCHAR(4),
+            ReportsTo INT,
+            DateDebut DATE,
+            DateFin DATE NULL,
+            Actif BIT,
+            HashLigne BIGINT,
+            HashType1 BIGINT,
+            SourceSystem NVARCHAR(50)
+        )
+        """
+        inconnu = {'EmployeeID': UNKNOWN_MEMBER, 'LastName': 'Inconnu'}
+        # Historisés : nom, fonction, adresse et hiérarchie ; dates de naissance
+        # et d'embauche (corrections), téléphone et poste écrasés
+        attributs = ['LastName', 'FirstName', 'Title', 'TitleOfCourtesy', 'Address',
+                     'City', 'Region', 'PostalCode', 'Country', 'ReportsTo']
+        self._merge_dimension('Dim_Employe', 'EmployeID', 'EmployeeID', create_sql, colonnes,
+                              attributs, df, inconnu)
     
     # ====================
     # DIMENSION : TRANSPORTEURS
@@ -434,101 +418,331 @@ class NorthwindETL:
             Phone
         FROM Shippers
         """
-        df = pd.read_sql(query, self.conn_source)
+        colonnes = [
+            ('ShipperID', INT), ('CompanyName', NVARCHAR(40)),
+            ('Phone', NVARCHAR(24)), ('SourceSystem', NVARCHAR(50))
+        ]
+        df = self._read_sql(query, colonnes=colonnes,
+                            categorical=DIMENSION_CATEGORIES)
         print(f"  ➤ {len(df)} transporteurs extraits")
         
-        # Transformation
-        df['DateDebut'] = pd.to_datetime('today').date()
-        df['Actif'] = 1
-        df['SourceSystem'] = 'Python_ETL_v1.0'
-        
-        # LOAD avec pyodbc direct
-        print("   Chargement via pyodbc direct...")
-        
+        # LOAD : merge SCD Type 2
+        create_sql = """
+        CREATE TABLE Dim_Transporteur (
+            TransporteurID INT IDENTITY(1,1) PRIMARY KEY,
+            ShipperID INT,
+            CompanyName NVARCHAR(40),
+            Phone NVARCHAR(24),
+            DateDebut DATE,
+            DateFin DATE NULL,
+            Actif BIT,
+            HashLigne BIGINT,
+            HashType1 BIGINT,
+            SourceSystem NVARCHAR(50)
+        )
+        """
+        inconnu = {'ShipperID': UNKNOWN_MEMBER, 'CompanyName': 'Inconnu'}
+        # Historisé : raison sociale ; téléphone écrasé
+        self._merge_dimension('Dim_Transporteur', 'TransporteurID', 'ShipperID', create_sql,
+                              colonnes, ['CompanyName'], df, inconnu)
+
+    # ====================
+    # DIMENSION : TEMPS
+    # ====================
+    def etl_dim_temps(self):
+        print("\n ETL Dim_Temps...")
+
+        # Plage couverte : années complètes autour des dates de commande
+        with self.metrics.span('extract'):
+            cursor = self.conn_source.cursor()
+            try:
+                cursor.execute("SELECT MIN(OrderDate), MAX(OrderDate) FROM Orders")
+                date_min, date_max = cursor.fetchone()
+            finally:
+                cursor.close()
+
+        if date_min is None:
+            print("   Aucune commande : Dim_Temps non générée")
+            self.stats['rows_loaded']['Dim_Temps'] = 0
+            return
+
+        with self.metrics.span('transform') as span:
+            df = build_dim_temps(f"{date_min.year}-01-01", f"{date_max.year}-12-31")
+            span.ajouter(lignes=len(df))
+        print(f"  ➤ {len(df)} jours générés ({date_min.year} - {date_max.year})")
+
         cursor = self.conn_dwh_pyodbc.cursor()
-        
         try:
-            # ===== GESTION DES FOREIGN KEY =====
-            print("   Vérification des contraintes FOREIGN KEY...")
-            
-            # Chercher toutes les contraintes FOREIGN KEY qui référencent Dim_Transporteur
-            find_fk_sql = """
-            SELECT 
-                fk.name AS ForeignKeyName,
-                OBJECT_NAME(fk.parent_object_id) AS ReferencingTable
-            FROM sys.foreign_keys fk
-            INNER JOIN sys.foreign_key_columns fkc ON fk.object_id = fkc.constraint_object_id
-            INNER JOIN sys.tables t ON fkc.referenced_object_id = t.object_id
-            WHERE t.name = 'Dim_Transporteur'
-            """
-            
-            cursor.execute(find_fk_sql)
-            foreign_keys = cursor.fetchall()
-            
-            # Supprimer chaque contrainte FOREIGN KEY trouvée
-            for fk in foreign_keys:
-                fk_name = fk[0]
-                table_name = fk[1]
-                drop_fk_sql = f"ALTER TABLE [{table_name}] DROP CONSTRAINT [{fk_name}]"
-                cursor.execute(drop_fk_sql)
-                print(f"  ✓ Contrainte '{fk_name}' supprimée de '{table_name}'")
-            
-            if foreign_keys:
-                print(f"  ✓ {len(foreign_keys)} contrainte(s) FOREIGN KEY supprimée(s)")
-            
-            # Supprimer la table si elle existe
-            cursor.execute("IF OBJECT_ID('Dim_Transporteur', 'U') IS NOT NULL DROP TABLE Dim_Transporteur")
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Transporteur supprimée")
-            
-            # Créer la table
-            create_sql = """
-            CREATE TABLE Dim_Transporteur (
-                TransporteurID INT IDENTITY(1,1) PRIMARY KEY,
-                ShipperID INT,
-                CompanyName NVARCHAR(40),
-                Phone NVARCHAR(24),
-                DateDebut DATE,
-                Actif BIT,
-                SourceSystem NVARCHAR(50)
-            )
-            """
-            cursor.execute(create_sql)
-            self.conn_dwh_pyodbc.commit()
-            print("  ✓ Table Dim_Transporteur recréée")
-            
-            # Insérer les données
-            insert_sql = """
-            INSERT INTO Dim_Transporteur 
-            (ShipperID, CompanyName, Phone, DateDebut, Actif, SourceSystem)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """
-            
-            for _, row in df.iterrows():
-                cursor.execute(insert_sql,
-                              int(row['ShipperID']), str(row['CompanyName']),
-                              str(row['Phone']), row['DateDebut'], 1,
-                              str(row['SourceSystem']))
-            
-            self.conn_dwh_pyodbc.commit()
-            print(f"  ✓ {len(df)} transporteurs insérés")
-            
+            with self.metrics.span('ddl'):
+                cursor.execute(f"IF OBJECT_ID('Dim_Temps', 'U') IS NULL {CREATE_DIM_TEMPS}")
+                self.conn_dwh_pyodbc.commit()
+            cursor.execute("SELECT TempsID FROM Dim_Temps")
+            existants = {row[0] for row in cursor.fetchall()}
+        finally:
+            cursor.close()
+
+        # Seuls les jours absents sont insérés
+        df = df[~df['TempsID'].isin(existants)]
+        if len(df):
+            self._load('Dim_Temps', COLONNES_DIM_TEMPS, df)
+            self._commit()
+
+        self.stats['rows_loaded']['Dim_Temps'] = len(df)
+        print(f"   {len(df)} jours ajoutés")
+
+    def _merge_dimension(self, table, surrogate_key, natural_key, create_sql, colonnes,
+                         attributs, df, inconnu, source_system='Python_ETL_v1.0'):
+        """
+        Crée la dimension si besoin puis y fusionne df : SCD Type 2 sur attributs,
+        les autres colonnes de df sont écrasées sur place dans la version active.
+        SourceSystem n'est pas une colonne de df : la valeur est répétée au chargement.
+        """
+        print("   Merge SCD2 via pyodbc direct...")
+
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            with self.metrics.span('ddl'):
+                # La table n'est plus supprimée : les clés de substitution restent stables
+                cursor.execute(f"IF OBJECT_ID('{table}', 'U') IS NULL {create_sql}")
+                ensure_scd_columns(cursor, table)
+
+                # Membre « inconnu » : cible des faits dont la clé est absente
+                noms = [surrogate_key] + list(inconnu) + ['Actif', 'SourceSystem']
+                cursor.execute(f"""
+                IF NOT EXISTS (SELECT 1 FROM {table} WHERE {surrogate_key} = {UNKNOWN_MEMBER})
+                BEGIN
+                    SET IDENTITY_INSERT {table} ON;
+                    INSERT INTO {table} ({', '.join(noms)})
+                    VALUES ({', '.join('?' for _ in noms)});
+                    SET IDENTITY_INSERT {table} OFF;
+                END
+                """, UNKNOWN_MEMBER, *inconnu.values(), 1, 'Membre inconnu')
+                self.conn_dwh_pyodbc.commit()
         except Exception as e:
             self.conn_dwh_pyodbc.rollback()
             raise e
         finally:
             cursor.close()
-        
-        self.stats['rows_loaded']['Dim_Transporteur'] = len(df)
-        print(f"   {len(df)} transporteurs chargés")
+
+        # Comparaison des hash, staging et écriture des versions (commit compris)
+        with self.metrics.span('merge') as span:
+            resultat = scd2_merge(self.conn_dwh_pyodbc, table, surrogate_key, natural_key,
+                                  colonnes, attributs, df,
+                                  constantes={'SourceSystem': source_system})
+            span.ajouter(lignes=resultat['inserees'])
+
+        self.stats['rows_loaded'][table] = resultat['inserees']
+        self.stats['load_seconds'][table] = resultat['load_seconds']
+        print(f"   {len(df)} lignes comparées, {resultat['inserees']} écrites, "
+              f"{resultat['ecrasees']} écrasées")
     
     # ====================
     # TABLE DE FAITS : VENTES
     # ====================
-    def etl_fact_ventes(self):
+    def etl_fact_ventes(self, full_refresh=False, resume=False):
         print("\n ETL Fact_Ventes...")
-        
-        query = """
+
+        # Chargement précédent interrompu : repris au dernier lot validé (--resume),
+        # dans le même mode, sans supprimer la table
+        checkpoint = self._read_checkpoint('Fact_Ventes')
+        if (resume and full_refresh and checkpoint is not None and not checkpoint['termine']
+                and checkpoint['mode'] == MODE_INCREMENTAL):
+            # --full-refresh l'emporte : le point de reprise est abandonné (remplacé
+            # par celui du rechargement complet)
+            print(f"  ⚠️ --full-refresh : chargement incrémental {checkpoint['run_id']} "
+                  f"interrompu abandonné, rechargement complet")
+            reprise = None
+        else:
+            reprise = self._resume_point('Fact_Ventes', checkpoint, resume)
+        if reprise is not None:
+            full_refresh = reprise['mode'] == MODE_COMPLET
+            watermark = None if full_refresh else self._read_watermark('Fact_Ventes')
+        else:
+            if (not full_refresh and checkpoint is not None and not checkpoint['termine']
+                    and checkpoint['mode'] == MODE_COMPLET):
+                # Rechargement complet interrompu après le DROP : la table est
+                # incomplète, un chargement incrémental ne la compléterait pas
+                print("   Rechargement complet interrompu : rechargement complet")
+                full_refresh = True
+            watermark = None if full_refresh else self._read_watermark('Fact_Ventes')
+            if watermark is None or not self._table_exists('Fact_Ventes'):
+                if not full_refresh:
+                    print("   Aucun high-water mark : rechargement complet")
+                full_refresh = True
+            elif not self._column_exists('Fact_Ventes', 'ClientID'):
+                # Table créée avant les clés de substitution : on la reconstruit
+                print("   Fact_Ventes sans clés de substitution : rechargement complet")
+                full_refresh = True
+
+        # Périmètre de l'extraction (le high-water mark n'est écrit qu'en fin de
+        # chargement : une reprise retrouve le même périmètre)
+        conditions, params = [], []
+        if not full_refresh:
+            last_order_id, last_order_date = watermark
+            # Fenêtre de retraitement : les commandes récentes sont relues pour
+            # capter les ShippedDate renseignées après coup
+            date_retraitement = last_order_date - timedelta(days=self.reprocess_days)
+            print(f"   Mode incrémental : OrderID > {last_order_id} "
+                  f"ou OrderDate >= {date_retraitement:%Y-%m-%d}")
+            conditions.append("(o.OrderID > ? OR o.OrderDate >= ?)")
+            params += [last_order_id, date_retraitement]
+        if reprise is not None and reprise['last_order_id'] is not None:
+            # Extraction triée par (OrderID, ProductID) : on repart après le dernier lot validé
+            conditions.append("(od.OrderID > ? OR (od.OrderID = ? AND od.ProductID > ?))")
+            params += [reprise['last_order_id'], reprise['last_order_id'],
+                       reprise['last_product_id']]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params = params or None
+
+        with self.metrics.span('ddl'):
+            if full_refresh and reprise is None:
+                self._create_fact_table()
+            else:
+                # Les index secondaires du stockage choisi sont reconstruits après le chargement
+                disable_secondary_indexes(self.conn_dwh_pyodbc, 'Fact_Ventes',
+                                          [nom for _, nom, _ in
+                                           fact_secondary_indexes(self.fact_storage)])
+
+        # Point de reprise : avance à chaque lot validé, dans la même transaction
+        if reprise is None:
+            self._start_checkpoint('Fact_Ventes', MODE_COMPLET if full_refresh else MODE_INCREMENTAL)
+            max_chargee = None
+        else:
+            self.checkpoint = reprise
+            # Lignes peut-être validées après le dernier point de reprise enregistré
+            max_chargee = self._max_order_id('Fact_Ventes')
+
+        # Correspondances clé naturelle -> clé de substitution des dimensions
+        # (l'étape Fact_Ventes démarre après le chargement de toutes les dimensions)
+        print("   Résolution des clés de substitution...")
+        with self.metrics.span('keys') as span:
+            key_maps = build_key_maps(self.conn_dwh_pyodbc)
+            span.ajouter(lignes=sum(len(key_map) for key_map in key_maps.values()))
+
+        # EXTRACT : d'un bloc, ou par blocs de taille fixe en mode streaming
+        if self.chunk_size:
+            print(f"   Mode streaming : blocs de {self.chunk_size:,} lignes")
+            if self.profiler is None:
+                chunks = self._stream_fact_ventes(where, params)
+            else:
+                # Profilage : blocs lus dans le thread de l'étape, visibles par cProfile
+                chunks = self._extract_fact_ventes(where, params, chunksize=self.chunk_size)
+        else:
+            chunks = [self._extract_fact_ventes(where, params)]
+
+        print("   Chargement via pyodbc direct...")
+
+        total_extraites = 0
+        total_rows = 0
+        try:
+            for df in chunks:
+                if len(df) == 0:
+                    continue
+                total_extraites += len(df)
+
+                # TRANSFORM
+                with self.metrics.span('transform') as span:
+                    df = self._transform_fact_ventes(df)
+                    df = resolve_surrogate_keys(df, key_maps)
+                    span.ajouter(lignes=len(df), octets=octets_dataframe(df))
+
+                # LOAD
+                total_rows += self._load_fact_chunk(df, full_refresh, max_chargee)
+
+            print(f"  ➤ {total_extraites} lignes de vente extraites")
+            if self.checkpoint['last_order_id'] is not None:
+                self._write_watermark('Fact_Ventes', self.checkpoint['last_order_id'],
+                                      self.checkpoint['max_order_date'],
+                                      keep_existing=not full_refresh)
+            else:
+                print("   Aucune nouvelle vente")
+            # Chargement terminé : validé avec le high-water mark
+            self._save_checkpoint(termine=True)
+            self._commit()
+
+        except Exception as e:
+            self.conn_dwh_pyodbc.rollback()
+            raise e
+
+        self.stats['rows_loaded']['Fact_Ventes'] = total_rows
+        print(f"   {total_rows} ventes chargées")
+
+    def _load_fact_chunk(self, df, full_refresh, max_chargee=None):
+        """
+        Charge un bloc trié par (OrderID, ProductID) et fait avancer le point de
+        reprise à chaque commit. Le MERGE sur (OrderID, ProductID) est idempotent :
+        les lignes d'un lot déjà validé par un run interrompu peuvent être rejouées.
+        """
+        ecrites = 0
+        if full_refresh and max_chargee is not None:
+            deja = (df['OrderID'] <= max_chargee).to_numpy()
+            if deja.any():
+                ecrites += self._load_fact_incremental(df[deja])
+                self._save_checkpoint(df[deja])
+                self._commit()
+                df = df[~deja]
+        if df.empty:
+            return ecrites
+
+        if full_refresh:
+            ecrites += self._load('Fact_Ventes', FACT_COLONNES, df,
+                                  batch_size=self.batch_size, commit_each_batch=True,
+                                  constantes=self.fact_constants,
+                                  before_commit=self._save_checkpoint)
+        else:
+            ecrites += self._load_fact_incremental(df)
+            self._save_checkpoint(df)
+            self._commit()
+        return ecrites
+
+    def _stream_fact_ventes(self, where="", params=None):
+        """
+        Extraction par blocs dans un thread producteur : le bloc suivant est lu
+        pendant que le bloc courant est transformé et chargé. La file bornée
+        limite le nombre de blocs en mémoire, quelle que soit la volumétrie.
+        """
+        file = queue.Queue(maxsize=self.queue_depth)
+        fin = object()
+        arret = threading.Event()
+        # Le producteur mesure ses lectures dans le span de l'étape consommatrice
+        parent = self.metrics.courant()
+
+        def deposer(element):
+            # put() avec délai pour ne pas bloquer si le consommateur s'est arrêté
+            while not arret.is_set():
+                try:
+                    file.put(element, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producteur():
+            try:
+                for chunk in self._extract_fact_ventes(where, params, chunksize=self.chunk_size,
+                                                       parent=parent):
+                    if not deposer(chunk):
+                        return
+                deposer(fin)
+            except Exception as e:
+                deposer(e)
+
+        thread = threading.Thread(target=producteur, name='extract-fact_ventes', daemon=True)
+        thread.start()
+        try:
+            while True:
+                element = file.get()
+                if element is fin:
+                    break
+                if isinstance(element, Exception):
+                    raise element
+                yield element
+        finally:
+            arret.set()
+            thread.join()
+
+    def _extract_fact_ventes(self, where="", params=None, chunksize=None, parent=None):
+        query = f"""
         SELECT 
             od.OrderID,
             od.ProductID,
@@ -544,57 +758,53 @@ class NorthwindETL:
             o.Freight
         FROM [Order Details] od
         JOIN Orders o ON od.OrderID = o.OrderID
+        {where}
+        ORDER BY od.OrderID, od.ProductID
         """
-        df = pd.read_sql(query, self.conn_source)
-        print(f"  ➤ {len(df)} lignes de vente extraites")
-        
-        # ========== TRANSFORMATIONS ==========
-        
-        # 1. Convertir les dates en TempsID (YYYYMMDD)
-        df['OrderDate'] = pd.to_datetime(df['OrderDate'])
-        df['TempsID'] = (
-            df['OrderDate'].dt.year.astype(str) +
-            df['OrderDate'].dt.month.astype(str).str.zfill(2) +
-            df['OrderDate'].dt.day.astype(str).str.zfill(2)
-        ).astype(int)
-        
-        # 2. Calculer le montant de vente
-        df['MontantVente'] = df['Quantity'] * df['UnitPrice'] * (1 - df['Discount'])
-        
-        # 3. Taxe de transport (10% si >= 500)
-        df['TaxeTransport'] = df['Freight'].apply(
-            lambda x: x * 0.10 if x >= 500 else 0
-        )
-        
-        # 4. EstLivree (1 si livrée, 0 sinon)
-        df['EstLivree'] = df['ShippedDate'].notna().astype(int)
-        
-        # 5. Délai de livraison (en jours)
-        df['DelaiLivraison'] = 0
-        mask = df['ShippedDate'].notna() & df['RequiredDate'].notna()
-        df.loc[mask, 'DelaiLivraison'] = (
-            pd.to_datetime(df.loc[mask, 'ShippedDate']) - 
-            pd.to_datetime(df.loc[mask, 'RequiredDate'])
-        ).dt.days
-        
-        # 6. Date de chargement
-        df['DateChargement'] = datetime.now()
-        df['SourceSystem'] = 'Python_ETL_v1.0'
-        
-        # ========== CHARGEMENT ==========
-        print("   Chargement via pyodbc direct...")
-        
+        if chunksize is None:
+            with self.metrics.span('extract', parent) as span:
+                df = apply_dtypes(pd.read_sql(query, self.conn_source, params=params),
+                                  FACT_EXTRACT_COLONNES, FACT_CATEGORIES)
+                span.ajouter(lignes=len(df), octets=octets_dataframe(df))
+            return df
+        return self._measure_chunks(
+            pd.read_sql(query, self.conn_source, params=params, chunksize=chunksize), parent)
+
+    def _measure_chunks(self, chunks, parent=None):
+        """
+        Chaque bloc lu est typé (FACT_EXTRACT_COLONNES) et compté dans le span
+        extract (cumulé sur tous les blocs).
+        """
+        chunks = iter(chunks)
+        while True:
+            with self.metrics.span('extract', parent) as span:
+                df = next(chunks, None)
+                if df is not None:
+                    df = apply_dtypes(df, FACT_EXTRACT_COLONNES, FACT_CATEGORIES)
+                    span.ajouter(lignes=len(df), octets=octets_dataframe(df))
+            if df is None:
+                return
+            yield df
+
+    def _transform_fact_ventes(self, df):
+        return transform_fact_ventes(df)
+
+    def _create_fact_table(self):
         cursor = self.conn_dwh_pyodbc.cursor()
-        
         try:
-            # Supprimer la table si elle existe
+            # Supprimer la table si elle existe, avec son high-water mark (même
+            # transaction) : une table vidée n'est jamais complétée en incrémental
             cursor.execute("IF OBJECT_ID('Fact_Ventes', 'U') IS NOT NULL DROP TABLE Fact_Ventes")
+            cursor.execute("""
+            IF OBJECT_ID('ETL_Watermark', 'U') IS NOT NULL
+                DELETE FROM ETL_Watermark WHERE TableName = 'Fact_Ventes'
+            """)
             self.conn_dwh_pyodbc.commit()
             
             # Créer la table
             create_sql = """
             CREATE TABLE Fact_Ventes (
-                VenteID INT IDENTITY(1,1) PRIMARY KEY,
+                VenteID INT IDENTITY(1,1) NOT NULL,
                 CustomerID NVARCHAR(5),
                 ProductID INT,
                 TempsID INT,
@@ -610,70 +820,280 @@ class NorthwindETL:
                 DelaiLivraison INT,
                 OrderID INT,
                 DateChargement DATETIME,
-                SourceSystem NVARCHAR(50)
+                SourceSystem NVARCHAR(50),
+                ClientID INT,
+                ProduitID INT,
+                EmployeID INT,
+                TransporteurID INT,
+                CONSTRAINT PK_Fact_Ventes PRIMARY KEY NONCLUSTERED (VenteID),
+                CONSTRAINT UQ_Fact_Ventes_Ligne UNIQUE (OrderID, ProductID)
             )
             """
             cursor.execute(create_sql)
             self.conn_dwh_pyodbc.commit()
-            
-            # Insérer les données par lots
-            insert_sql = """
-            INSERT INTO Fact_Ventes 
-            (CustomerID, ProductID, TempsID, EmployeeID, ShipperID,
-             Quantite, PrixUnitaire, Remise, MontantVente, FraisTransport,
-             TaxeTransport, EstLivree, DelaiLivraison, OrderID,
-             DateChargement, SourceSystem)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        finally:
+            cursor.close()
+
+    def _load_fact_incremental(self, df):
+        """Upsert sur (OrderID, ProductID) via une table de staging et un MERGE."""
+        with self.metrics.span('merge') as span:
+            ecrites = self._merge_fact_ventes(df)
+            span.ajouter(lignes=ecrites)
+        return ecrites
+
+    def _merge_fact_ventes(self, df):
+        noms = [nom for nom, _ in FACT_COLONNES]
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("IF OBJECT_ID('tempdb..#Stage_Fact_Ventes') IS NOT NULL DROP TABLE #Stage_Fact_Ventes")
+            cursor.execute(f"SELECT TOP 0 {', '.join(noms)} INTO #Stage_Fact_Ventes FROM Fact_Ventes")
+
+            self._load('#Stage_Fact_Ventes', FACT_COLONNES, df, constantes=self.fact_constants)
+
+            # Seules les lignes nouvelles ou dont une mesure a changé sont écrites
+            # (DateChargement et SourceSystem ne comptent pas comme un changement)
+            compares = [nom for nom in noms if nom not in ('DateChargement', 'SourceSystem')]
+            merge_sql = f"""
+            MERGE Fact_Ventes AS t
+            USING #Stage_Fact_Ventes AS s
+                ON t.OrderID = s.OrderID AND t.ProductID = s.ProductID
+            WHEN MATCHED AND EXISTS (
+                SELECT {', '.join('s.' + nom for nom in compares)}
+                EXCEPT
+                SELECT {', '.join('t.' + nom for nom in compares)}
+            ) THEN UPDATE SET {', '.join(f'{nom} = s.{nom}' for nom in noms
+                                          if nom not in ('OrderID', 'ProductID'))}
+            WHEN NOT MATCHED BY TARGET THEN
+                INSERT ({', '.join(noms)})
+                VALUES ({', '.join('s.' + nom for nom in noms)})
+            OUTPUT $action;
             """
-            
-            batch_size = 1000
-            total_rows = len(df)
-            
-            for i in range(0, total_rows, batch_size):
-                batch = df.iloc[i:i+batch_size]
-                
-                for _, row in batch.iterrows():
-                    cursor.execute(insert_sql,
-                                  str(row['CustomerID']), int(row['ProductID']),
-                                  int(row['TempsID']), int(row['EmployeeID']),
-                                  int(row['ShipperID']), int(row['Quantity']),
-                                  float(row['UnitPrice']), float(row['Discount']),
-                                  float(row['MontantVente']), float(row['Freight']),
-                                  float(row['TaxeTransport']), int(row['EstLivree']),
-                                  int(row['DelaiLivraison']), int(row['OrderID']),
-                                  row['DateChargement'], str(row['SourceSystem']))
-                
-                self.conn_dwh_pyodbc.commit()
-                print(f"  ↳ Lot {i//batch_size + 1}/{(total_rows//batch_size)+1} chargé")
-            
-            print(f"  ✓ {total_rows} ventes insérées")
-            
-        except Exception as e:
-            self.conn_dwh_pyodbc.rollback()
-            raise e
+            cursor.execute(merge_sql)
+            actions = [row[0] for row in cursor.fetchall()]
+            inserees = actions.count('INSERT')
+            modifiees = actions.count('UPDATE')
+            print(f"  ✓ {inserees} ventes insérées, {modifiees} mises à jour, "
+                  f"{len(df) - inserees - modifiees} inchangées")
+
+            cursor.execute("DROP TABLE #Stage_Fact_Ventes")
+        finally:
+            cursor.close()
+
+        return inserees + modifiees
+
+    # ====================
+    # HIGH-WATER MARK
+    # ====================
+    def _table_exists(self, table):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("SELECT OBJECT_ID(?, 'U')", table)
+            return cursor.fetchone()[0] is not None
+        finally:
+            cursor.close()
+
+    def _column_exists(self, table, colonne):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("SELECT COL_LENGTH(?, ?)", table, colonne)
+            return cursor.fetchone()[0] is not None
+        finally:
+            cursor.close()
+
+    def _read_watermark(self, table):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("""
+            IF OBJECT_ID('ETL_Watermark', 'U') IS NULL
+            CREATE TABLE ETL_Watermark (
+                TableName NVARCHAR(50) PRIMARY KEY,
+                LastOrderID INT,
+                LastOrderDate DATETIME,
+                DateMaj DATETIME
+            )
+            """)
+            self.conn_dwh_pyodbc.commit()
+            cursor.execute(
+                "SELECT LastOrderID, LastOrderDate FROM ETL_Watermark WHERE TableName = ?",
+                table
+            )
+            row = cursor.fetchone()
+            return (row[0], row[1]) if row else None
+        finally:
+            cursor.close()
+
+    def _write_watermark(self, table, last_order_id, last_order_date, keep_existing=True):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            # En incrémental, le high-water mark ne recule jamais
+            cursor.execute("""
+            MERGE ETL_Watermark AS t
+            USING (SELECT ? AS TableName, ? AS LastOrderID, ? AS LastOrderDate) AS s
+                ON t.TableName = s.TableName
+            WHEN MATCHED THEN UPDATE SET
+                LastOrderID = CASE WHEN ? = 1 AND t.LastOrderID > s.LastOrderID
+                                   THEN t.LastOrderID ELSE s.LastOrderID END,
+                LastOrderDate = CASE WHEN ? = 1 AND t.LastOrderDate > s.LastOrderDate
+                                     THEN t.LastOrderDate ELSE s.LastOrderDate END,
+                DateMaj = GETDATE()
+            WHEN NOT MATCHED THEN
+                INSERT (TableName, LastOrderID, LastOrderDate, DateMaj)
+                VALUES (s.TableName, s.LastOrderID, s.LastOrderDate, GETDATE());
+            """, table, last_order_id, last_order_date,
+                int(keep_existing), int(keep_existing))
+            print(f"  ✓ High-water mark : OrderID {last_order_id}, "
+                  f"OrderDate {last_order_date:%Y-%m-%d}")
         finally:
             cursor.close()
-        
-        self.stats['rows_loaded']['Fact_Ventes'] = total_rows
-        print(f"   {total_rows} ventes chargées")
     
+    # ====================
+    # POINT DE REPRISE
+    # ====================
+    def _read_checkpoint(self, table):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("""
+            IF OBJECT_ID('ETL_Checkpoint', 'U') IS NULL
+            CREATE TABLE ETL_Checkpoint (
+                TableName NVARCHAR(50) PRIMARY KEY,
+                RunID NVARCHAR(40),
+                Mode NVARCHAR(20),
+                LastOrderID INT NULL,
+                LastProductID INT NULL,
+                MaxOrderDate DATETIME NULL,
+                Lignes BIGINT,
+                Termine BIT,
+                DateMaj DATETIME
+            )
+            """)
+            self.conn_dwh_pyodbc.commit()
+            cursor.execute(
+                "SELECT RunID, Mode, LastOrderID, LastProductID, MaxOrderDate, Lignes, Termine "
+                "FROM ETL_Checkpoint WHERE TableName = ?",
+                table
+            )
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+        if row is None:
+            return None
+        return {'table': table, 'run_id': row[0], 'mode': row[1], 'last_order_id': row[2],
+                'last_product_id': row[3], 'max_order_date': row[4], 'lignes': row[5],
+                'termine': bool(row[6])}
+
+    def _resume_point(self, table, checkpoint, resume):
+        """Point de reprise du dernier chargement de table s'il a été interrompu, sinon None."""
+        if checkpoint is None or checkpoint['termine']:
+            if resume:
+                print("   Aucun chargement interrompu : --resume ignoré")
+            return None
+        if not resume:
+            print(f"  ⚠️ Chargement {checkpoint['run_id']} interrompu après "
+                  f"{checkpoint['lignes']:,} lignes : relancé depuis le début "
+                  f"(--resume pour le reprendre)")
+            return None
+        if not self._table_exists(table):
+            print(f"  ⚠️ {table} absente : reprise impossible, chargement complet")
+            return None
+        print(f"   Reprise du chargement {checkpoint['run_id']} ({checkpoint['mode']}) : "
+              f"{checkpoint['lignes']:,} lignes déjà validées, après OrderID "
+              f"{checkpoint['last_order_id']} / ProductID {checkpoint['last_product_id']}")
+        return checkpoint
+
+    def _start_checkpoint(self, table, mode):
+        self.checkpoint = {'table': table, 'run_id': self.metrics.run_id, 'mode': mode,
+                           'last_order_id': None, 'last_product_id': None,
+                           'max_order_date': None, 'lignes': 0, 'termine': False}
+        self._save_checkpoint()
+        self._commit()
+
+    def _save_checkpoint(self, lot=None, termine=False):
+        """
+        Enregistre le point de reprise après lot (trié par OrderID, ProductID).
+        Pas de commit : il est validé avec les lignes du lot.
+        """
+        etat = self.checkpoint
+        if lot is not None and len(lot):
+            etat['last_order_id'] = int(lot['OrderID'].iloc[-1])
+            etat['last_product_id'] = int(lot['ProductID'].iloc[-1])
+            date_lot = lot['OrderDate'].max().to_pydatetime()
+            etat['max_order_date'] = (date_lot if etat['max_order_date'] is None
+                                      else max(etat['max_order_date'], date_lot))
+            etat['lignes'] += len(lot)
+        etat['termine'] = termine
+        self._write_checkpoint(etat)
+
+    def _write_checkpoint(self, etat):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("""
+            MERGE ETL_Checkpoint AS t
+            USING (SELECT ? AS TableName) AS s
+                ON t.TableName = s.TableName
+            WHEN MATCHED THEN UPDATE SET
+                RunID = ?, Mode = ?, LastOrderID = ?, LastProductID = ?,
+                MaxOrderDate = ?, Lignes = ?, Termine = ?, DateMaj = GETDATE()
+            WHEN NOT MATCHED THEN
+                INSERT (TableName, RunID, Mode, LastOrderID, LastProductID,
+                        MaxOrderDate, Lignes, Termine, DateMaj)
+                VALUES (s.TableName, ?, ?, ?, ?, ?, ?, ?, GETDATE());
+            """, etat['table'], *([etat['run_id'], etat['mode'], etat['last_order_id'],
+                                   etat['last_product_id'], etat['max_order_date'],
+                                   etat['lignes'], int(etat['termine'])] * 2))
+        finally:
+            cursor.close()
+
+    def _max_order_id(self, table):
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute(f"SELECT MAX(OrderID) FROM {table}")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
     # ====================
     # EXÉCUTION COMPLÈTE
     # ====================
-    def run_complete_etl(self):
+    def run_complete_etl(self, full_refresh=False, max_workers=4, resume=False):
+        succes = False
+        self.metrics.demarrer()
         try:
             print("\n" + "=" * 60)
             print(" DÉMARRAGE DE L'ETL COMPLET")
             print("=" * 60)
+            if self.profiler is not None:
+                print(f" Mode profilage : rapports dans {self.profiler.dossier}")
             
-            # Ordre IMPORTANT : dimensions d'abord !
-            self.etl_dim_client()
-            self.etl_dim_produit()
-            self.etl_dim_employe()
-            self.etl_dim_transporteur()
-            
-            # Puis la table de faits
-            self.etl_fact_ventes()
+            # Les dimensions sont indépendantes et tournent en parallèle ;
+            # la table de faits attend qu'elles soient toutes chargées
+            dimensions = [
+                Stage('Dim_Client', self.etl_dim_client),
+                Stage('Dim_Produit', self.etl_dim_produit),
+                Stage('Dim_Employe', self.etl_dim_employe),
+                Stage('Dim_Transporteur', self.etl_dim_transporteur),
+                Stage('Dim_Temps', self.etl_dim_temps),
+            ]
+            stages = dimensions + [
+                Stage('Tables obsolètes', self._drop_obsolete_tables),
+                Stage('Fact_Ventes',
+                      lambda: self.etl_fact_ventes(full_refresh=full_refresh, resume=resume),
+                      depends_on=[stage.name for stage in dimensions]),
+            ]
+            stages += self._index_stages()
+            # Chaque étape ouvre son span : ses sous-étapes s'y imbriquent
+            stages = [Stage(stage.name, partial(self._run_stage, stage), stage.depends_on)
+                      for stage in stages]
+            durations = run_stages(stages, max_workers=max_workers)
+            self.stats['stage_seconds'] = durations
+            self.stats['critical_path'] = critical_path(stages, durations)
+
+            # Les nouvelles données sont visibles : le dashboard reconstruit son cube
+            with self.metrics.span('Version'):
+                version = self.publish_version()
+            if self.snapshot_dir:
+                with self.metrics.span('Snapshot'), self._profile('Snapshot'):
+                    publish_snapshot(self.conn_dwh_pyodbc, version, self.snapshot_dir)
+            succes = True
             
             # Statistiques finales
             self.print_statistics()
@@ -683,10 +1103,85 @@ class NorthwindETL:
             import traceback
             traceback.print_exc()
         finally:
-            self.conn_source.close()
-            self.conn_dwh_pyodbc.close()
+            if self.profiler is not None:
+                self.profiler.terminer()
+            self.metrics.terminer(succes)
+            if self.metrics_dir:
+                # Exporté aussi en cas d'échec : la série run_success passe à 0
+                rapport, prom = self.metrics.ecrire(self.metrics_dir)
+                print(f"\n Métriques : {rapport}, {prom}")
+            self.close_connections()
             print("\n🔌 Connexions fermées")
+
+    def _run_stage(self, stage):
+        with self.metrics.span(stage.name), self._profile(stage.name):
+            stage.func()
+
+    def _profile(self, nom):
+        return self.profiler.etape(nom) if self.profiler is not None else nullcontext()
     
+    # ====================
+    # DESIGN PHYSIQUE
+    # ====================
+    def _index_stages(self):
+        """Étapes d'indexation après chargement, construites en parallèle."""
+        stages = [
+            # L'index cluster de Fact_Ventes passe avant ses index secondaires
+            Stage('Index Fact_Ventes', self._build_fact_storage, depends_on=['Fact_Ventes']),
+        ]
+        for table, nom, create_sql in fact_secondary_indexes(self.fact_storage):
+            stages.append(Stage(f'Index {nom}',
+                                partial(self._build_index, table, nom, create_sql),
+                                depends_on=['Index Fact_Ventes']))
+        for table, nom, create_sql in DIMENSION_INDEXES:
+            stages.append(Stage(f'Index {nom}',
+                                partial(self._build_index, table, nom, create_sql),
+                                depends_on=[table]))
+        return stages
+
+    def _build_fact_storage(self):
+        with self.metrics.span('index'):
+            ensure_fact_storage(self.conn_dwh_pyodbc, self.fact_storage)
+
+    def _build_index(self, table, nom, create_sql):
+        with self.metrics.span('index'):
+            ensure_index(self.conn_dwh_pyodbc, table, nom, create_sql)
+
+    def _drop_obsolete_tables(self):
+        with self.metrics.span('ddl'):
+            drop_obsolete_tables(self.conn_dwh_pyodbc)
+
+    # ====================
+    # PUBLICATION
+    # ====================
+    def publish_version(self):
+        """
+        Incrémente la version des données du DWH : le dashboard la compare à
+        celle de son cube et le reconstruit quand elle change.
+        """
+        cursor = self.conn_dwh_pyodbc.cursor()
+        try:
+            cursor.execute("""
+            IF OBJECT_ID('ETL_Version', 'U') IS NULL
+                CREATE TABLE ETL_Version (Version BIGINT NOT NULL, DatePublication DATETIME)
+            """)
+            cursor.execute("""
+            IF NOT EXISTS (SELECT 1 FROM ETL_Version)
+                INSERT INTO ETL_Version (Version, DatePublication) VALUES (0, GETDATE())
+            """)
+            cursor.execute("""
+            UPDATE ETL_Version SET Version = Version + 1, DatePublication = GETDATE()
+            OUTPUT inserted.Version
+            """)
+            version = cursor.fetchone()[0]
+            self.conn_dwh_pyodbc.commit()
+        finally:
+            cursor.close()
+
+        self.stats['data_version'] = version
+        print(f"\n Version des données publiée : {version}")
+        return version
+
     def print_statistics(self):
         print("\n" + "=" * 60)
         print(" STATISTIQUES DE L'ETL")
@@ -698,7 +1193,20 @@ class NorthwindETL:
         print(f" Tables chargées :")
         
         for table, rows in self.stats['rows_loaded'].items():
-            print(f"   • {table} : {rows:,} lignes")
+            duree = self.stats['load_seconds'].get(table)
+            if duree:
+                print(f"   • {table} : {rows:,} lignes ({rows / duree:,.0f} lignes/s au chargement)")
+            else:
+                print(f"   • {table} : {rows:,} lignes")
+        
+        if self.stats.get('stage_seconds'):
+            print(f" Durée des étapes :")
+            for stage, duree in self.stats['stage_seconds'].items():
+                print(f"   • {stage} : {duree:.2f} s")
+            chemin, duree = self.stats['critical_path']
+            print(f" Chemin critique : {' → '.join(chemin)} ({duree:.2f} s)")
+
+        self.metrics.afficher()
         
         total_rows = sum(self.stats['rows_loaded'].values())
         print(f"\n TOTAL : {total_rows:,} lignes chargées")
@@ -710,5 +1218,42 @@ class NorthwindETL:
 # EXÉCUTION
 # ====================
 if __name__ == "__main__":
-    etl = NorthwindETL()
-    etl.run_complete_etl()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ETL Northwind -> DWH_Northwind")
+    parser.add_argument('--full-refresh', action='store_true',
+                        help="Reconstruire Fact_Ventes entièrement au lieu du chargement incrémental")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprendre le chargement de Fact_Ventes interrompu au dernier lot validé "
+                             "(une reprise incrémentale cède à --full-refresh)")
+    parser.add_argument('--reprocess-days', type=int, default=30,
+                        help="Fenêtre de relecture des commandes récentes (défaut : 30 jours)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Extraire et charger Fact_Ventes par blocs (mémoire bornée)")
+    parser.add_argument('--chunk-size', type=int, default=50000,
+                        help="Taille des blocs en mode --stream (défaut : 50000 lignes)")
+    parser.add_argument('--fact-storage', choices=FACT_STORAGE_OPTIONS, default='columnstore',
+                        help="Stockage de Fact_Ventes après chargement (défaut : columnstore)")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Nombre d'étapes exécutées en parallèle (défaut : 4)")
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR,
+                        help="Répertoire de l'instantané colonnaire lu par le dashboard")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Ne pas publier l'instantané en fin de run")
+    parser.add_argument('--metrics-dir', default=METRICS_DIR,
+                        help="Répertoire du rapport JSON et du fichier Prometheus du run")
+    parser.add_argument('--no-metrics', action='store_true',
+                        help="Ne pas exporter les métriques du run")
+    parser.add_argument('--profile', action='store_true',
+                        help="Profiler chaque étape (cProfile + tracemalloc)")
+    parser.add_argument('--profile-dir', default=PROFILE_DIR,
+                        help="Répertoire des rapports de profilage")
+    args = parser.parse_args()
+
+    etl = NorthwindETL(reprocess_days=args.reprocess_days,
+                       chunk_size=args.chunk_size if args.stream else None,
+                       fact_storage=args.fact_storage,
+                       snapshot_dir=None if args.no_snapshot else args.snapshot_dir,
+                       metrics_dir=None if args.no_metrics else args.metrics_dir)
+    if args.profile:
+        etl.profiler = Profileur(args.profile_dir, run_id=etl.metrics.run_id)
+    etl.run_complete_etl(full_refresh=args.full_refresh, max_workers=args.workers,
+                         resume=args.resume)
\ No newline at end of file
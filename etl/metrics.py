@@ -0,0 +1,274 @@
+"""
+Métriques d'exécution de l'ETL
+Spans de chronométrage imbriqués : une étape (Dim_Client, Fact_Ventes...)
+contient ses sous-étapes (extract, transform, ddl, load, commit, index...).
+Chaque span porte le nombre d'appels, la durée cumulée, les lignes traitées,
+le débit, la taille des blocs traités (octets) et le pic de mémoire résidente pendant qu'il
+était ouvert. Un span rouvert sous le même parent (un bloc de plus en mode
+streaming) cumule dans le même nœud.
+
+En fin de run : rapport JSON complet (un fichier par run) et fichier texte
+Prometheus pour le collecteur textfile de node_exporter, remplacé à chaque
+run, sur lequel alerter en cas de baisse de débit.
+
+    data/metrics/
+        etl_run_20240101-020000-3fa2c1.json
+        northwind_etl.prom
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_DIR = os.environ.get('NORTHWIND_METRICS_DIR',
+                             os.path.join(PROJECT_ROOT, 'data', 'metrics'))
+
+PROMETHEUS_FICHIER = 'northwind_etl.prom'
+PREFIXE = 'northwind_etl'
+
+
+def rss_octets():
+    """Mémoire résidente du processus (0 si non mesurable sur cette plateforme)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def octets_dataframe(df):
+    """Taille en mémoire d'un DataFrame extrait, chaînes comprises."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class Span:
+    def __init__(self, nom, parent=None, lock=None):
+        self.nom = nom
+        self.parent = parent
+        self.enfants = {}
+        self.appels = 0
+        self.secondes = 0.0
+        self.lignes = 0
+        self.octets = 0
+        self.pic_rss = 0
+        self._lock = lock or threading.Lock()
+
+    @property
+    def chemin(self):
+        noms = []
+        span = self
+        while span.parent is not None:
+            noms.append(span.nom)
+            span = span.parent
+        return '/'.join(reversed(noms))
+
+    def ajouter(self, lignes=0, octets=0):
+        with self._lock:
+            self.lignes += int(lignes)
+            self.octets += int(octets)
+
+    def debit(self):
+        return self.lignes / self.secondes if self.lignes and self.secondes > 0 else None
+
+    def parcourir(self):
+        """Ce span puis tous ses descendants (profondeur d'abord)."""
+        yield self
+        for enfant in list(self.enfants.values()):
+            yield from enfant.parcourir()
+
+    def rapport(self):
+        debit = self.debit()
+        return {
+            'nom': self.nom,
+            'chemin': self.chemin,
+            'appels': self.appels,
+            'secondes': round(self.secondes, 4),
+            'lignes': self.lignes,
+            'lignes_par_seconde': round(debit) if debit else None,
+            'octets': self.octets,
+            'pic_rss_octets': self.pic_rss,
+            'enfants': [enfant.rapport() for enfant in self.enfants.values()],
+        }
+
+
+class RunMetrics:
+    """
+    Arbre de spans d'un run. Chaque thread a sa pile de spans ouverts : les
+    étapes lancées en parallèle par l'ordonnanceur s'attachent à la racine,
+    un thread producteur peut s'attacher à un span d'un autre thread (parent=).
+    """
+
+    def __init__(self, run_id=None, intervalle_rss=0.05):
+        self.run_id = run_id or (datetime.now().strftime('%Y%m%d-%H%M%S-')
+                                 + uuid.uuid4().hex[:6])
+        self.intervalle_rss = intervalle_rss
+        self._lock = threading.Lock()
+        self.racine = Span('run', lock=self._lock)
+        self.debut = None
+        self.fin = None
+        self.succes = None
+        self._local = threading.local()
+        self._ouverts = {}
+        self._arret = threading.Event()
+        self._thread = None
+
+    # ---------- cycle de vie ----------
+    def demarrer(self):
+        self.debut = datetime.now()
+        self._debut = time.perf_counter()
+        self._ouverts[self.racine] = 1
+        self._arret.clear()
+        self._thread = threading.Thread(target=self._echantillonner, name='metrics-rss',
+                                        daemon=True)
+        self._thread.start()
+
+    def terminer(self, succes=True):
+        self._arret.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._noter()
+        self.fin = datetime.now()
+        self.racine.secondes = time.perf_counter() - self._debut
+        self.racine.appels = 1
+        self.succes = succes
+
+    # ---------- spans ----------
+    def courant(self):
+        pile = getattr(self._local, 'pile', None)
+        return pile[-1] if pile else self.racine
+
+    @contextmanager
+    def span(self, nom, parent=None):
+        """with metrics.span('load') as span: ... ; span.ajouter(lignes=n)"""
+        parent = parent or self.courant()
+        with self._lock:
+            span = parent.enfants.get(nom)
+            if span is None:
+                span = parent.enfants[nom] = Span(nom, parent, self._lock)
+            span.appels += 1
+            self._ouverts[span] = self._ouverts.get(span, 0) + 1
+        if not hasattr(self._local, 'pile'):
+            self._local.pile = []
+        self._local.pile.append(span)
+        self._noter(span)
+        debut = time.perf_counter()
+        try:
+            yield span
+        finally:
+            duree = time.perf_counter() - debut
+            self._local.pile.pop()
+            self._noter(span)
+            with self._lock:
+                span.secondes += duree
+                self._ouverts[span] -= 1
+                if not self._ouverts[span]:
+                    del self._ouverts[span]
+
+    def _noter(self, *spans):
+        rss = rss_octets()
+        with self._lock:
+            for span in spans or list(self._ouverts):
+                span.pic_rss = max(span.pic_rss, rss)
+
+    def _echantillonner(self):
+        while not self._arret.wait(self.intervalle_rss):
+            self._noter()
+
+    # ---------- exports ----------
+    def rapport(self):
+        return {
+            'run_id': self.run_id,
+            'debut': self.debut.isoformat(timespec='seconds') if self.debut else None,
+            'fin': self.fin.isoformat(timespec='seconds') if self.fin else None,
+            'succes': self.succes,
+            'secondes': round(self.racine.secondes, 3),
+            'pic_rss_octets': self.racine.pic_rss,
+            'spans': [enfant.rapport() for enfant in self.racine.enfants.values()],
+        }
+
+    def prometheus(self):
+        """Texte au format d'exposition Prometheus (une série par span et par mesure)."""
+        lignes = []
+
+        def serie(nom, aide, valeurs):
+            lignes.append(f"# HELP {PREFIXE}_{nom} {aide}")
+            lignes.append(f"# TYPE {PREFIXE}_{nom} gauge")
+            for labels, valeur in valeurs:
+                texte = ','.join(f'{cle}="{echapper(v)}"' for cle, v in labels.items())
+                lignes.append(f"{PREFIXE}_{nom}{{{texte}}} {valeur}" if texte
+                              else f"{PREFIXE}_{nom} {valeur}")
+
+        spans = [span for span in self.racine.parcourir() if span is not self.racine]
+
+        def labels(span):
+            return {'stage': span.chemin.split('/')[0], 'span': span.chemin}
+
+        serie('run_success', "1 si le dernier run s'est terminé sans erreur",
+              [({}, int(bool(self.succes)))])
+        serie('run_timestamp_seconds', "Fin du dernier run (epoch)",
+              [({}, round(self.fin.timestamp() if self.fin else time.time(), 3))])
+        serie('run_seconds', "Durée totale du dernier run", [({}, round(self.racine.secondes, 3))])
+        serie('run_peak_rss_bytes', "Pic de mémoire résidente du dernier run",
+              [({}, self.racine.pic_rss)])
+        serie('span_seconds', "Durée cumulée du span",
+              [(labels(s), round(s.secondes, 4)) for s in spans])
+        serie('span_calls', "Nombre d'ouvertures du span", [(labels(s), s.appels) for s in spans])
+        serie('span_rows', "Lignes traitées dans le span",
+              [(labels(s), s.lignes) for s in spans if s.lignes])
+        serie('span_rows_per_second', "Débit du span (lignes/s)",
+              [(labels(s), round(s.debit(), 1)) for s in spans if s.debit()])
+        serie('span_bytes', "Taille des blocs traités dans le span (octets)",
+              [(labels(s), s.octets) for s in spans if s.octets])
+        serie('span_peak_rss_bytes', "Pic de mémoire résidente pendant le span",
+              [(labels(s), s.pic_rss) for s in spans])
+        return '\n'.join(lignes) + '\n'
+
+    def ecrire(self, dossier=METRICS_DIR):
+        """Écrit le rapport JSON du run et remplace le fichier Prometheus ; retourne les chemins."""
+        os.makedirs(dossier, exist_ok=True)
+        rapport = os.path.join(dossier, f"etl_run_{self.run_id}.json")
+        ecrire_atomique(rapport, json.dumps(self.rapport(), indent=2, ensure_ascii=False))
+        prom = os.path.join(dossier, PROMETHEUS_FICHIER)
+        # node_exporter peut lire le fichier à tout moment : remplacement atomique
+        ecrire_atomique(prom, self.prometheus())
+        return rapport, prom
+
+    def afficher(self):
+        print(f" Spans du run {self.run_id} :")
+        for span in self.racine.parcourir():
+            if span is self.racine:
+                continue
+            profondeur = span.chemin.count('/')
+            debit = span.debit()
+            details = f"{span.secondes:.2f} s"
+            if span.appels > 1:
+                details += f", {span.appels} appels"
+            if span.lignes:
+                details += f", {span.lignes:,} lignes"
+            if debit:
+                details += f", {debit:,.0f} lignes/s"
+            if span.octets:
+                details += f", {span.octets / 1e6:,.1f} Mo"
+            print(f"   {'  ' * profondeur}• {span.nom} : {details}, "
+                  f"pic RSS {span.pic_rss / 1e6:,.0f} Mo")
+
+
+def echapper(valeur):
+    return str(valeur).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def ecrire_atomique(chemin, texte):
+    temporaire = f"{chemin}.{os.getpid()}.tmp"
+    with open(temporaire, 'w', encoding='utf-8') as f:
+        f.write(texte)
+    os.replace(temporaire, chemin)
@@ -0,0 +1,174 @@
+"""
+Design physique du DWH
+- désactivation des index secondaires de Fact_Ventes avant chargement (ceux
+  du stockage choisi, reconstruits ensuite)
+- stockage de Fact_Ventes après chargement : columnstore cluster (défaut),
+  index cluster rowstore sur TempsID, ou heap
+- index non cluster couvrants sur les clés de jointure des dimensions
+- suppression des tables que plus rien ne lit (anciens agrégats mensuels)
+Chaque index est une étape indépendante de l'ordonnanceur (construction en parallèle).
+"""
+
+FACT_STORAGE_OPTIONS = ('columnstore', 'rowstore', 'heap')
+
+# Index cluster de Fact_Ventes selon le stockage choisi
+FACT_CLUSTERED = {
+    'columnstore': ('CCI_Fact_Ventes',
+                    "CREATE CLUSTERED COLUMNSTORE INDEX CCI_Fact_Ventes ON Fact_Ventes"),
+    'rowstore': ('CIX_Fact_Ventes_TempsID',
+                 "CREATE CLUSTERED INDEX CIX_Fact_Ventes_TempsID ON Fact_Ventes (TempsID)"),
+    'heap': (None, None),
+}
+
+# Index secondaires de Fact_Ventes (inutiles en columnstore : le segment
+# elimination et le mode batch couvrent ces filtres)
+FACT_SECONDARY_INDEXES = {
+    'columnstore': [],
+    'rowstore': [
+        ('IX_Fact_Ventes_ClientID',
+         "CREATE NONCLUSTERED INDEX IX_Fact_Ventes_ClientID ON Fact_Ventes (ClientID) "
+         "INCLUDE (MontantVente, Quantite, OrderID)"),
+        ('IX_Fact_Ventes_ProduitID',
+         "CREATE NONCLUSTERED INDEX IX_Fact_Ventes_ProduitID ON Fact_Ventes (ProduitID) "
+         "INCLUDE (MontantVente, Quantite, OrderID)"),
+    ],
+    'heap': [
+        ('IX_Fact_Ventes_TempsID',
+         "CREATE NONCLUSTERED INDEX IX_Fact_Ventes_TempsID ON Fact_Ventes (TempsID) "
+         "INCLUDE (ClientID, ProduitID, MontantVente, Quantite, OrderID)"),
+    ],
+}
+
+# Index couvrants des dimensions : clé naturelle + Actif (merge SCD2,
+# résolution des clés) et colonnes affichées par le dashboard
+DIMENSION_INDEXES = [
+    ('Dim_Client', 'IX_Dim_Client_CustomerID',
+     "CREATE NONCLUSTERED INDEX IX_Dim_Client_CustomerID ON Dim_Client (CustomerID, Actif) "
+     "INCLUDE (HashLigne, HashType1, CompanyName, Country)"),
+    ('Dim_Produit', 'IX_Dim_Produit_ProductID',
+     "CREATE NONCLUSTERED INDEX IX_Dim_Produit_ProductID ON Dim_Produit (ProductID, Actif) "
+     "INCLUDE (HashLigne, HashType1, ProductName, CategoryName)"),
+    ('Dim_Employe', 'IX_Dim_Employe_EmployeeID',
+     "CREATE NONCLUSTERED INDEX IX_Dim_Employe_EmployeeID ON Dim_Employe (EmployeeID, Actif) "
+     "INCLUDE (HashLigne, HashType1, LastName, FirstName)"),
+    ('Dim_Transporteur', 'IX_Dim_Transporteur_ShipperID',
+     "CREATE NONCLUSTERED INDEX IX_Dim_Transporteur_ShipperID ON Dim_Transporteur (ShipperID, Actif) "
+     "INCLUDE (HashLigne, HashType1, CompanyName)"),
+    ('Dim_Temps', 'IX_Dim_Temps_AnneeMois',
+     "CREATE NONCLUSTERED INDEX IX_Dim_Temps_AnneeMois ON Dim_Temps (Annee, Mois) "
+     "INCLUDE (NomMois, Trimestre)"),
+]
+
+
+# Agrégats mensuels d'anciennes versions de l'ETL : le dashboard lit son cube
+# (instantané ou Fact_Ventes), qui compte les commandes distinctes à tout grain,
+# ce que des cellules pré-agrégées ne permettent pas
+OBSOLETE_TABLES = ['Agg_Ventes_Mois_Client_Produit', 'Agg_Ventes_Mois_Categorie',
+                   'Agg_Ventes_Mois_Pays']
+
+
+def drop_obsolete_tables(conn):
+    """Supprime les tables de OBSOLETE_TABLES encore présentes dans le DWH."""
+    cursor = conn.cursor()
+    try:
+        supprimees = []
+        for table in OBSOLETE_TABLES:
+            cursor.execute("SELECT OBJECT_ID(?, 'U')", table)
+            if cursor.fetchone()[0] is not None:
+                cursor.execute(f"DROP TABLE {table}")
+                supprimees.append(table)
+        conn.commit()
+    finally:
+        cursor.close()
+
+    for table in supprimees:
+        print(f"  ✓ Table obsolète {table} supprimée")
+    return supprimees
+
+
+def disable_secondary_indexes(conn, table, index):
+    """
+    Désactive, parmi les index non cluster nommés dans index, ceux qui existent
+    et sont actifs. Seuls ceux-là sont reconstruits par les étapes d'index :
+    un index créé à la main ou laissé par un autre stockage reste actif.
+    """
+    if not index:
+        return []
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"""
+        SELECT name FROM sys.indexes
+        WHERE object_id = OBJECT_ID(?) AND type = 2
+          AND is_primary_key = 0 AND is_unique_constraint = 0 AND is_disabled = 0
+          AND name IN ({', '.join('?' for _ in index)})
+        """, table, *index)
+        noms = [row[0] for row in cursor.fetchall()]
+        for nom in noms:
+            cursor.execute(f"ALTER INDEX [{nom}] ON {table} DISABLE")
+        conn.commit()
+    finally:
+        cursor.close()
+
+    if noms:
+        print(f"  ✓ {len(noms)} index secondaire(s) désactivé(s) sur {table}")
+    return noms
+
+
+def ensure_index(conn, table, nom, create_sql):
+    """Crée l'index s'il manque, le reconstruit s'il a été désactivé."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT is_disabled FROM sys.indexes WHERE object_id = OBJECT_ID(?) AND name = ?",
+            table, nom
+        )
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(create_sql)
+            action = "créé"
+        elif row[0]:
+            cursor.execute(f"ALTER INDEX [{nom}] ON {table} REBUILD")
+            action = "reconstruit"
+        else:
+            action = None
+        conn.commit()
+    finally:
+        cursor.close()
+
+    if action:
+        print(f"  ✓ Index {nom} {action}")
+
+
+def ensure_fact_storage(conn, storage):
+    """Met l'index cluster de Fact_Ventes en conformité avec le stockage choisi."""
+    voulu, create_sql = FACT_CLUSTERED[storage]
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        SELECT name, is_primary_key FROM sys.indexes
+        WHERE object_id = OBJECT_ID('Fact_Ventes') AND type IN (1, 5)
+        """)
+        existant = cursor.fetchone()
+
+        if existant and existant[0] != voulu:
+            if existant[1]:
+                # Ancienne clé primaire cluster : elle devient non cluster
+                cursor.execute(f"ALTER TABLE Fact_Ventes DROP CONSTRAINT [{existant[0]}]")
+                cursor.execute("ALTER TABLE Fact_Ventes ADD CONSTRAINT PK_Fact_Ventes "
+                               "PRIMARY KEY NONCLUSTERED (VenteID)")
+            else:
+                cursor.execute(f"DROP INDEX [{existant[0]}] ON Fact_Ventes")
+            print(f"  ✓ Ancien index cluster {existant[0]} supprimé")
+            existant = None
+
+        if voulu and existant is None:
+            cursor.execute(create_sql)
+            print(f"  ✓ Index cluster {voulu} créé ({storage})")
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def fact_secondary_indexes(storage):
+    return [('Fact_Ventes', nom, sql) for nom, sql in FACT_SECONDARY_INDEXES[storage]]
@@ -0,0 +1,161 @@
+"""
+Profilage à la demande (--profile)
+Chaque étape est exécutée sous cProfile (temps par fonction) et tracemalloc
+(allocations par ligne de code). Pour chaque étape :
+
+    data/profiles/<run_id>/
+        01_Dim_Client.prof     profil brut (pstats, snakeviz)
+        01_Dim_Client.txt      top des fonctions par temps cumulé
+                               et des sites d'allocation (mémoire nette
+                               retenue en fin d'étape)
+        resume.txt             durée et mémoire de toutes les étapes
+
+Les étapes gardent leur parallélisme et peuvent s'imbriquer. cProfile ne
+suit que le thread qui l'active, et Python 3.12+ n'accepte qu'un profil
+actif par processus : une étape imbriquée, ou concurrente en 3.12+, est
+alors mesurée sans cProfile (durée et mémoire seulement). tracemalloc est
+global au processus : le pic d'une étape inclut les étapes concurrentes.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get('NORTHWIND_PROFILE_DIR',
+                             os.path.join(PROJECT_ROOT, 'data', 'profiles'))
+
+# Allocations internes au profilage, exclues des rapports (fichier de la ligne qui alloue)
+FICHIERS_EXCLUS = {
+    tracemalloc.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+}
+
+
+class Profileur:
+    def __init__(self, dossier=PROFILE_DIR, run_id=None, top=25, profondeur=1):
+        """
+        top        : nombre de fonctions et de sites d'allocation par rapport
+        profondeur : frames gardées par allocation (1 = ligne qui alloue)
+        """
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d-%H%M%S')
+        self.dossier = os.path.join(dossier, self.run_id)
+        self.top = top
+        self.profondeur = profondeur
+        self.etapes = []
+        self._lock = threading.Lock()
+        # Pic de mémoire tracée de chaque étape ouverte (reset_peak est global)
+        self._pics = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def etape(self, nom):
+        """with profileur.etape('Fact_Ventes'): ... (imbrications et étapes concurrentes admises)"""
+        jeton = object()
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.profondeur)
+            self._noter_pic()
+            if hasattr(tracemalloc, 'reset_peak'):
+                # Python 3.9+ ; avant, le pic couvre aussi les étapes précédentes
+                tracemalloc.reset_peak()
+            self._pics[jeton] = 0
+            avant = tracemalloc.take_snapshot()
+
+        profil = None
+        if not getattr(self._local, 'profil_actif', False):
+            profil = cProfile.Profile()
+            try:
+                profil.enable()
+                self._local.profil_actif = True
+            except ValueError:
+                # Python 3.12+ : un autre profil est déjà actif dans le processus
+                profil = None
+
+        debut = time.perf_counter()
+        try:
+            yield
+        finally:
+            if profil is not None:
+                profil.disable()
+                self._local.profil_actif = False
+            duree = time.perf_counter() - debut
+            with self._lock:
+                self._noter_pic()
+                pic = self._pics.pop(jeton)
+                apres = tracemalloc.take_snapshot()
+                self._ecrire(nom, profil, avant, apres, duree, pic)
+
+    def _noter_pic(self):
+        """Reporte le pic courant sur toutes les étapes ouvertes (avant tout reset_peak)."""
+        _, pic = tracemalloc.get_traced_memory()
+        for jeton in self._pics:
+            self._pics[jeton] = max(self._pics[jeton], pic)
+
+    def terminer(self):
+        """Arrête le traçage mémoire et écrit le résumé de toutes les étapes."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if not self.etapes:
+            return None
+        lignes = [f"{'Étape':<40}{'s':>10}{'pic Mo':>10}{'retenu Mo':>10}"]
+        for etape in self.etapes:
+            lignes.append(f"{etape['nom']:<40}{etape['secondes']:>10.2f}"
+                          f"{etape['pic_octets'] / 1e6:>10.1f}{etape['net_octets'] / 1e6:>+10.1f}")
+        chemin = os.path.join(self.dossier, 'resume.txt')
+        with open(chemin, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lignes) + '\n')
+
+        print(f"\n Profils des étapes ({self.dossier}) :")
+        for ligne in lignes:
+            print(f"   {ligne}")
+        return chemin
+
+    def _ecrire(self, nom, profil, avant, apres, duree, pic):
+        os.makedirs(self.dossier, exist_ok=True)
+        fichier = re.sub(r'[^\w.-]+', '_', nom)
+        base = os.path.join(self.dossier, f"{len(self.etapes) + 1:02d}_{fichier}")
+        sortie = io.StringIO()
+        if profil is not None:
+            profil.dump_stats(base + '.prof')
+            stats = pstats.Stats(profil, stream=sortie)
+            stats.sort_stats('cumulative').print_stats(self.top)
+        else:
+            sortie.write("cProfile non actif pour cette étape (étape imbriquée, ou concurrente "
+                         "en Python 3.12+) : voir le profil de l'étape englobante.\n")
+
+        # Exclusion sur les statistiques par ligne plutôt que trace par trace
+        # (filter_traces passe chaque allocation dans fnmatch : minutes après un import)
+        differences = [d for d in apres.compare_to(avant, 'lineno')
+                       if d.traceback[0].filename not in FICHIERS_EXCLUS]
+        net = sum(d.size_diff for d in differences)
+        sites = sorted(differences, key=lambda d: d.size_diff, reverse=True)[:self.top]
+
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(f"Étape : {nom}\n")
+            f.write(f"Durée : {duree:.2f} s, pic de mémoire tracée : {pic / 1e6:,.1f} Mo, "
+                    f"mémoire nette retenue : {net / 1e6:+,.1f} Mo\n\n")
+            f.write(f"== Top {self.top} fonctions par temps cumulé ==\n")
+            f.write(sortie.getvalue())
+            # Différence entre les instantanés de début et de fin d'étape : les objets
+            # temporaires alloués puis libérés pendant l'étape n'y figurent pas,
+            # seul le pic ci-dessus en tient compte
+            f.write(f"\n== Top {self.top} sites d'allocation : mémoire nette retenue en fin "
+                    f"d'étape (hors temporaires libérés) ==\n")
+            for difference in sites:
+                trace = difference.traceback[0]
+                f.write(f"{difference.size_diff / 1e6:>+10.2f} Mo {difference.count_diff:>+10,} blocs  "
+                        f"{trace.filename}:{trace.lineno}\n")
+
+        self.etapes.append({'nom': nom, 'secondes': duree, 'pic_octets': pic,
+                            'net_octets': net, 'rapport': base + '.txt'})
+        print(f"   Profil {nom} : {duree:.2f} s, pic {pic / 1e6:,.1f} Mo -> {base}.txt")
@@ -0,0 +1,162 @@
+"""
+Merge SCD des dimensions par comparaison de hash
+Chaque ligne entrante reçoit deux hash, comparés à ceux de la version active :
+- HashLigne sur les attributs suivis (Type 2) : un changement expire la
+  version active et en crée une nouvelle, avec une nouvelle clé de substitution ;
+- HashType1 sur les autres colonnes (stock, prix...) : un changement est
+  écrasé sur place dans la version active, sans nouvelle version.
+Seules les nouvelles lignes et les lignes modifiées sont écrites.
+"""
+
+import time
+from datetime import date
+import pandas as pd
+from bulk_loader import bulk_insert, column_values, BIGINT, BIT, DATE, INT
+
+
+def row_hash(df, colonnes):
+    """Hash 64 bits (signé, pour une colonne BIGINT) des colonnes suivies, ligne par ligne."""
+    # On normalise d'abord en valeurs Python natives puis en texte, pour que
+    # le hash ne dépende pas du dtype pandas (ex. int lu en float à cause d'un NULL)
+    normalise = pd.DataFrame({
+        nom: pd.Series(column_values(df[nom], type_sql[3]), index=df.index, dtype=object).astype(str)
+        for nom, type_sql in colonnes
+    })
+    return pd.util.hash_pandas_object(normalise, index=False).values.view('int64')
+
+
+def ensure_scd_columns(cursor, table):
+    """Ajoute DateFin, HashLigne et HashType1 aux tables créées avant le merge SCD2."""
+    cursor.execute(f"""
+    IF COL_LENGTH('{table}', 'DateFin') IS NULL
+        ALTER TABLE {table} ADD DateFin DATE NULL
+    """)
+    cursor.execute(f"""
+    IF COL_LENGTH('{table}', 'HashLigne') IS NULL
+        ALTER TABLE {table} ADD HashLigne BIGINT NULL
+    """)
+    cursor.execute(f"""
+    IF COL_LENGTH('{table}', 'HashType1') IS NULL
+        ALTER TABLE {table} ADD HashType1 BIGINT NULL
+    """)
+
+
+def scd2_merge(conn, table, surrogate_key, natural_key, colonnes, attributs, df,
+               constantes=None):
+    """
+    Fusionne df dans la dimension table (SCD Type 2 sur attributs, Type 1 ailleurs).
+
+    colonnes   : colonnes insérées (nom, type), hors DateDebut/Actif/HashLigne/HashType1
+    attributs  : noms des colonnes suivies (Type 2) ; les autres colonnes de df,
+                 hors clé naturelle, sont écrasées sur place (Type 1)
+    constantes : {colonne: valeur} commune à toutes les lignes (SourceSystem),
+                 absente de df et répétée au chargement
+    Retourne un dict {'inserees', 'expirees', 'ecrasees', 'inchangees', 'load_seconds'}.
+    """
+    aujourd_hui = date.today()
+    type_cle = dict(colonnes)[natural_key]
+    suivies = [(nom, type_sql) for nom, type_sql in colonnes if nom in attributs]
+    type1 = [(nom, type_sql) for nom, type_sql in colonnes
+             if nom not in attributs and nom != natural_key and nom in df]
+
+    df = df.copy()
+    df['HashLigne'] = row_hash(df, suivies)
+    df['HashType1'] = row_hash(df, type1) if type1 else 0
+
+    # Versions actives actuellement stockées (le membre inconnu, clé négative,
+    # ne vient pas de la source et n'est jamais expiré)
+    actives = pd.read_sql(
+        f"SELECT {surrogate_key}, {natural_key}, HashLigne, HashType1 FROM {table} "
+        f"WHERE Actif = 1 AND {surrogate_key} > 0",
+        conn
+    )
+    # Les clés naturelles sont comparées sous leur forme chargée
+    df['_cle'] = column_values(df[natural_key], type_cle[3])
+    actives['_cle'] = column_values(actives[natural_key], type_cle[3])
+
+    compare = df.merge(actives[['_cle', surrogate_key, 'HashLigne', 'HashType1']],
+                       on='_cle', how='left', suffixes=('', '_stocke'))
+    nouvelles = compare[surrogate_key].isna()
+    # Hash absents (lignes d'avant le merge SCD2 ou d'avant la séparation Type 1 /
+    # Type 2) : recalculés sur place, sans nouvelle version
+    sans_hash = compare[surrogate_key].notna() & (compare['HashLigne_stocke'].isna()
+                                                  | compare['HashType1_stocke'].isna())
+    modifiees = (compare[surrogate_key].notna() & ~sans_hash
+                 & (compare['HashLigne'] != compare['HashLigne_stocke']))
+    ecrasees = (compare[surrogate_key].notna() & ~sans_hash & ~modifiees
+                & (compare['HashType1'] != compare['HashType1_stocke']))
+    disparues = actives.loc[~actives['_cle'].isin(df['_cle']), surrogate_key]
+
+    a_inserer = compare[nouvelles | modifiees]
+    a_expirer = pd.concat([compare.loc[modifiees, surrogate_key], disparues])
+    a_rafraichir = compare[sans_hash | ecrasees]
+
+    resultat = {
+        'inserees': len(a_inserer),
+        'expirees': len(a_expirer),
+        'ecrasees': int(ecrasees.sum()),
+        'inchangees': len(df) - len(a_inserer) - len(a_rafraichir),
+        'load_seconds': 0.0
+    }
+    if a_inserer.empty and a_expirer.empty and a_rafraichir.empty:
+        print(f"  ✓ {table} inchangée ({len(df)} lignes comparées)")
+        return resultat
+
+    debut = time.perf_counter()
+    cursor = conn.cursor()
+    try:
+        # 1. Expirer les versions modifiées ou disparues de la source
+        if not a_expirer.empty:
+            cursor.execute(f"CREATE TABLE #Expire_{table} ({surrogate_key} INT PRIMARY KEY)")
+            bulk_insert(conn, f"#Expire_{table}", [(surrogate_key, INT)],
+                        a_expirer.to_frame(surrogate_key))
+            cursor.execute(f"""
+            UPDATE d SET Actif = 0, DateFin = ?
+            FROM {table} d
+            JOIN #Expire_{table} e ON d.{surrogate_key} = e.{surrogate_key}
+            """, aujourd_hui)
+            cursor.execute(f"DROP TABLE #Expire_{table}")
+
+        # 2. Attributs Type 1 modifiés, ou hash absents : mise à jour sur place
+        #    de la version active, qui garde sa clé de substitution
+        if not a_rafraichir.empty:
+            maj = [(nom, type_sql) for nom, type_sql in colonnes if nom != natural_key]
+            noms = [nom for nom, _ in maj]
+            cursor.execute(
+                # CAST : la colonne copiée ne doit pas garder la propriété IDENTITY
+                f"SELECT TOP 0 CAST({surrogate_key} AS INT) AS {surrogate_key}, "
+                f"{', '.join(noms)}, HashLigne, HashType1 "
+                f"INTO #Maj_{table} FROM {table}"
+            )
+            bulk_insert(conn, f"#Maj_{table}",
+                        [(surrogate_key, INT)] + maj
+                        + [('HashLigne', BIGINT), ('HashType1', BIGINT)],
+                        a_rafraichir, constantes=constantes)
+            hashs = ['HashLigne', 'HashType1']
+            cursor.execute(f"""
+            UPDATE d SET {', '.join(f'{nom} = m.{nom}' for nom in noms + hashs)}
+            FROM {table} d
+            JOIN #Maj_{table} m ON d.{surrogate_key} = m.{surrogate_key}
+            """)
+            cursor.execute(f"DROP TABLE #Maj_{table}")
+
+        # 3. Nouvelles versions actives
+        if not a_inserer.empty:
+            bulk_insert(conn, table,
+                        colonnes + [('DateDebut', DATE), ('Actif', BIT),
+                                    ('HashLigne', BIGINT), ('HashType1', BIGINT)],
+                        a_inserer,
+                        constantes={**(constantes or {}), 'DateDebut': aujourd_hui, 'Actif': 1})
+
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+
+    resultat['load_seconds'] = time.perf_counter() - debut
+    print(f"  ✓ {table} : {resultat['inserees']} version(s) insérée(s), "
+          f"{resultat['expirees']} expirée(s), {len(a_rafraichir)} mise(s) à jour sur place, "
+          f"{resultat['inchangees']} inchangée(s)")
+    return resultat
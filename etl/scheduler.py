@@ -0,0 +1,84 @@
+"""
+Ordonnanceur d'étapes ETL (graphe de dépendances)
+Les étapes indépendantes tournent en parallèle sur un pool borné de
+workers ; une étape ne démarre que lorsque toutes ses dépendances sont
+terminées.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class Stage:
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+def critical_path(stages, durations):
+    """Chemin le plus long (en temps) du graphe : c'est lui qui borne la durée totale."""
+    par_nom = {stage.name: stage for stage in stages}
+    cumul = {}
+    precedent = {}
+
+    def longueur(nom):
+        if nom not in cumul:
+            deps = par_nom[nom].depends_on
+            meilleure = max(deps, key=longueur) if deps else None
+            precedent[nom] = meilleure
+            cumul[nom] = durations[nom] + (cumul[meilleure] if meilleure else 0)
+        return cumul[nom]
+
+    fin = max(par_nom, key=longueur)
+    chemin = []
+    while fin is not None:
+        chemin.append(fin)
+        fin = precedent[fin]
+    return list(reversed(chemin)), cumul[chemin[0]]
+
+
+def run_stages(stages, max_workers=4):
+    """
+    Exécute les étapes en respectant leurs dépendances.
+    Retourne {nom: durée en secondes}. Une étape en échec arrête
+    l'ordonnancement : les étapes non démarrées sont annulées et l'erreur remonte.
+    """
+    par_nom = {stage.name: stage for stage in stages}
+    for stage in stages:
+        for dep in stage.depends_on:
+            if dep not in par_nom:
+                raise ValueError(f"Étape '{stage.name}' : dépendance inconnue '{dep}'")
+
+    durations = {}
+    en_cours = {}
+    restantes = list(stages)
+
+    def executer(stage):
+        debut = time.perf_counter()
+        stage.func()
+        return time.perf_counter() - debut
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='etl') as pool:
+        while restantes or en_cours:
+            # Soumettre toutes les étapes dont les dépendances sont terminées
+            pretes = [s for s in restantes if all(d in durations for d in s.depends_on)]
+            for stage in pretes:
+                restantes.remove(stage)
+                en_cours[pool.submit(executer, stage)] = stage
+
+            if not en_cours:
+                noms = ', '.join(s.name for s in restantes)
+                raise ValueError(f"Dépendances circulaires entre : {noms}")
+
+            terminees, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+            for future in terminees:
+                stage = en_cours.pop(future)
+                try:
+                    durations[stage.name] = future.result()
+                except Exception:
+                    for autre in en_cours:
+                        autre.cancel()
+                    raise
+
+    return durations
@@ -0,0 +1,161 @@
+"""
+Instantané colonnaire du schéma en étoile pour le dashboard
+À la fin de chaque run, Fact_Ventes est écrite en colonnes .npy (une par
+dimension ou mesure) dans un répertoire versionné, plus un manifest JSON.
+Les dimensions sont encodées par dictionnaire (codes int8/int16/int32 et
+libellés dans le manifest) : les fichiers restent petits tout en étant
+lisibles par np.load(mmap_mode='r'), sans copie, et les pages sont partagées
+entre les processus du dashboard.
+
+    snapshot/
+        courant.json          -> {"version": 12, "repertoire": "v12"}
+        v12/manifest.json
+        v12/Annee.npy, v12/Client.npy, ..., v12/OrderID.npy
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.environ.get('NORTHWIND_SNAPSHOT_DIR',
+                              os.path.join(PROJECT_ROOT, 'data', 'snapshot'))
+
+MANIFEST = 'manifest.json'
+POINTEUR = 'courant.json'
+
+# Versions gardées sur disque : un worker peut encore lire la précédente
+VERSIONS_CONSERVEES = 2
+
+FAITS_QUERY = """
+SELECT OrderID, TempsID, ClientID, ProduitID, MontantVente, Quantite
+FROM Fact_Ventes
+"""
+
+CLIENTS_QUERY = "SELECT ClientID, CompanyName, Country FROM Dim_Client"
+
+PRODUITS_QUERY = "SELECT ProduitID, ProductName, CategoryName FROM Dim_Produit"
+
+
+def code_dtype(cardinalite):
+    """Plus petit entier signé capable de porter cardinalite codes."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if cardinalite <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def encoder(valeurs):
+    """(codes, libellés triés) ; codes au type entier le plus étroit possible."""
+    codes, libelles = pd.factorize(pd.Series(valeurs).fillna('Inconnu'), sort=True)
+    return codes.astype(code_dtype(len(libelles))), libelles.tolist()
+
+
+def codes_par_cle(cles_faits, cles_dim, codes_dim):
+    positions = pd.Index(cles_dim).get_indexer(cles_faits)
+    if (positions < 0).any():
+        raise ValueError(f"{int((positions < 0).sum())} faits sans ligne de dimension")
+    return codes_dim[positions]
+
+
+def extract_colonnes(conn, chunksize=500000):
+    """Colonnes encodées du schéma en étoile : nom -> (tableau, libellés ou None)."""
+    clients = pd.read_sql(CLIENTS_QUERY, conn)
+    produits = pd.read_sql(PRODUITS_QUERY, conn)
+    # Un code par libellé : les versions SCD2 d'un client partagent le sien
+    dims_clients = {'Client': encoder(clients['CompanyName']), 'Pays': encoder(clients['Country'])}
+    dims_produits = {'Produit': encoder(produits['ProductName']),
+                     'Categorie': encoder(produits['CategoryName'])}
+
+    blocs = {nom: [] for nom in ['TempsID', 'Client', 'Pays', 'Produit', 'Categorie',
+                                 'ChiffreAffaires', 'QuantiteVendue', 'OrderID']}
+    for df in pd.read_sql(FAITS_QUERY, conn, chunksize=chunksize):
+        blocs['TempsID'].append(df['TempsID'].to_numpy(dtype=np.int32))
+        for nom, (codes, _) in dims_clients.items():
+            blocs[nom].append(codes_par_cle(df['ClientID'], clients['ClientID'], codes))
+        for nom, (codes, _) in dims_produits.items():
+            blocs[nom].append(codes_par_cle(df['ProduitID'], produits['ProduitID'], codes))
+        blocs['ChiffreAffaires'].append(df['MontantVente'].to_numpy(dtype=np.float64))
+        blocs['QuantiteVendue'].append(df['Quantite'].to_numpy(dtype=np.int32))
+        blocs['OrderID'].append(df['OrderID'].to_numpy(dtype=np.int32))
+
+    tableaux = {nom: np.concatenate(morceaux) if morceaux else np.zeros(0, dtype=np.int32)
+                for nom, morceaux in blocs.items()}
+
+    # Année et mois encodés une fois toutes les lignes connues, lus dans
+    # TempsID (YYYYMMDD) : l'instantané ne dépend pas de Dim_Temps
+    temps = tableaux.pop('TempsID')
+    colonnes = {'Annee': encoder(temps // 10000), 'Mois': encoder(temps // 100 % 100)}
+    for nom, (_, libelles) in dict(dims_clients, **dims_produits).items():
+        colonnes[nom] = (tableaux.pop(nom), libelles)
+    for nom, tableau in tableaux.items():
+        colonnes[nom] = (tableau, None)
+    return colonnes
+
+
+def write_snapshot(colonnes, version, dossier=SNAPSHOT_DIR):
+    """
+    Écrit les colonnes dans dossier/v<version>, puis bascule courant.json.
+    Les lecteurs voient l'ancienne version ou la nouvelle, jamais un état partiel.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    repertoire = f"v{version}"
+    final = os.path.join(dossier, repertoire)
+    temporaire = f"{final}.tmp-{os.getpid()}"
+    shutil.rmtree(temporaire, ignore_errors=True)
+    os.makedirs(temporaire)
+
+    manifest = {
+        'version': version,
+        'cree_le': datetime.now().isoformat(timespec='seconds'),
+        'lignes': len(next(iter(colonnes.values()))[0]),
+        'colonnes': {},
+    }
+    taille = 0
+    for nom, (tableau, libelles) in colonnes.items():
+        fichier = f"{nom}.npy"
+        np.save(os.path.join(temporaire, fichier), np.ascontiguousarray(tableau))
+        taille += tableau.nbytes
+        manifest['colonnes'][nom] = {'fichier': fichier, 'dtype': str(tableau.dtype)}
+        if libelles is not None:
+            manifest['colonnes'][nom]['libelles'] = libelles
+    with open(os.path.join(temporaire, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(temporaire, final)
+
+    pointeur_tmp = os.path.join(dossier, f"{POINTEUR}.tmp-{os.getpid()}")
+    with open(pointeur_tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'repertoire': repertoire}, f)
+    os.replace(pointeur_tmp, os.path.join(dossier, POINTEUR))
+
+    purge_versions(dossier, garder=repertoire)
+    return manifest['lignes'], taille
+
+
+def purge_versions(dossier, garder):
+    """Supprime les versions les plus anciennes au-delà de VERSIONS_CONSERVEES."""
+    versions = sorted(
+        (int(nom[1:]), nom) for nom in os.listdir(dossier)
+        if nom.startswith('v') and nom[1:].isdigit()
+    )
+    for _, nom in versions[:-VERSIONS_CONSERVEES]:
+        if nom != garder:
+            # Sous Windows un fichier encore mappé ne peut pas être supprimé :
+            # il le sera au run suivant
+            shutil.rmtree(os.path.join(dossier, nom), ignore_errors=True)
+
+
+def publish_snapshot(conn, version, dossier=SNAPSHOT_DIR):
+    """Extrait Fact_Ventes et ses dimensions et publie l'instantané de la version."""
+    debut = datetime.now()
+    lignes, taille = write_snapshot(extract_colonnes(conn), version, dossier)
+    duree = (datetime.now() - debut).total_seconds()
+    print(f"  ✓ Instantané v{version} : {lignes:,} lignes, {taille / 1024 / 1024:,.1f} Mo "
+          f"({duree:.2f}s) -> {dossier}")
+    return lignes
@@ -0,0 +1,60 @@
+"""
+Transformations de la table de faits Fact_Ventes
+Calculs purement vectoriels (arithmétique sur tableaux, pas de apply ni de
+conversions en texte) : voir benchmarks/bench_transform_ventes.py.
+Les colonnes calculées prennent le type de leur colonne dans le DWH ; les
+colonnes constantes du run (DateChargement, SourceSystem) ne sont pas
+ajoutées au lot mais passées au chargement (fact_constants).
+"""
+
+import numpy as np
+import pandas as pd
+
+SOURCE_SYSTEM = 'Python_ETL_v1.0'
+
+# Seuil et taux de la taxe de transport
+SEUIL_TAXE_TRANSPORT = 500
+TAUX_TAXE_TRANSPORT = 0.10
+
+# Noms de colonnes source -> noms de colonnes du DWH
+COLONNES_DWH = {
+    'Quantity': 'Quantite',
+    'UnitPrice': 'PrixUnitaire',
+    'Discount': 'Remise',
+    'Freight': 'FraisTransport'
+}
+
+
+def fact_constants(run_timestamp, source_system=SOURCE_SYSTEM):
+    """Colonnes de Fact_Ventes identiques pour toutes les lignes d'un run."""
+    return {'DateChargement': run_timestamp, 'SourceSystem': source_system}
+
+
+def transform_fact_ventes(df):
+    """Applique les règles métier de Fact_Ventes à une extraction [Order Details] JOIN Orders."""
+    # Chaque colonne date est convertie une seule fois
+    order_date = pd.to_datetime(df['OrderDate'])
+    shipped_date = pd.to_datetime(df['ShippedDate'])
+    required_date = pd.to_datetime(df['RequiredDate'])
+    df['OrderDate'] = order_date
+
+    # 1. TempsID (YYYYMMDD) par arithmétique entière
+    df['TempsID'] = (
+        order_date.dt.year * 10000 + order_date.dt.month * 100 + order_date.dt.day
+    ).astype('int32')
+
+    # 2. Montant de vente
+    df['MontantVente'] = df['Quantity'] * df['UnitPrice'] * (1 - df['Discount'])
+
+    # 3. Taxe de transport (10% si >= 500)
+    freight = df['Freight'].to_numpy(dtype='float64')
+    df['TaxeTransport'] = np.where(freight >= SEUIL_TAXE_TRANSPORT,
+                                   freight * TAUX_TAXE_TRANSPORT, 0.0)
+
+    # 4. EstLivree (1 si livrée, 0 sinon)
+    df['EstLivree'] = shipped_date.notna().astype('int8')
+
+    # 5. Délai de livraison en jours (0 si une des deux dates manque)
+    df['DelaiLivraison'] = (shipped_date - required_date).dt.days.fillna(0).astype('int32')
+
+    return df.rename(columns=COLONNES_DWH)
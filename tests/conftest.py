@@ -0,0 +1,7 @@
+import os
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Les modules de etl/ et analysis/ s'importent entre eux sans package
+for dossier in ('etl', 'analysis'):
+    sys.path.insert(0, os.path.join(RACINE, dossier))
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from donnees import DonneesDashboard
+
+
+class VersionsFactices:
+    def __init__(self, version):
+        self._version = version
+
+    def version(self):
+        return self._version
+
+
+@pytest.fixture
+def donnees(tmp_path, monkeypatch):
+    """DonneesDashboard sur un instantané v3, version du DWH fixée par chaque test."""
+    (tmp_path / 'courant.json').write_text(json.dumps({'version': 3, 'repertoire': 'v3'}))
+    donnees = DonneesDashboard(dossier_snapshot=str(tmp_path))
+    monkeypatch.setattr(donnees, '_initialiser', lambda: None)
+    return donnees
+
+
+def test_instantane_a_jour(donnees):
+    donnees.versions = VersionsFactices(3)
+    assert donnees.version_donnees() == (3, True)
+
+
+def test_instantane_perime_relu_depuis_le_dwh(donnees):
+    # Run suivant lancé avec --no-snapshot : ETL_Version a avancé
+    donnees.versions = VersionsFactices(4)
+    assert donnees.version_donnees() == (4, False)
+
+
+def test_dwh_injoignable_instantane_servi(donnees):
+    donnees.versions = None
+    assert donnees.version_donnees() == (3, True)
+
+
+def test_reconnexion_quitte_le_mode_demo(tmp_path, monkeypatch):
+    donnees = DonneesDashboard(dossier_snapshot=str(tmp_path))
+    tentatives = []
+
+    def connecter():
+        tentatives.append(1)
+        if len(tentatives) == 1:
+            raise ConnectionError("DWH injoignable")
+        donnees.versions = VersionsFactices(7)
+        donnees.tables_disponibles = {'Dim_Client', 'Dim_Produit', 'Fact_Ventes'}
+
+    monkeypatch.setattr(donnees, '_connecter', connecter)
+    assert donnees.version_donnees() == (None, False)
+    assert donnees.mode_demo
+
+    donnees.fermer_connexion()
+    assert donnees.version_donnees() == (7, False)
+    assert not donnees.mode_demo
+    assert donnees.erreur is None
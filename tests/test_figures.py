@@ -0,0 +1,28 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('dash')
+
+from cube import CubeVentes
+from dashboard import figure
+from figure_cache import FigureCache
+
+
+def lire_sql(sql, params=None):
+    """Lectures de depuis_dwh : mêmes faits quelle que soit la période demandée."""
+    if 'Fact_Ventes' in sql:
+        return pd.DataFrame({'OrderID': [1, 2], 'TempsID': [19970105, 19980210],
+                             'ClientID': [1, 1], 'ProduitID': [1, 1],
+                             'MontantVente': [10.0, 20.0], 'Quantite': [1, 2]})
+    if 'Dim_Client' in sql:
+        return pd.DataFrame({'ClientID': [1], 'CompanyName': ['Alfreds'], 'Country': ['Germany']})
+    return pd.DataFrame({'ProduitID': [1], 'ProductName': ['Chai'], 'CategoryName': ['Beverages']})
+
+
+def test_periode_dans_la_cle_en_mode_dwh(tmp_path):
+    cache = FigureCache(str(tmp_path))
+    for plage in [(19970101, 19971231), (19980101, 19981231)]:
+        cube = CubeVentes.depuis_dwh(lire_sql, plage, version=1)
+        figure(cube, 'ca-annuel', {}, cache)
+    # Deux périodes, même version et mêmes filtres : deux figures distinctes
+    assert (cache.misses, cache.hits) == (2, 0)
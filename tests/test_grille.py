@@ -0,0 +1,37 @@
+import pandas as pd
+
+from cube import CubeVentes
+
+
+def petit_cube():
+    faits = pd.DataFrame({
+        'OrderID': [1, 2, 3, 4, 5],
+        'TempsID': [19970105, 19970212, 19970910, 19971003, 19971120],
+        'ClientID': [1, 1, 2, 2, 1],
+        'ProduitID': [1, 2, 1, 2, 1],
+        'MontantVente': [100.0, 200.0, 300.0, 400.0, 500.0],
+        'Quantite': [1, 2, 3, 4, 5],
+    })
+    clients = pd.DataFrame({'ClientID': [1, 2], 'CompanyName': ['Alfreds', 'Bon app'],
+                            'Country': ['Germany', 'France']})
+    produits = pd.DataFrame({'ProduitID': [1, 2], 'ProductName': ['Chai', 'Chang'],
+                             'CategoryName': ['Beverages', 'Beverages']})
+    return CubeVentes.depuis_tables(faits, clients, produits)
+
+
+def test_filtre_numerique_sur_mois():
+    grille = petit_cube().grille()
+    lignes, _, total = grille.page(0, 20, filter_query='{Mois} > 9')
+    assert total == 2
+    assert sorted(ligne['Mois'] for ligne in lignes) == [10, 11]
+
+    _, _, total = grille.page(0, 20, filter_query='{Mois} >= 5')
+    assert total == 3
+
+
+def test_texte_sur_colonne_numerique():
+    grille = petit_cube().grille()
+    _, _, total = grille.page(0, 20, filter_query='{ChiffreAffaires} > abc')
+    assert total == 0
+    _, _, total = grille.page(0, 20, filter_query='{QuantiteVendue} != abc')
+    assert total == 5
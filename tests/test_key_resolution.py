@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from key_resolution import KeyMap, UNKNOWN_MEMBER
+
+
+def test_cles_resolues_et_inconnues():
+    key_map = KeyMap(['ALFKI', 'BONAP'], [10, 20])
+    cles, inconnues = key_map.resolve(pd.Series(['BONAP', 'XXXXX', 'ALFKI']))
+    assert cles.tolist() == [20, UNKNOWN_MEMBER, 10]
+    assert inconnues == 1
+
+
+def test_dimension_vide():
+    key_map = KeyMap(pd.Series([], dtype=object), np.array([], dtype='int32'))
+    for serie in (pd.Series(['ALFKI', 'BONAP']), pd.Series(['ALFKI', 'BONAP'], dtype='category')):
+        cles, inconnues = key_map.resolve(serie)
+        assert cles.tolist() == [UNKNOWN_MEMBER, UNKNOWN_MEMBER]
+        assert cles.dtype == np.int32
+        assert inconnues == 2
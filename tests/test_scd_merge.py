@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyodbc')
+
+import scd_merge
+from bulk_loader import INT, MONEY, NVARCHAR, SMALLINT
+
+COLONNES = [('ProductID', INT), ('ProductName', NVARCHAR(40)), ('UnitPrice', MONEY),
+            ('UnitsInStock', SMALLINT), ('SourceSystem', NVARCHAR(50))]
+ATTRIBUTS = ['ProductName']
+
+
+class ConnexionFactice:
+    """Connexion qui accepte les ordres SQL sans les exécuter."""
+
+    def cursor(self):
+        return self
+
+    def execute(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def produits():
+    return pd.DataFrame({'ProductID': [1, 2, 3], 'ProductName': ['Chai', 'Chang', 'Tofu'],
+                         'UnitPrice': [18.0, 19.0, 23.25], 'UnitsInStock': [39, 17, 35]})
+
+
+@pytest.fixture
+def merge(monkeypatch):
+    """scd2_merge contre une dimension déjà chargée avec produits() ; tables écrites -> lignes."""
+    actives = produits()
+    actives['ProduitID'] = [10, 11, 12]
+    actives['HashLigne'] = scd_merge.row_hash(actives, COLONNES[1:2])
+    actives['HashType1'] = scd_merge.row_hash(actives, COLONNES[2:4])
+    ecrites = {}
+    monkeypatch.setattr(scd_merge.pd, 'read_sql', lambda *args, **kwargs: actives)
+    monkeypatch.setattr(scd_merge, 'bulk_insert',
+                        lambda conn, table, colonnes, df, **kwargs: ecrites.update({table: len(df)}))
+
+    def executer(df):
+        resultat = scd_merge.scd2_merge(ConnexionFactice(), 'Dim_Produit', 'ProduitID',
+                                        'ProductID', COLONNES, ATTRIBUTS, df,
+                                        constantes={'SourceSystem': 'test'})
+        return resultat, ecrites
+    return executer
+
+
+def test_mouvement_de_stock_ecrase_sur_place(merge):
+    df = produits()
+    df.loc[0, 'UnitsInStock'] = 0
+    df.loc[1, 'UnitPrice'] = 21.0
+    resultat, ecrites = merge(df)
+    assert (resultat['inserees'], resultat['expirees'], resultat['ecrasees']) == (0, 0, 2)
+    assert ecrites == {'#Maj_Dim_Produit': 2}
+
+
+def test_attribut_suivi_cree_une_version(merge):
+    df = produits()
+    df.loc[2, 'ProductName'] = 'Tofu bio'
+    resultat, ecrites = merge(df)
+    assert (resultat['inserees'], resultat['expirees'], resultat['ecrasees']) == (1, 1, 0)
+    assert ecrites == {'#Expire_Dim_Produit': 1, 'Dim_Produit': 1}